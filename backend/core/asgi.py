@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+# Los pools y clientes asyncio solo se reutilizan con el loop de larga vida de ASGI
+os.environ['DJANGO_SERVIDOR_ASGI'] = 'true'
 
 application = get_asgi_application()
@@ -175,6 +175,78 @@ DECRIM_PASSWORD = os.environ.get(
     os.environ.get('PASSWORD_DECRIM', '')
 )
 MAX_INTENTOS_BIOMETRIA = int(os.environ.get('MAX_INTENTOS_BIOMETRIA', '2'))
+# Conexiones HTTP a DECRIM: sesion keep-alive compartida por proceso
+DECRIM_POOL_CONNECTIONS = int(os.environ.get('DECRIM_POOL_CONNECTIONS', '4'))
+DECRIM_POOL_MAXSIZE = int(os.environ.get('DECRIM_POOL_MAXSIZE', '10'))
+DECRIM_POOL_BLOCK = os.environ.get('DECRIM_POOL_BLOCK', 'False').lower() == 'true'
+DECRIM_KEEPALIVE = os.environ.get('DECRIM_KEEPALIVE', 'True').lower() == 'true'
+DECRIM_CONNECT_TIMEOUT = float(os.environ.get('DECRIM_CONNECT_TIMEOUT', '5'))
+DECRIM_READ_TIMEOUT = float(os.environ.get('DECRIM_READ_TIMEOUT', '30'))
+# Cliente async (httpx) para las vistas async bajo ASGI
+DECRIM_HTTP2 = os.environ.get('DECRIM_HTTP2', 'True').lower() == 'true'
+DECRIM_ASYNC_MAX_CONEXIONES = int(os.environ.get('DECRIM_ASYNC_MAX_CONEXIONES', '100'))
+# Imagenes y certificados de DECRIM (almacen por sha256, fuera de la BD)
+DECRIM_ARCHIVOS_DIR = os.environ.get('DECRIM_ARCHIVOS_DIR', str(BASE_DIR / 'var' / 'archivos_decrim'))
+# Segundos minimos entre descargas de imagenes/certificado de un mismo caso (0 = sin limite)
+DECRIM_ARCHIVOS_ACTUALIZAR_CADA_S = int(os.environ.get('DECRIM_ARCHIVOS_ACTUALIZAR_CADA_S', '300'))
+# Paso 1 sin esperar a DECRIM: responde 202 y crea el caso en segundo plano
+DECRIM_REGISTRO_ASINCRONO = os.environ.get('DECRIM_REGISTRO_ASINCRONO', 'False').lower() == 'true'
+DECRIM_REGISTRO_WORKERS = int(os.environ.get('DECRIM_REGISTRO_WORKERS', '4'))
+DECRIM_REGISTRO_RECUPERAR_TRAS_S = int(os.environ.get('DECRIM_REGISTRO_RECUPERAR_TRAS_S', '120'))
+
+# Presupuesto de llamadas a DECRIM compartido entre workers (cache de Django):
+# llamadas por minuto (0 = sin limite), rafaga y segundos maximos en cola
+# (0 = rechazar en lugar de esperar)
+DECRIM_LIMITE_REGISTRO_POR_MIN = float(os.environ.get('DECRIM_LIMITE_REGISTRO_POR_MIN', '0'))
+DECRIM_LIMITE_REGISTRO_RAFAGA = int(os.environ.get('DECRIM_LIMITE_REGISTRO_RAFAGA', '10'))
+DECRIM_LIMITE_REGISTRO_ESPERA_MAX = float(os.environ.get('DECRIM_LIMITE_REGISTRO_ESPERA_MAX', '10'))
+DECRIM_LIMITE_CONSULTA_POR_MIN = float(os.environ.get('DECRIM_LIMITE_CONSULTA_POR_MIN', '0'))
+DECRIM_LIMITE_CONSULTA_RAFAGA = int(os.environ.get('DECRIM_LIMITE_CONSULTA_RAFAGA', '30'))
+DECRIM_LIMITE_CONSULTA_ESPERA_MAX = float(os.environ.get('DECRIM_LIMITE_CONSULTA_ESPERA_MAX', '2'))
+# Si el cache del limitador falla: False = rechazar la llamada (no se
+# puede garantizar el presupuesto), True = dejarla pasar
+DECRIM_LIMITE_PERMITIR_SIN_CACHE = os.environ.get('DECRIM_LIMITE_PERMITIR_SIN_CACHE', 'False').lower() == 'true'
+
+# Cobertura (hedging) de consultas: segunda solicitud si la primera tarda mas
+# que el percentil de la latencia reciente; a lo sumo MAX_FRACCION coberturas
+# por consulta (<= 1)
+DECRIM_COBERTURA = os.environ.get('DECRIM_COBERTURA', 'False').lower() == 'true'
+DECRIM_COBERTURA_PERCENTIL = float(os.environ.get('DECRIM_COBERTURA_PERCENTIL', '0.95'))
+DECRIM_COBERTURA_MIN_MS = float(os.environ.get('DECRIM_COBERTURA_MIN_MS', '200'))
+DECRIM_COBERTURA_MAX_FRACCION = float(os.environ.get('DECRIM_COBERTURA_MAX_FRACCION', '0.1'))
+DECRIM_COBERTURA_MIN_MUESTRAS = int(os.environ.get('DECRIM_COBERTURA_MIN_MUESTRAS', '20'))
+DECRIM_COBERTURA_HILOS = int(os.environ.get('DECRIM_COBERTURA_HILOS', '32'))
+# Coberturas sincronas en vuelo por proceso (la perdedora no se aborta)
+DECRIM_COBERTURA_MAX_EN_CURSO = int(os.environ.get('DECRIM_COBERTURA_MAX_EN_CURSO', '8'))
+# Reintentos de consultas DECRIM (nunca de la creacion de registros)
+DECRIM_REINTENTOS_MAX = int(os.environ.get('DECRIM_REINTENTOS_MAX', '3'))
+DECRIM_REINTENTO_BASE = float(os.environ.get('DECRIM_REINTENTO_BASE', '0.5'))
+DECRIM_REINTENTO_TOPE = float(os.environ.get('DECRIM_REINTENTO_TOPE', '4'))
+DECRIM_REINTENTO_PRESUPUESTO = float(os.environ.get('DECRIM_REINTENTO_PRESUPUESTO', '20'))
+# Coalescencia de consultas concurrentes del mismo caso entre workers
+DECRIM_COALESCER_ESPERA = float(os.environ.get('DECRIM_COALESCER_ESPERA', '10'))
+DECRIM_COALESCER_TTL = int(os.environ.get('DECRIM_COALESCER_TTL', '5'))
+# Segundos que el polling reutiliza el ultimo estado de un caso (0 = sin cache)
+DECRIM_ESTADO_CACHE_TTL = int(os.environ.get('DECRIM_ESTADO_CACHE_TTL', '5'))
+# polling = cada poll consulta DECRIM; webhook = el poll responde desde la BD
+# mientras lleguen webhooks (si no llega ninguno en la ventana, vuelve a polling)
+DECRIM_MODO_ESTADO = os.environ.get('DECRIM_MODO_ESTADO', 'polling').lower()
+DECRIM_WEBHOOK_VENTANA_SALUD = float(os.environ.get('DECRIM_WEBHOOK_VENTANA_SALUD', '1800'))
+# Reconciliacion: casos PENDIENTE/EN_PROCESO sin webhook tras N minutos
+DECRIM_RECONCILIAR_TRAS_MIN = int(os.environ.get('DECRIM_RECONCILIAR_TRAS_MIN', '10'))
+DECRIM_RECONCILIAR_MAX_HORAS = int(os.environ.get('DECRIM_RECONCILIAR_MAX_HORAS', '48'))
+DECRIM_RECONCILIAR_LOTE = int(os.environ.get('DECRIM_RECONCILIAR_LOTE', '100'))
+DECRIM_RECONCILIAR_WORKERS = int(os.environ.get('DECRIM_RECONCILIAR_WORKERS', '4'))
+DECRIM_RECONCILIAR_INTERVALO = float(os.environ.get('DECRIM_RECONCILIAR_INTERVALO', '60'))
+# Un caso sin novedades se revisa cada tras_min * 2^n minutos, hasta este tope
+DECRIM_RECONCILIAR_BACKOFF_MAX_MIN = int(os.environ.get('DECRIM_RECONCILIAR_BACKOFF_MAX_MIN', '240'))
+
+# True cuando el proceso corre bajo core/asgi.py (lo fija ese modulo). Los
+# pools Oracle asyncio y las vistas async solo se usan bajo ASGI.
+SERVIDOR_ASGI = os.environ.get('DJANGO_SERVIDOR_ASGI', 'False').lower() == 'true'
+# Vistas async para el Paso 1 y 2 (se ignora fuera de ASGI: core/asgi.py)
+VISTAS_ASYNC = os.environ.get('VISTAS_ASYNC', 'False').lower() == 'true'
+
 DEV_SKIP_DECRIM = os.environ.get('DEV_SKIP_DECRIM', 'False').lower() == 'true'
 DEV_BIOMETRIA_AUTO_APPROVE = os.environ.get('DEV_BIOMETRIA_AUTO_APPROVE', 'False').lower() == 'true'
 
@@ -191,6 +263,11 @@ LINIX_TOKEN_CACHE_KEY = os.environ.get('LINIX_TOKEN_CACHE_KEY', 'linix_access_to
 LINIX_TOKEN_CACHE_SAFETY_SECONDS = int(os.environ.get('LINIX_TOKEN_CACHE_SAFETY_SECONDS', '60'))
 LINIX_VERIFY_SSL = os.environ.get('LINIX_VERIFY_SSL', 'True').lower() == 'true'
 LINIX_CA_BUNDLE = os.environ.get('LINIX_CA_BUNDLE', '')
+# Pool HTTP keep-alive hacia la API LINIX (una sesion por proceso)
+LINIX_POOL_CONNECTIONS = int(os.environ.get('LINIX_POOL_CONNECTIONS', '2'))
+LINIX_POOL_MAXSIZE = int(os.environ.get('LINIX_POOL_MAXSIZE', '10'))
+LINIX_POOL_BLOCK = os.environ.get('LINIX_POOL_BLOCK', 'False').lower() == 'true'
+LINIX_KEEPALIVE = os.environ.get('LINIX_KEEPALIVE', 'True').lower() == 'true'
 LINIX_DEFAULT_COUNTRY_CODE = os.environ.get('LINIX_DEFAULT_COUNTRY_CODE', '169')
 LINIX_DEFAULT_AUTORETENEDOR = os.environ.get('LINIX_DEFAULT_AUTORETENEDOR', 'N')
 LINIX_DEFAULT_TIPO_CON = os.environ.get('LINIX_DEFAULT_TIPO_CON', 'D')
@@ -200,6 +277,33 @@ LINIX_NIT_DEFAULT = os.environ.get('LINIX_NIT_DEFAULT', '')
 LINIX_DEFAULT_SUCURSAL = os.environ.get('LINIX_DEFAULT_SUCURSAL', '101')
 LINIX_DRY_RUN = os.environ.get('LINIX_DRY_RUN', 'False').lower() == 'true'
 LINIX_VERIFICACION_DRY_RUN = os.environ.get('LINIX_VERIFICACION_DRY_RUN', 'False').lower() == 'true'
+
+# Backend de LINIX: 'oracle' (produccion) o 'local' (simulador SQLite para
+# pruebas de carga, ver vinculacion/services/linix_local.py)
+LINIX_BACKEND = os.environ.get('LINIX_BACKEND', 'oracle').lower()
+# El simulador nunca reemplaza a Oracle por accidente: fuera de DEBUG solo con
+# LINIX_LOCAL_SIN_DEBUG=true (pruebas de carga, donde DEBUG guarda cada query)
+LINIX_LOCAL_SIN_DEBUG = os.environ.get('LINIX_LOCAL_SIN_DEBUG', 'False').lower() == 'true'
+if LINIX_BACKEND == 'local' and not DEBUG and not LINIX_LOCAL_SIN_DEBUG:
+    raise RuntimeError(
+        "LINIX_BACKEND=local replaces Oracle with the SQLite simulator; it requires DJANGO_DEBUG=true "
+        "or LINIX_LOCAL_SIN_DEBUG=true (load-test environments only)."
+    )
+LINIX_LOCAL_DB_PATH = os.environ.get('LINIX_LOCAL_DB_PATH', str(BASE_DIR / 'var' / 'linix_local.sqlite3'))
+# Latencia por procedimiento: PROCEDIMIENTO=mediana_ms:p99_ms separados por coma
+LINIX_LOCAL_LATENCIA_MS = os.environ.get(
+    'LINIX_LOCAL_LATENCIA_MS',
+    'SP_CONSULTACTU=40:250,SP_FLUJOEXITOSO=60:400,GR_TERCERO=5:40'
+)
+LINIX_LOCAL_TASA_ERROR = float(os.environ.get('LINIX_LOCAL_TASA_ERROR', '0'))
+LINIX_LOCAL_TASA_TIMEOUT = float(os.environ.get('LINIX_LOCAL_TASA_TIMEOUT', '0'))
+# Verificacion periodica de pendientes (n8n): hilos, tamano de lote,
+# plazo por lote y presupuesto total en segundos (< proxy_read_timeout de nginx)
+LINIX_VERIFICACION_WORKERS = int(os.environ.get('LINIX_VERIFICACION_WORKERS', '4'))
+LINIX_VERIFICACION_TAMANO_LOTE = int(os.environ.get('LINIX_VERIFICACION_TAMANO_LOTE', '10'))
+LINIX_VERIFICACION_TIMEOUT_LOTE = float(os.environ.get('LINIX_VERIFICACION_TIMEOUT_LOTE', '20'))
+LINIX_VERIFICACION_TIMEOUT_CEDULA = float(os.environ.get('LINIX_VERIFICACION_TIMEOUT_CEDULA', '10'))
+LINIX_VERIFICACION_PRESUPUESTO = float(os.environ.get('LINIX_VERIFICACION_PRESUPUESTO', '90'))
 LINIX_CATALOG_DEFAULTS = {
     'A_UBICACION_UNO': os.environ.get('LINIX_A_UBICACION_UNO', '1'),
     'A_UBICACION_DOS': os.environ.get('LINIX_A_UBICACION_DOS', '1'),
@@ -223,6 +327,50 @@ if not ORACLE_DSN:
     else:
         ORACLE_DSN = ''
 
+# Pool de sesiones Oracle (uno por proceso/worker de gunicorn).
+# Sesiones maximas contra LINIX = workers x ORACLE_POOL_MAX.
+ORACLE_POOL_MIN = int(os.environ.get('ORACLE_POOL_MIN', '1'))
+ORACLE_POOL_MAX = int(os.environ.get('ORACLE_POOL_MAX', '4'))
+ORACLE_POOL_INCREMENT = int(os.environ.get('ORACLE_POOL_INCREMENT', '1'))
+ORACLE_POOL_PING_INTERVAL = int(os.environ.get('ORACLE_POOL_PING_INTERVAL', '60'))
+ORACLE_POOL_SESSION_TIMEOUT = int(os.environ.get('ORACLE_POOL_SESSION_TIMEOUT', '300'))
+ORACLE_POOL_MAX_LIFETIME = int(os.environ.get('ORACLE_POOL_MAX_LIFETIME', '0'))
+ORACLE_POOL_WAIT_TIMEOUT_MS = int(os.environ.get('ORACLE_POOL_WAIT_TIMEOUT_MS', '5000'))
+ORACLE_STMT_CACHE_SIZE = int(os.environ.get('ORACLE_STMT_CACHE_SIZE', '40'))
+ORACLE_CONNECT_TIMEOUT = float(os.environ.get('ORACLE_CONNECT_TIMEOUT', '5'))
+
+# Database Resident Connection Pooling: las sesiones de todos los nodos y
+# workers comparten el pool de procesos servidor de la base. Requiere DRCP
+# iniciado en Oracle (DBMS_CONNECTION_POOL.START_POOL).
+ORACLE_DRCP = os.environ.get('ORACLE_DRCP', 'False').lower() == 'true'
+ORACLE_CCLASS = os.environ.get('ORACLE_CCLASS', 'VINCULACION')
+# self = reutiliza sesiones de la misma clase; new = sesion limpia en cada uso
+ORACLE_PURITY = os.environ.get('ORACLE_PURITY', 'self').lower()
+# Tiempo maximo por round trip a Oracle (call_timeout de la sesion); 0 = sin limite
+ORACLE_CALL_TIMEOUT_MS = int(os.environ.get('ORACLE_CALL_TIMEOUT_MS', '10000'))
+
+# Circuit breaker de Oracle (por proceso): fallos consecutivos que lo abren,
+# segundos abierto antes de probar y llamadas de prueba simultaneas.
+LINIX_CIRCUIT_UMBRAL_FALLOS = int(os.environ.get('LINIX_CIRCUIT_UMBRAL_FALLOS', '5'))
+LINIX_CIRCUIT_INTERVALO_PRUEBA = float(os.environ.get('LINIX_CIRCUIT_INTERVALO_PRUEBA', '30'))
+LINIX_CIRCUIT_MAX_PRUEBAS = int(os.environ.get('LINIX_CIRCUIT_MAX_PRUEBAS', '1'))
+
+# Cache de SP_CONSULTACTU (Paso 1) por (cedula, fecha_expedicion), en segundos.
+# 0 desactiva el cache para ese tipo de resultado.
+LINIX_ACTU_CACHE_TTL_ENCONTRADO = int(os.environ.get('LINIX_ACTU_CACHE_TTL_ENCONTRADO', '3600'))
+LINIX_ACTU_CACHE_TTL_NO_ENCONTRADO = int(os.environ.get('LINIX_ACTU_CACHE_TTL_NO_ENCONTRADO', '600'))
+LINIX_ACTU_CACHE_TTL_ERROR = int(os.environ.get('LINIX_ACTU_CACHE_TTL_ERROR', '10'))
+
+# Indice local (filtro de Bloom) de identificaciones de GR_TERCERO.
+# Se genera cada noche con `python manage.py construir_indice_asociados`.
+# Vacio desactiva el indice; uno mas viejo que LINIX_INDICE_MAX_EDAD_HORAS se ignora.
+LINIX_INDICE_ASOCIADOS_PATH = os.environ.get(
+    'LINIX_INDICE_ASOCIADOS_PATH',
+    str(BASE_DIR / 'var' / 'indice_asociados.bloom')
+)
+LINIX_INDICE_TASA_FALSOS_POSITIVOS = float(os.environ.get('LINIX_INDICE_TASA_FALSOS_POSITIVOS', '0.01'))
+LINIX_INDICE_MAX_EDAD_HORAS = float(os.environ.get('LINIX_INDICE_MAX_EDAD_HORAS', '36'))
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -301,6 +449,41 @@ DATABASES = {
     },
 }
 
+# Endpoints de estado y metricas (/api/v1/linix/estado/, /api/v1/linix/metricas/,
+# /api/v1/decrim/estado/): personal del admin (is_staff) o
+# 'Authorization: Bearer <MONITOREO_TOKEN>' (p.ej. Prometheus). Vacio = solo staff.
+MONITOREO_TOKEN = os.environ.get('MONITOREO_TOKEN', '')
+
+# Cache compartido: token de LINIX, SP_CONSULTACTU, limitadores y locks entre
+# workers. El default es la tabla vinculacion_cache de la BD (la crea la
+# migracion 0008 / python manage.py createcachetable), compartida por todos
+# los workers y nodos. Con Redis:
+#   DJANGO_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   DJANGO_CACHE_LOCATION=redis://127.0.0.1:6379/1
+# LocMemCache y DummyCache son por proceso: los locks no coordinan workers y
+# fuera de DEBUG no se aceptan, salvo DJANGO_CACHE_POR_PROCESO=true (un solo
+# worker).
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'vinculacion_cache'),
+    }
+}
+
+CACHE_POR_PROCESO = os.environ.get('DJANGO_CACHE_POR_PROCESO', 'False').lower() == 'true'
+if (
+    CACHES['default']['BACKEND'] in (
+        'django.core.cache.backends.locmem.LocMemCache',
+        'django.core.cache.backends.dummy.DummyCache',
+    )
+    and not DEBUG
+    and not CACHE_POR_PROCESO
+):
+    raise RuntimeError(
+        "DJANGO_CACHE_BACKEND is a per-process cache; use a shared one (DatabaseCache, Redis) "
+        "or set DJANGO_CACHE_POR_PROCESO=true for a single worker."
+    )
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -56,6 +56,7 @@ class PreRegistroAdmin(admin.ModelAdmin):
         'created_at',
         'updated_at',
         'fecha_validacion_biometria',
+        'archivos_biometria',
         'fecha_inicio_linix',
         'fecha_completado'
     ]
@@ -74,7 +75,8 @@ class PreRegistroAdmin(admin.ModelAdmin):
                 'estado_biometria',
                 'idcaso_biometria',
                 'justificacion_biometria',
-                'fecha_validacion_biometria'
+                'fecha_validacion_biometria',
+                'archivos_biometria'
             )
         }),
         ('Control de Intentos', {
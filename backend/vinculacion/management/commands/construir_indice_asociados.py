@@ -0,0 +1,60 @@
+# vinculacion/management/commands/construir_indice_asociados.py
+
+"""
+Exporta las identificaciones de GR_TERCERO (LINIX) a un filtro de Bloom
+en disco. Pensado para ejecutarse cada noche (cron/systemd timer):
+
+    python manage.py construir_indice_asociados
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from vinculacion.services import LinixService
+from vinculacion.services.indice_asociados import construir_indice
+
+
+class Command(BaseCommand):
+    help = "Construye el indice local (filtro de Bloom) de terceros de LINIX."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ruta',
+            default=getattr(settings, 'LINIX_INDICE_ASOCIADOS_PATH', ''),
+            help="Archivo de salida (default: LINIX_INDICE_ASOCIADOS_PATH)."
+        )
+        parser.add_argument(
+            '--tasa',
+            type=float,
+            default=getattr(settings, 'LINIX_INDICE_TASA_FALSOS_POSITIVOS', 0.01),
+            help="Tasa objetivo de falsos positivos (default: 0.01)."
+        )
+        parser.add_argument(
+            '--margen',
+            type=float,
+            default=1.2,
+            help="Factor de holgura sobre el conteo actual de terceros (default: 1.2)."
+        )
+
+    def handle(self, *args, **options):
+        ruta = options['ruta']
+        if not ruta:
+            raise CommandError("LINIX_INDICE_ASOCIADOS_PATH no esta configurado.")
+
+        linix_service = LinixService()
+        total = linix_service.contar_terceros()
+        self.stdout.write(f"Terceros en GR_TERCERO: {total}")
+
+        encabezado = construir_indice(
+            linix_service.iterar_identificaciones_terceros(),
+            ruta,
+            num_elementos_estimado=int(total * options['margen']) or 1,
+            tasa_falsos_positivos=options['tasa']
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Indice escrito en {ruta}: {encabezado['num_elementos']} identificaciones, "
+            f"{encabezado['tamano_bytes']} bytes, k={encabezado['num_hashes']}, "
+            f"falsos positivos ~{encabezado['tasa_falsos_positivos']:.4%}, "
+            f"{encabezado['duracion_construccion_ms']} ms"
+        ))
@@ -0,0 +1,103 @@
+# vinculacion/management/commands/poblar_linix_local.py
+
+"""
+Genera terceros sinteticos para el simulador local de LINIX
+(LINIX_BACKEND=local), para pruebas de carga del Paso 1 y el Paso 4:
+
+    python manage.py poblar_linix_local --cantidad 100000 --proporcion-flujo-ok 0.3
+"""
+
+import os
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from vinculacion.services.linix_local import conectar_sqlite
+
+NOMBRES = ['ANA', 'CARLOS', 'DIANA', 'JORGE', 'LUISA', 'MARIO', 'PAULA', 'SERGIO']
+APELLIDOS = ['GARCIA', 'RODRIGUEZ', 'MARTINEZ', 'LOPEZ', 'GOMEZ', 'DIAZ', 'TORRES', 'ROJAS']
+
+
+class Command(BaseCommand):
+    help = "Pobla la base SQLite del simulador local de LINIX con terceros sinteticos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ruta',
+            default=(
+                getattr(settings, 'LINIX_LOCAL_DB_PATH', '')
+                or os.path.join(settings.BASE_DIR, 'var', 'linix_local.sqlite3')
+            ),
+            help="Archivo SQLite (default: LINIX_LOCAL_DB_PATH)."
+        )
+        parser.add_argument(
+            '--cantidad',
+            type=int,
+            default=10000,
+            help="Terceros a generar (default: 10000)."
+        )
+        parser.add_argument(
+            '--cedula-inicial',
+            type=int,
+            default=1000000000,
+            help="Primera cedula; las demas son consecutivas (default: 1000000000)."
+        )
+        parser.add_argument(
+            '--proporcion-flujo-ok',
+            type=float,
+            default=0.5,
+            help="Fraccion de terceros con SP_FLUJOEXITOSO = OK (default: 0.5)."
+        )
+        parser.add_argument(
+            '--semilla',
+            type=int,
+            default=None,
+            help="Semilla aleatoria para datos reproducibles."
+        )
+        parser.add_argument(
+            '--limpiar',
+            action='store_true',
+            help="Borra los terceros existentes antes de generar."
+        )
+
+    def _filas(self, options, azar):
+        for i in range(options['cantidad']):
+            cedula = str(options['cedula_inicial'] + i)
+            flujo = 'OK' if azar.random() < options['proporcion_flujo_ok'] else 'PDTE'
+            yield (
+                cedula,
+                f"LOCAL-{cedula}",
+                azar.choice(NOMBRES),
+                None,
+                azar.choice(APELLIDOS),
+                azar.choice(APELLIDOS),
+                'A',
+                # Sin fecha: SP_CONSULTACTU simulado acepta cualquier fecha
+                None,
+                flujo,
+            )
+
+    def handle(self, *args, **options):
+        azar = random.Random(options['semilla'])
+        conexion = conectar_sqlite(options['ruta'])
+        try:
+            if options['limpiar']:
+                conexion.execute('DELETE FROM gr_tercero')
+            conexion.executemany(
+                """
+                INSERT OR REPLACE INTO gr_tercero (
+                    n_identificacion, id_tercero, primer_nombre, segundo_nombre,
+                    primer_apellido, segundo_apellido, estado, fecha_expedicion, flujo
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                self._filas(options, azar)
+            )
+            conexion.commit()
+            total, = conexion.execute('SELECT COUNT(*) FROM gr_tercero').fetchone()
+        finally:
+            conexion.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Simulador LINIX en {options['ruta']}: {total} terceros"
+        ))
@@ -0,0 +1,114 @@
+# vinculacion/management/commands/reconciliar_biometria.py
+
+"""
+Consulta en DECRIM los casos de biometria con webhook atrasado
+(PENDIENTE/EN_PROCESO sin cambios hace DECRIM_RECONCILIAR_TRAS_MIN
+minutos) y aplica el estado. Una pasada (cron/systemd timer):
+
+    python manage.py reconciliar_biometria
+
+O como proceso permanente (systemd service), con pasadas seguidas
+mientras haya trabajo y esperas de --intervalo segundos cuando no:
+
+    python manage.py reconciliar_biometria --continuo
+"""
+
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from vinculacion.services import ReconciliacionBiometriaService
+
+
+class Command(BaseCommand):
+    help = "Reconcilia con DECRIM los casos de biometria sin webhook reciente."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limite',
+            type=int,
+            default=None,
+            help="Casos maximos por pasada (default: DECRIM_RECONCILIAR_LOTE)."
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help="Consultas a DECRIM simultaneas (default: DECRIM_RECONCILIAR_WORKERS)."
+        )
+        parser.add_argument(
+            '--continuo',
+            action='store_true',
+            help="No terminar tras una pasada; detener con SIGTERM/SIGINT."
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=getattr(settings, 'DECRIM_RECONCILIAR_INTERVALO', 60),
+            help="Segundos entre pasadas sin trabajo pendiente (default: DECRIM_RECONCILIAR_INTERVALO)."
+        )
+
+    def handle(self, *args, **options):
+        self._detener = False
+        if options['continuo']:
+            signal.signal(signal.SIGTERM, self._solicitar_detencion)
+            signal.signal(signal.SIGINT, self._solicitar_detencion)
+
+        servicio = ReconciliacionBiometriaService()
+        limite = options['limite'] or servicio.lote
+        inicio = time.monotonic()
+        totales = {'pasadas': 0, 'revisados': 0, 'actualizados': 0, 'errores': 0}
+
+        while True:
+            close_old_connections()
+            resumen = servicio.reconciliar(limite, max_workers=options['workers'])
+            for clave in ('revisados', 'actualizados', 'errores'):
+                totales[clave] += resumen[clave]
+            totales['pasadas'] += 1
+            self._reportar(resumen)
+
+            if not options['continuo'] or self._detener:
+                break
+
+            # Lote completo: probablemente queda trabajo, seguir sin esperar
+            if resumen['revisados'] < limite:
+                self._esperar(options['intervalo'])
+                if self._detener:
+                    break
+
+        duracion = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciliacion terminada: {totales['pasadas']} pasadas, "
+            f"{totales['revisados']} casos revisados, {totales['actualizados']} actualizados, "
+            f"{totales['errores']} errores, "
+            f"{round(totales['revisados'] / duracion, 2) if duracion else 0} casos/s"
+        ))
+
+    def _reportar(self, resumen):
+        for caso in resumen['casos']:
+            if caso['cambio'] or caso['error']:
+                self.stdout.write(
+                    f"Pre-registro {caso['preregistro_id']}: "
+                    f"{caso['estado_anterior']} -> {caso['estado']}"
+                    + (f" (error: {caso['error']})" if caso['error'] else '')
+                )
+
+        self.stdout.write(
+            f"Pasada: {resumen['revisados']} revisados, {resumen['actualizados']} actualizados, "
+            f"{resumen['errores']} errores, {resumen['duracion_ms']} ms, "
+            f"{resumen['casos_por_segundo']} casos/s, "
+            f"retraso max {resumen['retraso_max_s']} s (promedio {resumen['retraso_promedio_s']} s), "
+            f"{resumen['atrasados']} casos atrasados"
+        )
+
+    def _esperar(self, segundos):
+        limite = time.monotonic() + segundos
+        while not self._detener and time.monotonic() < limite:
+            time.sleep(min(1, max(limite - time.monotonic(), 0)))
+
+    def _solicitar_detencion(self, signum, frame):
+        self.stdout.write("Senal recibida: terminando tras la pasada en curso")
+        self._detener = True
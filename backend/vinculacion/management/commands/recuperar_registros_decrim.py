@@ -0,0 +1,38 @@
+# vinculacion/management/commands/recuperar_registros_decrim.py
+
+"""
+Crea en DECRIM los casos de pre-registros que quedaron sin registrar
+(DECRIM_REGISTRO_ASINCRONO=True y el proceso se reinicio con la cola
+llena). Pensado para cron cada pocos minutos:
+
+    python manage.py recuperar_registros_decrim
+"""
+
+from django.core.management.base import BaseCommand
+
+from vinculacion.services import RegistroDecrimService
+
+
+class Command(BaseCommand):
+    help = "Crea en DECRIM los casos de pre-registros pendientes de registro."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limite',
+            type=int,
+            default=None,
+            help="Pre-registros maximos (default: DECRIM_RECONCILIAR_LOTE)."
+        )
+
+    def handle(self, *args, **options):
+        resumen = RegistroDecrimService().recuperar(options['limite'])
+
+        for caso in resumen['casos']:
+            if caso['error']:
+                self.stdout.write(f"Pre-registro {caso['preregistro_id']}: error: {caso['error']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Recuperacion terminada: {resumen['revisados']} revisados, "
+            f"{resumen['creados']} casos creados, {resumen['errores']} errores, "
+            f"{resumen['omitidos']} omitidos"
+        ))
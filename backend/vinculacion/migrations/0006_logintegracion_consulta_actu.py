@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-17 02:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vinculacion', '0005_preregistro_intentos_veto'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='logintegracion',
+            name='accion',
+            field=models.CharField(choices=[('CONSULTA_BIOMETRIA', 'Consulta Estado Biometría'), ('REGISTRO_DECRIM', 'Registro en DECRIM'), ('VERIFICACION_ORACLE', 'Verificación en Oracle'), ('WEBHOOK_N8N', 'Webhook a n8n'), ('NOTIFICACION_AGENCIA', 'Notificación de agencia por correo'), ('CONSULTA_ACTU', 'Consulta de asociado en Oracle')], help_text='Tipo de operación', max_length=50),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-17 02:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vinculacion', '0006_logintegracion_consulta_actu'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='preregistro',
+            name='archivos_biometria',
+            field=models.JSONField(blank=True, help_text='Referencias (sha256) a las imagenes y el certificado de DECRIM (archivos en DECRIM_ARCHIVOS_DIR)', null=True),
+        ),
+    ]
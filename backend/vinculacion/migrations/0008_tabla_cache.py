@@ -0,0 +1,20 @@
+# Tabla del cache de Django (DatabaseCache, el default de CACHES)
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def crear_tabla_cache(apps, schema_editor):
+    # No hace nada si CACHES no usa DatabaseCache o si la tabla ya existe
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vinculacion', '0007_preregistro_archivos_biometria'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_tabla_cache, migrations.RunPython.noop),
+    ]
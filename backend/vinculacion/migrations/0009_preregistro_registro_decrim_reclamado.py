@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-17 03:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vinculacion', '0008_tabla_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='preregistro',
+            name='registro_decrim_reclamado',
+            field=models.DateTimeField(blank=True, help_text='Cuando un worker tomo el registro del caso en DECRIM (evita crear dos casos)', null=True),
+        ),
+    ]
@@ -7,6 +7,7 @@ Solo almacenamos lo esencial para el flujo de 4 pasos.
 La información completa queda en LINIX (Oracle).
 """
 
+from django.conf import settings
 from django.db import models
 from django.core.validators import RegexValidator
 from django.utils import timezone
@@ -167,7 +168,19 @@ class PreRegistro(models.Model):
         default=False,
         help_text="Bloquea nuevos intentos hasta apertura manual"
     )
-    
+
+    archivos_biometria = models.JSONField(
+        blank=True,
+        null=True,
+        help_text="Referencias (sha256) a las imagenes y el certificado de DECRIM (archivos en DECRIM_ARCHIVOS_DIR)"
+    )
+
+    registro_decrim_reclamado = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text="Cuando un worker tomo el registro del caso en DECRIM (evita crear dos casos)"
+    )
+
     # ============================================
     # INTEGRACIÓN CON LINIX (PASO 3 y 4)
     # ============================================
@@ -279,6 +292,61 @@ class PreRegistro(models.Model):
         """
         return self.estado_biometria == self.BIOMETRIA_APROBADO
     
+    def aplicar_estado_biometria(self, estado_normalizado, idcaso=None, justificacion=None):
+        """
+        Aplica un estado de biometría (polling, webhook o reconciliación).
+
+        Si el estado es nuevo, actualiza fechas y estado de vinculación; un
+        rechazo cuenta como intento y, al llegar a MAX_INTENTOS_BIOMETRIA,
+        veta el pre-registro. Repetir el mismo estado no hace nada.
+
+        Args:
+            estado_normalizado (str): APROBADO, RECHAZADO o EN_PROCESO
+            idcaso (str): Idcaso del proveedor (se conserva el actual si es None)
+            justificacion (str): Justificación del proveedor (None = no cambia)
+
+        Returns:
+            bool: True si el estado cambió y se guardó
+        """
+        if self.estado_biometria == estado_normalizado:
+            return False
+
+        self.estado_biometria = estado_normalizado
+        if idcaso:
+            self.idcaso_biometria = str(idcaso)
+        if justificacion is not None:
+            self.justificacion_biometria = justificacion
+
+        if estado_normalizado == self.BIOMETRIA_APROBADO:
+            self.fecha_validacion_biometria = timezone.now()
+            self.estado_vinculacion = self.ESTADO_BIOMETRIA_OK
+
+        if estado_normalizado == self.BIOMETRIA_RECHAZADO:
+            max_intentos = int(getattr(settings, 'MAX_INTENTOS_BIOMETRIA', 2))
+            self.intentos_biometria = (self.intentos_biometria or 0) + 1
+            self.estado_vinculacion = self.ESTADO_ERROR
+            self.mensaje_error = 'Validacion de identidad rechazada.'
+            if self.intentos_biometria >= max_intentos:
+                self.vetado = True
+                self.mensaje_error = (
+                    'Validacion de identidad rechazada. '
+                    'Debe comunicarse con Congente para habilitar un nuevo intento.'
+                )
+
+        # Solo los campos de la transicion: no pisar cambios concurrentes de otros campos
+        self.save(update_fields=[
+            'estado_biometria',
+            'idcaso_biometria',
+            'justificacion_biometria',
+            'fecha_validacion_biometria',
+            'estado_vinculacion',
+            'intentos_biometria',
+            'mensaje_error',
+            'vetado',
+            'updated_at'
+        ])
+        return True
+
     def marcar_inicio_linix(self):
         """
         Marca que el usuario fue redirigido a LINIX.
@@ -339,6 +407,7 @@ class LogIntegracion(models.Model):
     ACCION_VERIFICACION_ORACLE = 'VERIFICACION_ORACLE'
     ACCION_WEBHOOK_N8N = 'WEBHOOK_N8N'
     ACCION_NOTIFICACION_AGENCIA = 'NOTIFICACION_AGENCIA'
+    ACCION_CONSULTA_ACTU = 'CONSULTA_ACTU'
     
     ACCION_CHOICES = [
         (ACCION_CONSULTA_BIOMETRIA, 'Consulta Estado Biometría'),
@@ -346,6 +415,7 @@ class LogIntegracion(models.Model):
         (ACCION_VERIFICACION_ORACLE, 'Verificación en Oracle'),
         (ACCION_WEBHOOK_N8N, 'Webhook a n8n'),
         (ACCION_NOTIFICACION_AGENCIA, 'Notificación de agencia por correo'),
+        (ACCION_CONSULTA_ACTU, 'Consulta de asociado en Oracle'),
     ]
     
     preregistro = models.ForeignKey(
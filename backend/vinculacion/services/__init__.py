@@ -13,12 +13,22 @@ Ventajas de separar en services:
 """
 
 from .biometria_services import BiometriaService
+from .archivos_biometria import AlmacenArchivos
 from .linix_services import LinixService
 from .vinculacion_agil_services import VinculacionAgilService, VinculacionAgilError
+from .verificacion_pendientes_services import VerificacionPendientesService
+from .reconciliacion_biometria_services import ReconciliacionBiometriaService
+from .registro_decrim_services import RegistroDecrimService
+from .metricas import exportar_prometheus
 
 __all__ = [
     'BiometriaService',
+    'AlmacenArchivos',
     'LinixService',
     'VinculacionAgilService',
     'VinculacionAgilError',
+    'VerificacionPendientesService',
+    'ReconciliacionBiometriaService',
+    'RegistroDecrimService',
+    'exportar_prometheus',
 ]
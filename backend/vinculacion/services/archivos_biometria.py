@@ -0,0 +1,338 @@
+# vinculacion/services/archivos_biometria.py
+
+"""
+ARCHIVOS DE BIOMETRIA (IMAGENES Y CERTIFICADOS DE DECRIM)
+=========================================================
+Con Imagenes="1" / Certificado="1" la consulta de DECRIM trae las fotos
+y el certificado PDF en base64 dentro del JSON (varios MB por caso).
+
+- AlmacenArchivos: almacen en disco direccionado por contenido (sha256),
+  los archivos repetidos se guardan una sola vez.
+- ExtractorArchivosJSON: recorre el JSON a medida que llegan los bytes;
+  los textos largos (base64) se decodifican por bloques directo al
+  almacen y en el JSON quedan solo referencias {'sha256', 'bytes', 'tipo'}.
+
+Asi ni el log (response_data) ni la memoria del worker cargan los blobs.
+"""
+
+import base64
+import binascii
+import codecs
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+
+from django.conf import settings
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Textos de al menos este tamano se tratan como archivos en base64
+UMBRAL_ARCHIVO = 16 * 1024
+
+PREFIJO_REFERENCIA = 'decrim-archivo:'
+
+_RE_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+_RE_ESPECIAL = re.compile(r'["\\]')
+
+_FIRMAS = (
+    (b'%PDF', 'application/pdf'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG', 'image/png'),
+    (b'GIF8', 'image/gif'),
+)
+
+_ESCAPES_JSON = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+def _tipo_contenido(inicio):
+    for firma, tipo in _FIRMAS:
+        if inicio.startswith(firma):
+            return tipo
+    if inicio[:4] == b'RIFF' and inicio[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'application/octet-stream'
+
+
+class AlmacenArchivos:
+    """
+    Archivos en DECRIM_ARCHIVOS_DIR/<ab>/<cd>/<sha256>.
+    """
+
+    def __init__(self, raiz=None):
+        self.raiz = str(raiz or getattr(
+            settings,
+            'DECRIM_ARCHIVOS_DIR',
+            os.path.join(settings.BASE_DIR, 'var', 'archivos_decrim')
+        ))
+
+    def ruta(self, sha256):
+        if not _RE_SHA256.match(sha256 or ''):
+            raise ValueError(f"Hash invalido: {sha256!r}")
+        return os.path.join(self.raiz, sha256[:2], sha256[2:4], sha256)
+
+    def existe(self, sha256):
+        try:
+            return os.path.isfile(self.ruta(sha256))
+        except ValueError:
+            return False
+
+    def abrir(self, sha256):
+        """
+        Abre el archivo en modo binario (FileNotFoundError si no existe).
+        """
+        return open(self.ruta(sha256), 'rb')
+
+    def escritor(self):
+        return EscritorArchivo(self)
+
+
+class EscritorArchivo:
+    """
+    Escribe un archivo por bloques calculando su sha256; al cerrar lo mueve
+    a su ruta definitiva (si ya existia, descarta la copia).
+    """
+
+    def __init__(self, almacen):
+        self.almacen = almacen
+        os.makedirs(almacen.raiz, exist_ok=True)
+        descriptor, self._ruta_temporal = tempfile.mkstemp(dir=almacen.raiz, suffix='.parcial')
+        self._archivo = os.fdopen(descriptor, 'wb')
+        self._hash = hashlib.sha256()
+        self._inicio = b''
+        self.bytes = 0
+
+    def write(self, datos):
+        if not datos:
+            return
+        if len(self._inicio) < 16:
+            self._inicio += datos[:16 - len(self._inicio)]
+        self._hash.update(datos)
+        self._archivo.write(datos)
+        self.bytes += len(datos)
+
+    def cerrar(self):
+        """
+        Returns:
+            dict: {'sha256', 'bytes', 'tipo'}
+        """
+        self._archivo.close()
+        sha256 = self._hash.hexdigest()
+        destino = self.almacen.ruta(sha256)
+        if os.path.exists(destino):
+            os.remove(self._ruta_temporal)
+        else:
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            os.replace(self._ruta_temporal, destino)
+        return {'sha256': sha256, 'bytes': self.bytes, 'tipo': _tipo_contenido(self._inicio)}
+
+    def descartar(self):
+        self._archivo.close()
+        if os.path.exists(self._ruta_temporal):
+            os.remove(self._ruta_temporal)
+
+
+class _Base64PorBloques:
+    """
+    Decodifica base64 recibido en fragmentos (acepta prefijo data:...;base64,).
+    """
+
+    def __init__(self, escritor):
+        self.escritor = escritor
+        self._pendiente = ''
+        self._prefijo_revisado = False
+
+    def agregar(self, texto):
+        self._pendiente += texto
+        if not self._prefijo_revisado:
+            if len(self._pendiente) < 64 and 'base64,' not in self._pendiente:
+                return
+            if self._pendiente.startswith('data:') and 'base64,' in self._pendiente:
+                self._pendiente = self._pendiente.split('base64,', 1)[1]
+            self._prefijo_revisado = True
+        # Solo se ignoran saltos de linea (base64 MIME); otro espacio es un error
+        limpio = self._pendiente.replace('\r', '').replace('\n', '')
+        corte = len(limpio) - len(limpio) % 4
+        self._pendiente = limpio[corte:]
+        if corte:
+            self.escritor.write(base64.b64decode(limpio[:corte], validate=True))
+
+    def terminar(self):
+        self._prefijo_revisado = True
+        self.agregar('')
+        if self._pendiente:
+            raise binascii.Error('Base64 incompleto')
+
+
+class ExtractorArchivosJSON:
+    """
+    Analiza un cuerpo JSON por fragmentos y saca los textos largos al almacen.
+
+    Solo sigue comillas y escapes: el JSON sin los blobs se arma en memoria
+    (pocos KB) y se parsea al final con json.loads.
+
+    Uso:
+        extractor = ExtractorArchivosJSON(AlmacenArchivos())
+        for bloque in response.iter_content(65536):
+            extractor.agregar(bloque)
+        data, archivos = extractor.resultado()
+    """
+
+    def __init__(self, almacen, umbral=UMBRAL_ARCHIVO):
+        self.almacen = almacen
+        self.umbral = umbral
+        self._decodificador_utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._estructura = []
+        self._en_texto = False
+        self._escape = ''
+        self._texto = []
+        self._largo_texto = 0
+        self._escritor = None
+        self._base64 = None
+        self._error_base64 = None
+        self._archivos = []
+
+    def agregar(self, bloque):
+        self._procesar(self._decodificador_utf8.decode(bloque))
+
+    def _procesar(self, texto):
+        i = 0
+        n = len(texto)
+        while i < n:
+            if not self._en_texto:
+                siguiente = texto.find('"', i)
+                if siguiente == -1:
+                    self._estructura.append(texto[i:])
+                    return
+                self._estructura.append(texto[i:siguiente + 1])
+                self._en_texto = True
+                self._texto = []
+                self._largo_texto = 0
+                i = siguiente + 1
+                continue
+
+            # Dentro de un texto: saltar hasta la siguiente comilla o escape
+            if self._escape:
+                self._escape += texto[i]
+                i += 1
+                if self._escape[1] != 'u' or len(self._escape) == 6:
+                    self._agregar_texto(self._escape, crudo=True)
+                    self._escape = ''
+                continue
+            especial = _RE_ESPECIAL.search(texto, i)
+            if especial is None:
+                self._agregar_texto(texto[i:])
+                return
+            self._agregar_texto(texto[i:especial.start()])
+            i = especial.end()
+            if especial.group() == '"':
+                self._cerrar_texto()
+            else:
+                self._escape = '\\'
+
+    def _agregar_texto(self, fragmento, crudo=False):
+        if not fragmento:
+            return
+        if self._escritor is None:
+            self._texto.append(fragmento)
+            self._largo_texto += len(fragmento)
+            if self._largo_texto >= self.umbral:
+                self._abrir_archivo()
+            return
+        if crudo:
+            fragmento = self._desescapar(fragmento)
+        self._a_base64(fragmento)
+
+    @staticmethod
+    def _desescapar(escape):
+        if escape[1] == 'u':
+            return chr(int(escape[2:], 16))
+        return _ESCAPES_JSON.get(escape[1], '')
+
+    def _abrir_archivo(self):
+        self._escritor = self.almacen.escritor()
+        self._base64 = _Base64PorBloques(self._escritor)
+        self._error_base64 = None
+        acumulado = json.loads('"' + ''.join(self._texto) + '"')
+        self._texto = []
+        self._a_base64(acumulado)
+
+    def _a_base64(self, fragmento):
+        if self._error_base64 is not None:
+            return
+        try:
+            self._base64.agregar(fragmento)
+        except (binascii.Error, ValueError) as e:
+            self._error_base64 = str(e) or 'Base64 invalido'
+
+    def _cerrar_texto(self):
+        self._en_texto = False
+        if self._escritor is None:
+            self._estructura.append(''.join(self._texto) + '"')
+            self._texto = []
+            return
+
+        if self._error_base64 is None:
+            try:
+                self._base64.terminar()
+            except (binascii.Error, ValueError) as e:
+                self._error_base64 = str(e) or 'Base64 invalido'
+
+        if self._error_base64 is None:
+            referencia = self._escritor.cerrar()
+        else:
+            # Texto largo que no es base64: no se guarda, solo se informa
+            self._escritor.descartar()
+            referencia = {'error': f'Contenido no base64: {self._error_base64}', 'bytes': 0}
+            logger.warning("Texto largo en respuesta DECRIM no es base64: %s", self._error_base64)
+
+        self._archivos.append(referencia)
+        self._estructura.append(f'{PREFIJO_REFERENCIA}{len(self._archivos) - 1}"')
+        self._escritor = None
+        self._base64 = None
+
+    def resultado(self):
+        """
+        Returns:
+            tuple: (data, archivos) - data es el JSON con cada blob
+            reemplazado por su referencia (con 'campo', la ruta dentro
+            del JSON); archivos es la lista de esas referencias
+        """
+        if self._en_texto:
+            raise ValueError('JSON incompleto: texto sin cerrar')
+        texto = ''.join(self._estructura).strip()
+        data = json.loads(texto) if texto else {}
+        archivos = []
+        data = self._reemplazar_referencias(data, '', archivos)
+        return data, archivos
+
+    def _reemplazar_referencias(self, valor, campo, archivos):
+        if isinstance(valor, dict):
+            return {
+                clave: self._reemplazar_referencias(v, f'{campo}.{clave}' if campo else clave, archivos)
+                for clave, v in valor.items()
+            }
+        if isinstance(valor, list):
+            return [
+                self._reemplazar_referencias(v, f'{campo}[{indice}]', archivos)
+                for indice, v in enumerate(valor)
+            ]
+        if isinstance(valor, str) and valor.startswith(PREFIJO_REFERENCIA):
+            indice = valor[len(PREFIJO_REFERENCIA):]
+            if indice.isdigit() and int(indice) < len(self._archivos):
+                referencia = dict(self._archivos[int(indice)], campo=campo)
+                if 'sha256' in referencia:
+                    archivos.append(referencia)
+                return referencia
+        return valor
+
+    def descartar(self):
+        """
+        Limpia un archivo a medio escribir (respuesta cortada).
+        """
+        if self._escritor is not None:
+            self._escritor.descartar()
+            self._escritor = None
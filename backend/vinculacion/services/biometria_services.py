@@ -7,15 +7,104 @@ Maneja toda la comunicación con la API del proveedor
 para consultar el estado de validación de identidad.
 """
 
+import asyncio
 import logging
+import os
+import random
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
+import httpx
 import requests
 from django.conf import settings
+from django.core.cache import cache
+
+from .archivos_biometria import AlmacenArchivos, ExtractorArchivosJSON
+from .cobertura import obtener_cobertura
+from .coordinacion import (
+    SingleFlight,
+    SingleFlightAsync,
+    bloqueo_compartido,
+    bloqueo_compartido_async,
+)
+from .http_pool import (
+    estadisticas_cliente_http_async,
+    estadisticas_sesion_http,
+    obtener_cliente_http_async,
+    obtener_sesion_http,
+)
+from .limitador import estadisticas_limitadores, obtener_limitador_decrim
 
 # Configurar logger para este módulo
 logger = logging.getLogger(__name__)
 
+HEADERS_JSON = {
+    'Content-Type': 'application/json',
+    'Accept': 'application/json'
+}
+
+# Bytes por lectura al recibir respuestas con imagenes/certificado
+TAM_BLOQUE_ARCHIVOS = 64 * 1024
+
+# Consultas de estado en curso en este proceso, por caso
+_consultas_en_vuelo = SingleFlight('consulta DECRIM')
+_consultas_en_vuelo_async = SingleFlightAsync('consulta DECRIM async')
+
+# Hilos para consultas con cobertura (primaria y cobertura en paralelo)
+_executor_cobertura = None
+_executor_cobertura_pid = None
+_executor_cobertura_lock = threading.Lock()
+_cupo_coberturas = None
+
+
+def _obtener_executor_cobertura():
+    global _executor_cobertura, _executor_cobertura_pid
+
+    pid = os.getpid()
+    if _executor_cobertura is not None and _executor_cobertura_pid == pid:
+        return _executor_cobertura
+    with _executor_cobertura_lock:
+        if _executor_cobertura is None or _executor_cobertura_pid != pid:
+            _executor_cobertura = ThreadPoolExecutor(
+                max_workers=int(getattr(settings, 'DECRIM_COBERTURA_HILOS', 32)),
+                thread_name_prefix='consulta-decrim'
+            )
+            _executor_cobertura_pid = pid
+    return _executor_cobertura
+
+
+def _obtener_cupo_coberturas():
+    """
+    Coberturas sincronas en curso por proceso (DECRIM_COBERTURA_MAX_EN_CURSO):
+    la perdedora no se puede abortar y retiene hilo y conexion hasta terminar.
+    """
+    global _cupo_coberturas
+
+    if _cupo_coberturas is None:
+        with _executor_cobertura_lock:
+            if _cupo_coberturas is None:
+                _cupo_coberturas = threading.BoundedSemaphore(
+                    max(int(getattr(settings, 'DECRIM_COBERTURA_MAX_EN_CURSO', 8)), 1)
+                )
+    return _cupo_coberturas
+
+
+def _liberar_al_terminar(cupo, futuros):
+    # El cupo vuelve cuando terminan (o se cancelan) primaria y cobertura
+    restantes = [len(futuros)]
+    lock = threading.Lock()
+
+    def terminado(_):
+        with lock:
+            restantes[0] -= 1
+            if restantes[0]:
+                return
+        cupo.release()
+
+    for futuro in futuros:
+        futuro.add_done_callback(terminado)
+
 
 class BiometriaService:
     """
@@ -47,22 +136,114 @@ class BiometriaService:
         self.consulta_canal = getattr(settings, 'DECRIM_CONSULTA_CANAL', '0')
         self.consulta_certificado = getattr(settings, 'DECRIM_CONSULTA_CERTIFICADO', '0')
         
-        # Timeout para las peticiones (segundos)
-        self.timeout = 30
+        # Timeouts (segundos): conexion TCP/TLS y espera de la respuesta
+        self.timeout = (
+            float(getattr(settings, 'DECRIM_CONNECT_TIMEOUT', 5)),
+            float(getattr(settings, 'DECRIM_READ_TIMEOUT', 30))
+        )
+        
+        # Sesion HTTP compartida por el proceso: reutiliza conexiones keep-alive
+        # con consultorid.com en lugar de un handshake TLS por peticion
+        self.session = obtener_sesion_http(
+            'decrim',
+            pool_connections=int(getattr(settings, 'DECRIM_POOL_CONNECTIONS', 4)),
+            pool_maxsize=int(getattr(settings, 'DECRIM_POOL_MAXSIZE', 10)),
+            pool_block=bool(getattr(settings, 'DECRIM_POOL_BLOCK', False)),
+            keepalive=bool(getattr(settings, 'DECRIM_KEEPALIVE', True))
+        )
+        
+        # Reintentos de consultas (idempotentes): backoff exponencial con
+        # jitter completo, acotado por un presupuesto total en segundos
+        self.reintentos_max = int(getattr(settings, 'DECRIM_REINTENTOS_MAX', 3))
+        self.reintento_base = float(getattr(settings, 'DECRIM_REINTENTO_BASE', 0.5))
+        self.reintento_tope = float(getattr(settings, 'DECRIM_REINTENTO_TOPE', 4))
+        self.reintento_presupuesto = float(getattr(settings, 'DECRIM_REINTENTO_PRESUPUESTO', 20))
+        
+        # Cobertura (hedging) de consultas lentas: una segunda solicitud
+        # identica tras el percentil de la latencia reciente
+        self.cobertura_activa = bool(getattr(settings, 'DECRIM_COBERTURA', False))
     
-    def consultar_caso_por_dni(
-        self,
-        numero_cedula,
-        idcaso=None,
-        incluir_imagenes=False,
-        incluir_certificado=None
-    ):
+    def _cobertura(self):
+        return obtener_cobertura(
+            'decrim_consulta',
+            percentil=float(getattr(settings, 'DECRIM_COBERTURA_PERCENTIL', 0.95)),
+            min_ms=float(getattr(settings, 'DECRIM_COBERTURA_MIN_MS', 200)),
+            max_fraccion=float(getattr(settings, 'DECRIM_COBERTURA_MAX_FRACCION', 0.1)),
+            min_muestras=int(getattr(settings, 'DECRIM_COBERTURA_MIN_MUESTRAS', 20))
+        )
+    
+    def _permitir_cobertura(self, cobertura):
+        # Presupuesto propio de coberturas y token real del limitador sin
+        # esperar turno (un permiso 'sin_cache' no reserva presupuesto)
+        if not cobertura.tomar_cobertura():
+            return False
+        permiso = obtener_limitador_decrim('consulta').adquirir(espera_max=0)
+        return self._token_cobertura(cobertura, permiso)
+
+    async def _permitir_cobertura_async(self, cobertura):
+        # Version asyncio: el cache del limitador no se lee en el event loop
+        if not cobertura.tomar_cobertura():
+            return False
+        permiso = await obtener_limitador_decrim('consulta').adquirir_async(espera_max=0)
+        return self._token_cobertura(cobertura, permiso)
+
+    @staticmethod
+    def _token_cobertura(cobertura, permiso):
+        if permiso['permitido'] and permiso['motivo'] != 'sin_cache':
+            return True
+        # Sin token no se envia: el credito vuelve al presupuesto
+        cobertura.devolver_cobertura()
+        return False
+    
+    @staticmethod
+    def _resultado_limitado(presupuesto, permiso, request_data):
         """
-        Consulta el estado de validacion de un caso por numero de DNI o Idcaso.
+        Resultado de una llamada rechazada por el limitador (no se hizo).
         """
-        certificado_valor = self.consulta_certificado if incluir_certificado is None else (
-            "1" if incluir_certificado else "0"
+        if permiso['motivo'] == 'sin_cache':
+            error = f'Limitador de llamadas a DECRIM sin cache ({presupuesto}), intente de nuevo en unos segundos'
+        else:
+            error = f'Limite de llamadas a DECRIM alcanzado ({presupuesto}), intente de nuevo en unos segundos'
+        return {
+            'exitoso': False,
+            'error': error,
+            'limitado': True,
+            'reintentar_en_s': permiso['espera_s'],
+            'request_data': request_data,
+            'tiempo_respuesta_ms': 0
+        }
+    
+    def _espera_reintento(self, intento):
+        """
+        Espera antes del reintento `intento` (1, 2, ...): jitter completo
+        sobre un backoff exponencial, uniforme en [0, min(tope, base * 2^(n-1))].
+        """
+        return random.uniform(0, min(self.reintento_tope, self.reintento_base * (2 ** (intento - 1))))
+    
+    def _cliente_async(self):
+        """
+        Cliente httpx del event loop actual (HTTP/2 si h2 esta instalado).
+        """
+        return obtener_cliente_http_async(
+            'decrim',
+            max_connections=int(getattr(settings, 'DECRIM_ASYNC_MAX_CONEXIONES', 100)),
+            max_keepalive_connections=int(getattr(settings, 'DECRIM_POOL_MAXSIZE', 10)),
+            http2=bool(getattr(settings, 'DECRIM_HTTP2', True))
         )
+    
+    @staticmethod
+    def _timeout_httpx(timeout):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    
+    def _validar_consulta(self, numero_cedula, idcaso):
+        """
+        Normaliza Idcaso/DNI de una consulta.
+        
+        Returns:
+            tuple: (error, idcaso_raw, dni_raw) - error es el resultado a
+            retornar si faltan ambos, o None
+        """
         idcaso_raw = str(idcaso).strip() if idcaso is not None else ''
         dni_raw = str(numero_cedula).strip() if numero_cedula is not None else ''
 
@@ -75,136 +256,701 @@ class BiometriaService:
                     'Dni': "0",
                     'Canal': str(self.consulta_canal),
                 }
+            }, idcaso_raw, dni_raw
+        return None, idcaso_raw, dni_raw
+    
+    def _payload_consulta(self, idcaso_value, dni_value, incluir_imagenes, incluir_certificado):
+        certificado_valor = self.consulta_certificado if incluir_certificado is None else (
+            "1" if incluir_certificado else "0"
+        )
+        payload = {
+            "Username": self.username,
+            "Password": self.password,
+            "Idcaso": idcaso_value,
+            "Dni": dni_value,
+            "Canal": str(self.consulta_canal),
+            "Imagenes": "1" if incluir_imagenes else "0",
+            "Certificado": str(certificado_valor)
+        }
+        payload_safe = dict(payload)
+        if payload_safe.get("Password"):
+            payload_safe["Password"] = "***"
+        return payload, payload_safe
+    
+    @staticmethod
+    def _reintentar_por_dni(resultado, dni_raw):
+        return bool(
+            not resultado.get('exitoso')
+            and resultado.get('error')
+            and 'IDCaso o DNI' in resultado.get('error', '')
+            and dni_raw
+        )
+    
+    @staticmethod
+    def _trae_archivos(payload):
+        return payload.get('Imagenes') == '1' or payload.get('Certificado') == '1'
+    
+    def _interpretar_respuesta_consulta(self, response, payload_safe, elapsed_ms, data=None):
+        """
+        Resultado de una respuesta HTTP de la consulta (requests o httpx).
+        
+        `data` es el cuerpo ya leido (respuestas con archivos); si es None
+        se parsea aqui.
+        """
+        if response.status_code >= 500:
+            # Falla transitoria del proveedor; el cuerpo puede no ser JSON
+            return {
+                'exitoso': False,
+                'error': f'Error del proveedor: {response.status_code}',
+                'datos_completos': {'status_code': response.status_code},
+                'request_data': payload_safe,
+                'tiempo_respuesta_ms': elapsed_ms,
+                'reintentable': True
             }
 
-        def _build_payload(idcaso_value, dni_value):
-            payload = {
-                "Username": self.username,
-                "Password": self.password,
-                "Idcaso": idcaso_value,
-                "Dni": dni_value,
-                "Canal": str(self.consulta_canal),
-                "Imagenes": "1" if incluir_imagenes else "0",
-                "Certificado": str(certificado_valor)
+        if data is None:
+            data = response.json() if response.content else {}
+
+        if response.status_code == 200 and data.get('status') == 200:
+            data_payload = data.get('data', {})
+            return {
+                'exitoso': True,
+                'estado': data_payload.get('Estado'),
+                'idcaso': data_payload.get('Idcaso'),
+                'justificacion': data_payload.get('Justificacion', ''),
+                'datos_completos': data,
+                'request_data': payload_safe,
+                'tiempo_respuesta_ms': elapsed_ms
             }
-            payload_safe = dict(payload)
-            if payload_safe.get("Password"):
-                payload_safe["Password"] = "***"
-            return payload, payload_safe
-
-        def _post(payload, payload_safe):
-            start_time = time.monotonic()
-            try:
-                response = requests.post(
-                    self.consulta_url,
-                    json=payload,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'Accept': 'application/json'
-                    },
-                    timeout=self.timeout
-                )
-                elapsed_ms = int((time.monotonic() - start_time) * 1000)
-                data = response.json() if response.content else {}
-
-                if response.status_code == 200 and data.get('status') == 200:
-                    data_payload = data.get('data', {})
-                    return {
-                        'exitoso': True,
-                        'estado': data_payload.get('Estado'),
-                        'idcaso': data_payload.get('Idcaso'),
-                        'justificacion': data_payload.get('Justificacion', ''),
-                        'datos_completos': data,
-                        'request_data': payload_safe,
-                        'tiempo_respuesta_ms': elapsed_ms
-                    }
-
-                if response.status_code == 404 or data.get('status') == 404:
-                    logger.info("Caso no encontrado en DECRIM: %s", payload_safe)
-                    return {
-                        'exitoso': False,
-                        'estado': 'NO_ENCONTRADO',
-                        'error': data.get('message', 'Caso no encontrado'),
-                        'datos_completos': data,
-                        'request_data': payload_safe,
-                        'tiempo_respuesta_ms': elapsed_ms
-                    }
-
-                if response.status_code == 409 or data.get('status') == 409:
-                    logger.info("Caso en proceso en DECRIM (409): %s", payload_safe)
-                    return {
-                        'exitoso': False,
-                        'estado': 'EN_PROCESO',
-                        'error': data.get('message', 'Caso aun no disponible'),
-                        'datos_completos': data,
-                        'request_data': payload_safe,
-                        'tiempo_respuesta_ms': elapsed_ms
-                    }
-
-                if response.status_code == 403 or data.get('status') == 403:
-                    logger.warning("Caso no autorizado para entidad en DECRIM: %s", payload_safe)
-                    return {
-                        'exitoso': False,
-                        'estado': 'NO_AUTORIZADO',
-                        'error': data.get('message', 'Caso no pertenece a la entidad'),
-                        'datos_completos': data,
-                        'request_data': payload_safe,
-                        'tiempo_respuesta_ms': elapsed_ms
-                    }
-
-                return {
-                    'exitoso': False,
-                    'error': data.get('message') if isinstance(data, dict) else None
-                    or f'Error del proveedor: {response.status_code}',
-                    'datos_completos': data,
-                    'request_data': payload_safe,
-                    'tiempo_respuesta_ms': elapsed_ms
-                }
 
-            except requests.exceptions.Timeout:
-                elapsed_ms = int((time.monotonic() - start_time) * 1000)
-                return {
-                    'exitoso': False,
-                    'error': 'Timeout: El proveedor no respondio a tiempo',
-                    'request_data': payload_safe,
-                    'tiempo_respuesta_ms': elapsed_ms
-                }
+        if response.status_code == 404 or data.get('status') == 404:
+            logger.info("Caso no encontrado en DECRIM: %s", payload_safe)
+            return {
+                'exitoso': False,
+                'estado': 'NO_ENCONTRADO',
+                'error': data.get('message', 'Caso no encontrado'),
+                'datos_completos': data,
+                'request_data': payload_safe,
+                'tiempo_respuesta_ms': elapsed_ms
+            }
+
+        if response.status_code == 409 or data.get('status') == 409:
+            logger.info("Caso en proceso en DECRIM (409): %s", payload_safe)
+            return {
+                'exitoso': False,
+                'estado': 'EN_PROCESO',
+                'error': data.get('message', 'Caso aun no disponible'),
+                'datos_completos': data,
+                'request_data': payload_safe,
+                'tiempo_respuesta_ms': elapsed_ms
+            }
+
+        if response.status_code == 403 or data.get('status') == 403:
+            logger.warning("Caso no autorizado para entidad en DECRIM: %s", payload_safe)
+            return {
+                'exitoso': False,
+                'estado': 'NO_AUTORIZADO',
+                'error': data.get('message', 'Caso no pertenece a la entidad'),
+                'datos_completos': data,
+                'request_data': payload_safe,
+                'tiempo_respuesta_ms': elapsed_ms
+            }
+
+        return {
+            'exitoso': False,
+            'error': data.get('message') if isinstance(data, dict) else None
+            or f'Error del proveedor: {response.status_code}',
+            'datos_completos': data,
+            'request_data': payload_safe,
+            'tiempo_respuesta_ms': elapsed_ms
+        }
+    
+    @staticmethod
+    def _resultado_excepcion_consulta(error, payload_safe, elapsed_ms):
+        """
+        Resultado de una consulta que fallo sin respuesta (requests o httpx).
+        """
+        if isinstance(error, (requests.exceptions.Timeout, httpx.TimeoutException)):
+            return {
+                'exitoso': False,
+                'error': 'Timeout: El proveedor no respondio a tiempo',
+                'request_data': payload_safe,
+                'tiempo_respuesta_ms': elapsed_ms,
+                'reintentable': True
+            }
+
+        if isinstance(error, (requests.exceptions.ConnectionError, httpx.TransportError)):
+            return {
+                'exitoso': False,
+                'error': 'No se pudo conectar con el proveedor de validacion',
+                'request_data': payload_safe,
+                'tiempo_respuesta_ms': elapsed_ms,
+                'reintentable': True
+            }
+
+        logger.error(
+            f"Error inesperado consultando caso en DECRIM: {str(error)}",
+            exc_info=error
+        )
+        return {
+            'exitoso': False,
+            'error': f'Error inesperado: {str(error)}',
+            'request_data': payload_safe,
+            'tiempo_respuesta_ms': elapsed_ms
+        }
+    
+    def _timeout_intento(self, inicio):
+        # El timeout de lectura nunca excede el presupuesto restante
+        restante = self.reintento_presupuesto - (time.monotonic() - inicio)
+        return (
+            max(min(self.timeout[0], restante), 0.1),
+            max(min(self.timeout[1], restante), 0.1)
+        )
+    
+    def _siguiente_espera(self, intentos, resultado, numero, inicio):
+        """
+        Registra el intento `numero` y decide si se reintenta.
+        
+        Returns:
+            float | None: Segundos a esperar antes del siguiente intento,
+            o None si `resultado` es el definitivo
+        """
+        reintentable = resultado.pop('reintentable', False)
+        intentos.append({
+            'intento': len(intentos) + 1,
+            'exitoso': resultado.get('exitoso', False),
+            'estado': resultado.get('estado'),
+            'error': resultado.get('error'),
+            'request_data': resultado.get('request_data', {}),
+            'datos_completos': resultado.get('datos_completos', {}),
+            'tiempo_respuesta_ms': resultado.get('tiempo_respuesta_ms'),
+        })
+
+        if not reintentable or numero > self.reintentos_max:
+            return None
+
+        espera = self._espera_reintento(numero)
+        if time.monotonic() - inicio + espera >= self.reintento_presupuesto:
+            logger.warning(
+                "Consulta DECRIM sin presupuesto para reintentar tras %s intentos: %s",
+                numero,
+                resultado.get('error')
+            )
+            return None
 
-            except requests.exceptions.ConnectionError:
+        logger.info(
+            "Reintentando consulta DECRIM (intento %s) en %.2f s: %s",
+            numero + 1,
+            espera,
+            resultado.get('error')
+        )
+        return espera
+    
+    def _post_consulta(self, payload, payload_safe, timeout):
+        start_time = time.monotonic()
+        try:
+            response = self.session.post(
+                self.consulta_url,
+                json=payload,
+                headers=HEADERS_JSON,
+                timeout=timeout
+            )
+            elapsed_ms = int((time.monotonic() - start_time) * 1000)
+            if self.cobertura_activa:
+                self._cobertura().observar(elapsed_ms)
+            return self._interpretar_respuesta_consulta(response, payload_safe, elapsed_ms)
+        except Exception as e:
+            elapsed_ms = int((time.monotonic() - start_time) * 1000)
+            return self._resultado_excepcion_consulta(e, payload_safe, elapsed_ms)
+    
+    def _post_consulta_archivos(self, payload, payload_safe, timeout):
+        """
+        Consulta con Imagenes/Certificado: el cuerpo se lee por bloques y los
+        base64 se decodifican al almacen de archivos sin cargarlos en memoria.
+        datos_completos queda con referencias; el resultado agrega 'archivos'.
+        """
+        start_time = time.monotonic()
+        extractor = None
+        try:
+            with self.session.post(
+                self.consulta_url,
+                json=payload,
+                headers=HEADERS_JSON,
+                timeout=timeout,
+                stream=True
+            ) as response:
+                data, archivos = None, []
+                if response.status_code < 500:
+                    extractor = ExtractorArchivosJSON(AlmacenArchivos())
+                    for bloque in response.iter_content(TAM_BLOQUE_ARCHIVOS):
+                        extractor.agregar(bloque)
+                    data, archivos = extractor.resultado()
                 elapsed_ms = int((time.monotonic() - start_time) * 1000)
-                return {
-                    'exitoso': False,
-                    'error': 'No se pudo conectar con el proveedor de validacion',
-                    'request_data': payload_safe,
-                    'tiempo_respuesta_ms': elapsed_ms
-                }
+                resultado = self._interpretar_respuesta_consulta(
+                    response, payload_safe, elapsed_ms, data=data
+                )
+                resultado['archivos'] = archivos
+                return resultado
+        except Exception as e:
+            if extractor is not None:
+                extractor.descartar()
+            elapsed_ms = int((time.monotonic() - start_time) * 1000)
+            return self._resultado_excepcion_consulta(e, payload_safe, elapsed_ms)
+    
+    def _post_consulta_cubierta(self, payload, payload_safe, timeout):
+        """
+        _post_consulta() con cobertura: si la primaria no respondio tras el
+        percentil DECRIM_COBERTURA_PERCENTIL de la latencia reciente, envia
+        una segunda solicitud identica y gana la primera respuesta
+        definitiva (un error reintentable espera a la otra).
+        
+        Con requests una solicitud en curso no se puede abortar: la
+        perdedora se cancela si no arranco y si no, su respuesta se descarta.
+        Por eso solo hay DECRIM_COBERTURA_MAX_EN_CURSO coberturas a la vez
+        por proceso; sin cupo o sin token del limitador no se cubre.
+        """
+        cobertura = self._cobertura()
+        cobertura.registrar_primaria()
+        retardo = cobertura.retardo_s()
+        executor = _obtener_executor_cobertura()
+        primaria = executor.submit(self._post_consulta, payload, payload_safe, timeout)
+        if retardo is None:
+            return primaria.result()
+
+        hechas, _ = wait([primaria], timeout=retardo)
+        if hechas:
+            return primaria.result()
+        cupo = _obtener_cupo_coberturas()
+        if not cupo.acquire(blocking=False):
+            return primaria.result()
+        if not self._permitir_cobertura(cobertura):
+            cupo.release()
+            return primaria.result()
 
-            except Exception as e:
-                logger.exception(f"Error inesperado consultando caso en DECRIM: {str(e)}")
+        logger.info("Consulta DECRIM sin respuesta tras %.0f ms: enviando cobertura", retardo * 1000)
+        cobertura.registrar_cobertura()
+        segunda = executor.submit(self._post_consulta, payload, payload_safe, timeout)
+        _liberar_al_terminar(cupo, [primaria, segunda])
+        pendientes = {primaria: False, segunda: True}
+        while True:
+            hechas, _ = wait(list(pendientes), return_when=FIRST_COMPLETED)
+            for futuro in hechas:
+                es_cobertura = pendientes.pop(futuro)
+                resultado = futuro.result()
+                if resultado.get('reintentable') and pendientes:
+                    continue
+                for perdedora in pendientes:
+                    perdedora.cancel()
+                cobertura.registrar_ganadora(es_cobertura)
+                resultado['cobertura'] = 'cobertura' if es_cobertura else 'primaria'
+                return resultado
+    
+    def _consultar_con_reintentos(self, payload, payload_safe, inicio, intentos):
+        if self._trae_archivos(payload):
+            post = self._post_consulta_archivos
+        else:
+            post = self._post_consulta_cubierta if self.cobertura_activa else self._post_consulta
+        limitador = obtener_limitador_decrim('consulta')
+        numero = 0
+        while True:
+            # Cada intento gasta un token del presupuesto compartido de consultas
+            permiso = limitador.adquirir()
+            if permiso['permitido']:
+                resultado = post(payload, payload_safe, self._timeout_intento(inicio))
+            else:
+                resultado = self._resultado_limitado('consulta', permiso, payload_safe)
+            numero += 1
+            espera = self._siguiente_espera(intentos, resultado, numero, inicio)
+            if espera is None:
+                return resultado
+            time.sleep(espera)
+    
+    def consultar_caso_por_dni(
+        self,
+        numero_cedula,
+        idcaso=None,
+        incluir_imagenes=False,
+        incluir_certificado=None
+    ):
+        """
+        Consulta el estado de validacion de un caso por numero de DNI o Idcaso.
+        
+        La consulta es idempotente: los timeouts, errores de conexion y
+        respuestas 5xx se reintentan con backoff y jitter mientras quede
+        presupuesto (DECRIM_REINTENTO_PRESUPUESTO). El resultado incluye
+        'intentos' con el request_data, error y latencia de cada llamada.
+        
+        Con imagenes o certificado, los archivos se guardan en el almacen
+        (DECRIM_ARCHIVOS_DIR) y el resultado trae 'archivos': referencias
+        {'campo', 'sha256', 'bytes', 'tipo'}.
+        """
+        error, idcaso_raw, dni_raw = self._validar_consulta(numero_cedula, idcaso)
+        if error:
+            return error
+
+        inicio = time.monotonic()
+        intentos = []
+
+        if idcaso_raw and idcaso_raw != "0":
+            payload, payload_safe = self._payload_consulta(
+                idcaso_raw, "0", incluir_imagenes, incluir_certificado
+            )
+            resultado = self._consultar_con_reintentos(payload, payload_safe, inicio, intentos)
+            if self._reintentar_por_dni(resultado, dni_raw):
+                logger.info("Reintentando consulta DECRIM por DNI")
+                payload, payload_safe = self._payload_consulta(
+                    "0", dni_raw, incluir_imagenes, incluir_certificado
+                )
+                resultado = self._consultar_con_reintentos(payload, payload_safe, inicio, intentos)
+        else:
+            payload, payload_safe = self._payload_consulta(
+                "0", dni_raw, incluir_imagenes, incluir_certificado
+            )
+            resultado = self._consultar_con_reintentos(payload, payload_safe, inicio, intentos)
+
+        resultado['intentos'] = intentos
+        return resultado
+
+    async def _post_consulta_async(self, payload, payload_safe, timeout):
+        start_time = time.monotonic()
+        try:
+            response = await self._cliente_async().post(
+                self.consulta_url,
+                json=payload,
+                headers=HEADERS_JSON,
+                timeout=self._timeout_httpx(timeout)
+            )
+            elapsed_ms = int((time.monotonic() - start_time) * 1000)
+            if self.cobertura_activa:
+                self._cobertura().observar(elapsed_ms)
+            return self._interpretar_respuesta_consulta(response, payload_safe, elapsed_ms)
+        except Exception as e:
+            elapsed_ms = int((time.monotonic() - start_time) * 1000)
+            return self._resultado_excepcion_consulta(e, payload_safe, elapsed_ms)
+
+    async def _post_consulta_archivos_async(self, payload, payload_safe, timeout):
+        start_time = time.monotonic()
+        extractor = None
+        try:
+            async with self._cliente_async().stream(
+                'POST',
+                self.consulta_url,
+                json=payload,
+                headers=HEADERS_JSON,
+                timeout=self._timeout_httpx(timeout)
+            ) as response:
+                data, archivos = None, []
+                if response.status_code < 500:
+                    extractor = ExtractorArchivosJSON(AlmacenArchivos())
+                    async for bloque in response.aiter_bytes(TAM_BLOQUE_ARCHIVOS):
+                        extractor.agregar(bloque)
+                    data, archivos = extractor.resultado()
                 elapsed_ms = int((time.monotonic() - start_time) * 1000)
-                return {
-                    'exitoso': False,
-                    'error': f'Error inesperado: {str(e)}',
-                    'request_data': payload_safe,
-                    'tiempo_respuesta_ms': elapsed_ms
-                }
+                resultado = self._interpretar_respuesta_consulta(
+                    response, payload_safe, elapsed_ms, data=data
+                )
+                resultado['archivos'] = archivos
+                return resultado
+        except Exception as e:
+            if extractor is not None:
+                extractor.descartar()
+            elapsed_ms = int((time.monotonic() - start_time) * 1000)
+            return self._resultado_excepcion_consulta(e, payload_safe, elapsed_ms)
+
+    async def _post_consulta_cubierta_async(self, payload, payload_safe, timeout):
+        """
+        Version asyncio de _post_consulta_cubierta(): la perdedora se
+        cancela de verdad (httpx cierra su solicitud).
+        """
+        cobertura = self._cobertura()
+        cobertura.registrar_primaria()
+        retardo = cobertura.retardo_s()
+        primaria = asyncio.ensure_future(self._post_consulta_async(payload, payload_safe, timeout))
+        pendientes = {primaria: False}
+        try:
+            if retardo is None:
+                return await primaria
+
+            hechas, _ = await asyncio.wait({primaria}, timeout=retardo)
+            if hechas or not await self._permitir_cobertura_async(cobertura):
+                return await primaria
+
+            logger.info("Consulta DECRIM sin respuesta tras %.0f ms: enviando cobertura", retardo * 1000)
+            cobertura.registrar_cobertura()
+            segunda = asyncio.ensure_future(self._post_consulta_async(payload, payload_safe, timeout))
+            pendientes[segunda] = True
+            while True:
+                hechas, _ = await asyncio.wait(list(pendientes), return_when=asyncio.FIRST_COMPLETED)
+                for tarea in hechas:
+                    es_cobertura = pendientes.pop(tarea)
+                    resultado = tarea.result()
+                    if resultado.get('reintentable') and pendientes:
+                        continue
+                    cobertura.registrar_ganadora(es_cobertura)
+                    resultado['cobertura'] = 'cobertura' if es_cobertura else 'primaria'
+                    return resultado
+        finally:
+            for perdedora in pendientes:
+                perdedora.cancel()
+
+    async def _consultar_con_reintentos_async(self, payload, payload_safe, inicio, intentos):
+        if self._trae_archivos(payload):
+            post = self._post_consulta_archivos_async
+        else:
+            post = self._post_consulta_cubierta_async if self.cobertura_activa else self._post_consulta_async
+        limitador = obtener_limitador_decrim('consulta')
+        numero = 0
+        while True:
+            permiso = await limitador.adquirir_async()
+            if permiso['permitido']:
+                resultado = await post(payload, payload_safe, self._timeout_intento(inicio))
+            else:
+                resultado = self._resultado_limitado('consulta', permiso, payload_safe)
+            numero += 1
+            espera = self._siguiente_espera(intentos, resultado, numero, inicio)
+            if espera is None:
+                return resultado
+            await asyncio.sleep(espera)
+
+    async def consultar_caso_por_dni_async(
+        self,
+        numero_cedula,
+        idcaso=None,
+        incluir_imagenes=False,
+        incluir_certificado=None
+    ):
+        """
+        Version asyncio de consultar_caso_por_dni() (httpx, mismo resultado).
+        """
+        error, idcaso_raw, dni_raw = self._validar_consulta(numero_cedula, idcaso)
+        if error:
+            return error
+
+        inicio = time.monotonic()
+        intentos = []
 
         if idcaso_raw and idcaso_raw != "0":
-            payload, payload_safe = _build_payload(idcaso_raw, "0")
-            resultado = _post(payload, payload_safe)
-            if (
-                not resultado.get('exitoso')
-                and resultado.get('error')
-                and 'IDCaso o DNI' in resultado.get('error', '')
-                and dni_raw
-            ):
+            payload, payload_safe = self._payload_consulta(
+                idcaso_raw, "0", incluir_imagenes, incluir_certificado
+            )
+            resultado = await self._consultar_con_reintentos_async(payload, payload_safe, inicio, intentos)
+            if self._reintentar_por_dni(resultado, dni_raw):
                 logger.info("Reintentando consulta DECRIM por DNI")
-                payload, payload_safe = _build_payload("0", dni_raw)
-                resultado = _post(payload, payload_safe)
-            return resultado
+                payload, payload_safe = self._payload_consulta(
+                    "0", dni_raw, incluir_imagenes, incluir_certificado
+                )
+                resultado = await self._consultar_con_reintentos_async(payload, payload_safe, inicio, intentos)
+        else:
+            payload, payload_safe = self._payload_consulta(
+                "0", dni_raw, incluir_imagenes, incluir_certificado
+            )
+            resultado = await self._consultar_con_reintentos_async(payload, payload_safe, inicio, intentos)
 
-        payload, payload_safe = _build_payload("0", dni_raw)
-        return _post(payload, payload_safe)
+        resultado['intentos'] = intentos
+        return resultado
+
+    def consultar_estado_caso(self, numero_cedula, idcaso=None):
+        """
+        consultar_caso_por_dni() con coalescencia de llamadas concurrentes.
+        
+        Los hilos del proceso que consultan el mismo caso a la vez comparten
+        una sola peticion; entre workers, un lock en el cache deja que solo
+        uno consulte DECRIM y los demas esperan el resultado que publica
+        (hasta DECRIM_COALESCER_ESPERA segundos).
+        
+        Returns:
+            dict: Igual que consultar_caso_por_dni(); si el resultado vino de
+            otra llamada, 'compartido' es True e 'intentos' esta vacio (no hay
+            llamadas propias que registrar)
+        """
+        clave = self._clave_consulta(numero_cedula, idcaso)
+
+        def _consultar():
+            inicio = time.time()
+            with bloqueo_compartido(clave, ttl=self._ttl_bloqueo_consulta()) as obtenido:
+                if obtenido:
+                    resultado = self.consultar_caso_por_dni(numero_cedula, idcaso)
+                    cache.set(*self._publicacion_consulta(clave, resultado))
+                    return resultado
+            return self._esperar_resultado_publicado(clave, inicio)
+
+        resultado, compartido = _consultas_en_vuelo.ejecutar(clave, _consultar)
+        if compartido:
+            return dict(resultado, intentos=[], compartido=True)
+        return resultado
+
+    async def consultar_estado_caso_async(self, numero_cedula, idcaso=None):
+        """
+        Version asyncio de consultar_estado_caso(): las corrutinas del mismo
+        event loop comparten la consulta y el lock entre workers es el mismo.
+        """
+        clave = self._clave_consulta(numero_cedula, idcaso)
+
+        async def _consultar():
+            inicio = time.time()
+            async with bloqueo_compartido_async(clave, ttl=self._ttl_bloqueo_consulta()) as obtenido:
+                if obtenido:
+                    resultado = await self.consultar_caso_por_dni_async(numero_cedula, idcaso)
+                    await cache.aset(*self._publicacion_consulta(clave, resultado))
+                    return resultado
+            return await self._esperar_resultado_publicado_async(clave, inicio)
+
+        resultado, compartido = await _consultas_en_vuelo_async.ejecutar(clave, _consultar)
+        if compartido:
+            return dict(resultado, intentos=[], compartido=True)
+        return resultado
+
+    def _ttl_bloqueo_consulta(self):
+        # El lock dura al menos lo que puede durar la consulta con reintentos
+        return self.reintento_presupuesto + self.timeout[0] + 5
+
+    @staticmethod
+    def _publicacion_consulta(clave, resultado):
+        """
+        (clave, valor, ttl) del resultado que se publica a los otros workers.
+        """
+        publicado = {k: v for k, v in resultado.items() if k != 'intentos'}
+        return (
+            f"{clave}:resultado",
+            {'publicado': time.time(), 'resultado': publicado},
+            int(getattr(settings, 'DECRIM_COALESCER_TTL', 5))
+        )
+
+    CLAVE_ULTIMO_WEBHOOK = 'decrim:webhook:ultimo'
+
+    def registrar_webhook_recibido(self):
+        """
+        Marca la hora del ultimo webhook de DECRIM (salud del modo webhook).
+        """
+        cache.set(self.CLAVE_ULTIMO_WEBHOOK, time.time(), None)
+
+    def estado_modo_webhook(self):
+        """
+        Modo configurado y efectivo del polling de estado.
+        
+        Returns:
+            dict: {
+                'configurado': 'polling' | 'webhook',
+                'efectivo': 'polling' | 'webhook',
+                'segundos_desde_ultimo_webhook': float | None,
+                'ventana_salud': float
+            }
+        """
+        configurado = str(getattr(settings, 'DECRIM_MODO_ESTADO', 'polling')).lower()
+        ventana = float(getattr(settings, 'DECRIM_WEBHOOK_VENTANA_SALUD', 1800))
+        ultimo = cache.get(self.CLAVE_ULTIMO_WEBHOOK)
+        edad = round(time.time() - ultimo, 1) if ultimo else None
+        saludable = edad is not None and edad <= ventana
+        return {
+            'configurado': configurado,
+            'efectivo': 'webhook' if configurado == 'webhook' and saludable else 'polling',
+            'segundos_desde_ultimo_webhook': edad,
+            'ventana_salud': ventana,
+        }
+
+    def responder_desde_base_de_datos(self):
+        """
+        True si el polling debe responder solo desde la BD: modo webhook y
+        algun webhook recibido dentro de DECRIM_WEBHOOK_VENTANA_SALUD. Sin
+        webhooks en esa ventana se vuelve a consultar DECRIM automaticamente.
+        """
+        modo = self.estado_modo_webhook()
+        if modo['configurado'] == 'webhook' and modo['efectivo'] != 'webhook':
+            logger.warning(
+                "Modo webhook sin webhooks recientes (ultimo hace %s s); consultando DECRIM",
+                modo['segundos_desde_ultimo_webhook']
+            )
+        return modo['efectivo'] == 'webhook'
+
+    @staticmethod
+    def _clave_consulta(numero_cedula, idcaso=None):
+        idcaso_raw = str(idcaso).strip() if idcaso is not None else ''
+        caso = idcaso_raw if idcaso_raw and idcaso_raw != "0" else str(numero_cedula).strip()
+        return f"decrim:consulta:{caso}"
+
+    @staticmethod
+    def _clave_cache_estado(preregistro_id):
+        return f"decrim:estado:{preregistro_id}"
+
+    def estado_cacheado(self, preregistro_id):
+        """
+        Respuesta de estado cacheada para el pre-registro (o None).
+        """
+        if int(getattr(settings, 'DECRIM_ESTADO_CACHE_TTL', 5)) <= 0:
+            return None
+        return cache.get(self._clave_cache_estado(preregistro_id))
+
+    def guardar_estado_cache(self, preregistro_id, respuesta, sobrescribir=False):
+        """
+        Guarda la respuesta de estado del pre-registro por DECRIM_ESTADO_CACHE_TTL.
+        
+        El polling no sobrescribe (cache.add): si el webhook escribio un
+        estado mas nuevo mientras la consulta estaba en curso, ese gana.
+        El webhook escribe con sobrescribir=True.
+        """
+        ttl = int(getattr(settings, 'DECRIM_ESTADO_CACHE_TTL', 5))
+        if ttl <= 0:
+            return
+        clave = self._clave_cache_estado(preregistro_id)
+        if sobrescribir:
+            cache.set(clave, respuesta, ttl)
+        else:
+            cache.add(clave, respuesta, ttl)
+
+    def invalidar_estado_cache(self, preregistro_id, numero_cedula=None, idcaso=None):
+        """
+        Elimina el estado cacheado del pre-registro y el resultado publicado
+        de una consulta en curso del caso (ya no es el ultimo estado).
+        """
+        cache.delete(self._clave_cache_estado(preregistro_id))
+        claves = set()
+        if idcaso:
+            claves.add(self._clave_consulta(numero_cedula, idcaso))
+        if numero_cedula:
+            claves.add(self._clave_consulta(numero_cedula))
+        cache.delete_many([f"{clave}:resultado" for clave in claves])
+
+    @staticmethod
+    def _resultado_publicado(clave, publicado, inicio):
+        # Solo sirve un resultado obtenido despues de que empezamos a esperar
+        if publicado and publicado['publicado'] >= inicio:
+            logger.info("Consulta DECRIM resuelta por otro worker: %s", clave)
+            return dict(publicado['resultado'], intentos=[], compartido=True)
+        return None
+
+    @staticmethod
+    def _resultado_consulta_en_curso(clave):
+        logger.info("Consulta DECRIM en curso en otro worker, sin resultado aun: %s", clave)
+        return {
+            'exitoso': False,
+            'estado': 'EN_PROCESO',
+            'error': 'Consulta del caso en curso en otro proceso',
+            'intentos': [],
+            'compartido': True
+        }
+
+    def _esperar_resultado_publicado(self, clave, inicio):
+        """
+        Espera el resultado que publica el worker que tiene el lock del caso.
+        """
+        limite = time.monotonic() + float(getattr(settings, 'DECRIM_COALESCER_ESPERA', 10))
+        while True:
+            resultado = self._resultado_publicado(clave, cache.get(f"{clave}:resultado"), inicio)
+            if resultado is not None:
+                return resultado
+            if time.monotonic() >= limite:
+                return self._resultado_consulta_en_curso(clave)
+            time.sleep(0.1)
+
+    async def _esperar_resultado_publicado_async(self, clave, inicio):
+        limite = time.monotonic() + float(getattr(settings, 'DECRIM_COALESCER_ESPERA', 10))
+        while True:
+            resultado = self._resultado_publicado(clave, await cache.aget(f"{clave}:resultado"), inicio)
+            if resultado is not None:
+                return resultado
+            if time.monotonic() >= limite:
+                return self._resultado_consulta_en_curso(clave)
+            await asyncio.sleep(0.1)
 
     def interpretar_estado(self, estado_codigo):
         """
@@ -233,11 +979,8 @@ class BiometriaService:
             return ('EN_PROCESO', 'Estado desconocido')
         return estado
 
-    def crear_registro_decrim(self, numero_cedula, tipo_documento, nombres):
-        """
-        Crea un registro digital en DECRIM y retorna el código y la URL.
-        """
-        payload = {
+    def _payload_registro(self, numero_cedula, tipo_documento, nombres):
+        return {
             "Username": self.username,
             "Password": self.password,
             "Dni": numero_cedula,
@@ -245,54 +988,128 @@ class BiometriaService:
             "Nombres": nombres
         }
 
-        try:
-            response = requests.post(
-                self.api_url,
-                json=payload,
-                headers={
-                    'Content-Type': 'application/json',
-                    'Accept': 'application/json'
-                },
-                timeout=self.timeout
-            )
-            data = response.json() if response.content else {}
+    @staticmethod
+    def _interpretar_respuesta_registro(response, payload):
+        data = response.json() if response.content else {}
 
-            if response.status_code == 200 and data.get('status') == 200:
-                data_payload = data.get('data', {})
-                return {
-                    'exitoso': True,
-                    'codigo': data_payload.get('Codigo'),
-                    'url': data_payload.get('Url'),
-                    'response_data': data,
-                    'request_data': payload
-                }
-
-            message = data.get('message') if isinstance(data, dict) else None
+        if response.status_code == 200 and data.get('status') == 200:
+            data_payload = data.get('data', {})
             return {
-                'exitoso': False,
-                'error': message or f'Error del proveedor: {response.status_code}',
+                'exitoso': True,
+                'codigo': data_payload.get('Codigo'),
+                'url': data_payload.get('Url'),
                 'response_data': data,
                 'request_data': payload
             }
 
-        except requests.exceptions.Timeout:
+        message = data.get('message') if isinstance(data, dict) else None
+        return {
+            'exitoso': False,
+            'error': message or f'Error del proveedor: {response.status_code}',
+            'response_data': data,
+            'request_data': payload
+        }
+
+    @staticmethod
+    def _resultado_excepcion_registro(error, payload):
+        if isinstance(error, (requests.exceptions.Timeout, httpx.TimeoutException)):
             return {
                 'exitoso': False,
                 'error': 'Timeout: El proveedor no respondió a tiempo',
                 'request_data': payload
             }
 
-        except requests.exceptions.ConnectionError:
+        if isinstance(error, (requests.exceptions.ConnectionError, httpx.TransportError)):
             return {
                 'exitoso': False,
                 'error': 'No se pudo conectar con el proveedor de validación',
                 'request_data': payload
             }
 
+        logger.error(
+            f"Error inesperado creando registro en DECRIM: {str(error)}",
+            exc_info=error
+        )
+        return {
+            'exitoso': False,
+            'error': f'Error inesperado: {str(error)}',
+            'request_data': payload
+        }
+
+    def crear_registro_decrim(self, numero_cedula, tipo_documento, nombres):
+        """
+        Crea un registro digital en DECRIM y retorna el código y la URL.
+        
+        No se reintenta: no es idempotente (cada llamada crea un caso).
+        Si el presupuesto de registros (DECRIM_LIMITE_REGISTRO_*) esta
+        agotado, retorna 'limitado': True sin llamar a DECRIM.
+        """
+        payload = self._payload_registro(numero_cedula, tipo_documento, nombres)
+
+        permiso = obtener_limitador_decrim('registro').adquirir()
+        if not permiso['permitido']:
+            return self._resultado_limitado('registro', permiso, payload)
+
+        try:
+            response = self.session.post(
+                self.api_url,
+                json=payload,
+                headers=HEADERS_JSON,
+                timeout=self.timeout
+            )
+            return self._interpretar_respuesta_registro(response, payload)
         except Exception as e:
-            logger.exception(f"Error inesperado creando registro en DECRIM: {str(e)}")
-            return {
-                'exitoso': False,
-                'error': f'Error inesperado: {str(e)}',
-                'request_data': payload
-            }
+            return self._resultado_excepcion_registro(e, payload)
+
+    async def crear_registro_decrim_async(self, numero_cedula, tipo_documento, nombres):
+        """
+        Version asyncio de crear_registro_decrim() (httpx, mismo resultado).
+        """
+        payload = self._payload_registro(numero_cedula, tipo_documento, nombres)
+
+        permiso = await obtener_limitador_decrim('registro').adquirir_async()
+        if not permiso['permitido']:
+            return self._resultado_limitado('registro', permiso, payload)
+
+        try:
+            response = await self._cliente_async().post(
+                self.api_url,
+                json=payload,
+                headers=HEADERS_JSON,
+                timeout=self._timeout_httpx(self.timeout)
+            )
+            return self._interpretar_respuesta_registro(response, payload)
+        except Exception as e:
+            return self._resultado_excepcion_registro(e, payload)
+
+    def estadisticas_conexiones(self):
+        """
+        Reutilizacion de conexiones HTTP hacia DECRIM en este proceso.
+        
+        Returns:
+            dict: Ver http_pool.estadisticas_sesion_http()
+        """
+        return dict(
+            estadisticas_sesion_http('decrim'),
+            cliente_async=estadisticas_cliente_http_async('decrim')
+        )
+
+    def estadisticas_limitadores(self):
+        """
+        Presupuestos de llamadas a DECRIM (registro y consulta).
+        
+        Returns:
+            dict: Ver LimitadorTokens.estadisticas()
+        """
+        obtener_limitador_decrim('registro')
+        obtener_limitador_decrim('consulta')
+        return estadisticas_limitadores()
+
+    def estadisticas_cobertura(self):
+        """
+        Coberturas de consultas en este proceso (None si DECRIM_COBERTURA=False).
+        
+        Returns:
+            dict: Ver CoberturaSolicitudes.estadisticas()
+        """
+        return self._cobertura().estadisticas() if self.cobertura_activa else None
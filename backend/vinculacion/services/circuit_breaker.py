@@ -0,0 +1,160 @@
+# vinculacion/services/circuit_breaker.py
+
+"""
+CIRCUIT BREAKER PARA INTEGRACIONES EXTERNAS
+===========================================
+Evita que los workers se queden esperando a un sistema caido.
+
+Estados:
+- CERRADO: las llamadas pasan; se cuentan los fallos consecutivos.
+- ABIERTO: las llamadas se rechazan de inmediato (sin red) hasta que
+  pase el intervalo de prueba.
+- SEMI_ABIERTO: se deja pasar un numero limitado de llamadas de prueba;
+  si responden bien se cierra, si fallan se vuelve a abrir.
+
+El estado vive en memoria del proceso: rechazar no cuesta mas que
+tomar un lock.
+"""
+
+import logging
+import threading
+import time
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+
+class CircuitoAbiertoError(Exception):
+    """
+    Se lanza cuando el circuito rechaza una llamada sin intentarla.
+    """
+
+    def __init__(self, nombre, reintentar_en):
+        self.nombre = nombre
+        self.reintentar_en = reintentar_en
+        super().__init__(
+            f"{nombre} no disponible (circuito abierto); "
+            f"reintentar en {reintentar_en:.0f} s"
+        )
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por proceso con estados cerrado, abierto y semi-abierto.
+    """
+
+    CERRADO = 'CERRADO'
+    ABIERTO = 'ABIERTO'
+    SEMI_ABIERTO = 'SEMI_ABIERTO'
+
+    def __init__(self, nombre, umbral_fallos=5, intervalo_prueba=30, max_pruebas=1):
+        """
+        Args:
+            nombre (str): Nombre de la integracion (para logs y estado)
+            umbral_fallos (int): Fallos consecutivos que abren el circuito
+            intervalo_prueba (float): Segundos en ABIERTO antes de probar
+            max_pruebas (int): Llamadas simultaneas permitidas en SEMI_ABIERTO
+        """
+        self.nombre = nombre
+        self.umbral_fallos = umbral_fallos
+        self.intervalo_prueba = intervalo_prueba
+        self.max_pruebas = max_pruebas
+
+        self._lock = threading.Lock()
+        self._estado = self.CERRADO
+        self._fallos_consecutivos = 0
+        self._abierto_desde = None
+        self._pruebas_en_curso = 0
+        self._rechazadas = 0
+        self._aperturas = 0
+        self._ultimo_error = None
+
+    def _cambiar_estado(self, nuevo_estado):
+        anterior = self._estado
+        self._estado = nuevo_estado
+        if nuevo_estado == self.ABIERTO:
+            self._abierto_desde = time.monotonic()
+            self._aperturas += 1
+            logger.warning(
+                "Circuit breaker %s: %s -> ABIERTO tras %s fallos (ultimo error: %s)",
+                self.nombre,
+                anterior,
+                self._fallos_consecutivos,
+                self._ultimo_error
+            )
+        else:
+            logger.info("Circuit breaker %s: %s -> %s", self.nombre, anterior, nuevo_estado)
+
+    def permitir(self):
+        """
+        Indica si la llamada puede intentarse.
+
+        Raises:
+            CircuitoAbiertoError: Si el circuito esta abierto (o semi-abierto
+                sin cupo de prueba)
+        """
+        with self._lock:
+            if self._estado == self.CERRADO:
+                return
+
+            if self._estado == self.ABIERTO:
+                transcurrido = time.monotonic() - self._abierto_desde
+                if transcurrido < self.intervalo_prueba:
+                    self._rechazadas += 1
+                    raise CircuitoAbiertoError(self.nombre, self.intervalo_prueba - transcurrido)
+                self._cambiar_estado(self.SEMI_ABIERTO)
+                self._pruebas_en_curso = 0
+
+            if self._pruebas_en_curso >= self.max_pruebas:
+                self._rechazadas += 1
+                raise CircuitoAbiertoError(self.nombre, self.intervalo_prueba)
+            self._pruebas_en_curso += 1
+
+    def registrar_exito(self):
+        with self._lock:
+            self._fallos_consecutivos = 0
+            if self._estado == self.SEMI_ABIERTO:
+                self._pruebas_en_curso = 0
+                self._cambiar_estado(self.CERRADO)
+
+    def registrar_fallo(self, error=None):
+        with self._lock:
+            self._fallos_consecutivos += 1
+            self._ultimo_error = str(error) if error is not None else None
+            if self._estado == self.SEMI_ABIERTO:
+                self._pruebas_en_curso = 0
+                self._cambiar_estado(self.ABIERTO)
+            elif (
+                self._estado == self.CERRADO
+                and self._fallos_consecutivos >= self.umbral_fallos
+            ):
+                self._cambiar_estado(self.ABIERTO)
+
+    def liberar_prueba(self):
+        """
+        Libera el cupo de prueba cuando la llamada termino sin un resultado
+        que cuente como exito o fallo de la integracion.
+        """
+        with self._lock:
+            if self._estado == self.SEMI_ABIERTO and self._pruebas_en_curso > 0:
+                self._pruebas_en_curso -= 1
+
+    def estado(self):
+        """
+        Estado actual del circuito (para endpoints de estado y logs).
+        """
+        with self._lock:
+            datos = {
+                'nombre': self.nombre,
+                'estado': self._estado,
+                'fallos_consecutivos': self._fallos_consecutivos,
+                'umbral_fallos': self.umbral_fallos,
+                'intervalo_prueba': self.intervalo_prueba,
+                'aperturas': self._aperturas,
+                'rechazadas': self._rechazadas,
+                'ultimo_error': self._ultimo_error,
+            }
+            if self._estado == self.ABIERTO:
+                transcurrido = time.monotonic() - self._abierto_desde
+                datos['proxima_prueba_en'] = round(max(self.intervalo_prueba - transcurrido, 0), 2)
+            return datos
@@ -0,0 +1,166 @@
+# vinculacion/services/cobertura.py
+
+"""
+SOLICITUDES DE COBERTURA (HEDGING)
+==================================
+Para llamadas idempotentes con cola de latencia larga: si la primera
+solicitud no respondio tras el percentil configurado de la latencia
+reciente, se envia una segunda identica y gana la primera respuesta.
+
+- La latencia reciente es una ventana movil por proceso (ultimas N
+  respuestas), no el histograma acumulado de metricas.
+- Las coberturas tienen presupuesto propio: cada solicitud primaria suma
+  `max_fraccion` creditos y cada cobertura gasta uno, asi nunca pasan de
+  esa fraccion de la carga (max_fraccion <= 1: a lo sumo el doble).
+"""
+
+import threading
+from collections import deque
+
+from .metricas import registrar_exportador
+
+# Creditos acumulables: permite una rafaga corta de coberturas
+_CREDITOS_MAX = 10.0
+
+
+class CoberturaSolicitudes:
+    """
+    Ventana de latencia, presupuesto y contadores de coberturas.
+    """
+
+    def __init__(self, nombre, percentil=0.95, min_ms=200, max_fraccion=0.1, min_muestras=20, ventana=200):
+        """
+        Args:
+            nombre (str): Llamada cubierta (etiqueta de metricas)
+            percentil (float): Percentil de la latencia reciente tras el que se cubre
+            min_ms (float): Retardo minimo antes de cubrir
+            max_fraccion (float): Coberturas maximas por solicitud primaria (0-1)
+            min_muestras (int): Respuestas observadas antes de empezar a cubrir
+            ventana (int): Respuestas recientes consideradas
+        """
+        self.nombre = nombre
+        self.percentil = min(max(float(percentil), 0.0), 1.0)
+        self.min_ms = float(min_ms)
+        self.max_fraccion = min(max(float(max_fraccion), 0.0), 1.0)
+        self.min_muestras = int(min_muestras)
+        self._latencias = deque(maxlen=int(ventana))
+        self._lock = threading.Lock()
+        self._creditos = 0.0
+        self._contadores = {
+            'primarias': 0,
+            'coberturas': 0,
+            'ganadas_por_cobertura': 0,
+            'sin_presupuesto': 0,
+            'sin_token': 0,
+        }
+
+    def observar(self, duracion_ms):
+        """
+        Registra la latencia de una respuesta recibida.
+        """
+        with self._lock:
+            self._latencias.append(duracion_ms)
+
+    def retardo_s(self):
+        """
+        Segundos a esperar la primaria antes de cubrirla, o None si aun no
+        hay muestras suficientes.
+        """
+        with self._lock:
+            if len(self._latencias) < self.min_muestras:
+                return None
+            ordenadas = sorted(self._latencias)
+        posicion = min(int(self.percentil * len(ordenadas)), len(ordenadas) - 1)
+        return max(ordenadas[posicion], self.min_ms) / 1000
+
+    def registrar_primaria(self):
+        with self._lock:
+            self._contadores['primarias'] += 1
+            self._creditos = min(self._creditos + self.max_fraccion, _CREDITOS_MAX)
+
+    def tomar_cobertura(self):
+        """
+        Reserva un credito de cobertura; se cuenta como cobertura al
+        enviarla (registrar_cobertura) o se devuelve (devolver_cobertura).
+
+        Returns:
+            bool: False si el presupuesto esta agotado
+        """
+        with self._lock:
+            if self._creditos < 1:
+                self._contadores['sin_presupuesto'] += 1
+                return False
+            self._creditos -= 1
+            return True
+
+    def devolver_cobertura(self):
+        """
+        Devuelve el credito reservado de una cobertura que no se envio
+        (el limitador no dio token).
+        """
+        with self._lock:
+            self._creditos = min(self._creditos + 1, _CREDITOS_MAX)
+            self._contadores['sin_token'] += 1
+
+    def registrar_cobertura(self):
+        with self._lock:
+            self._contadores['coberturas'] += 1
+
+    def registrar_ganadora(self, cobertura):
+        if cobertura:
+            with self._lock:
+                self._contadores['ganadas_por_cobertura'] += 1
+
+    def estadisticas(self):
+        retardo = self.retardo_s()
+        with self._lock:
+            contadores = dict(self._contadores)
+            muestras = len(self._latencias)
+            creditos = self._creditos
+        return dict(
+            contadores,
+            nombre=self.nombre,
+            percentil=self.percentil,
+            max_fraccion=self.max_fraccion,
+            muestras=muestras,
+            retardo_ms=round(retardo * 1000, 1) if retardo is not None else None,
+            creditos=round(creditos, 2),
+        )
+
+
+_coberturas = {}
+_coberturas_lock = threading.Lock()
+
+
+def obtener_cobertura(nombre, **kwargs):
+    """
+    CoberturaSolicitudes `nombre` del proceso (se crea con kwargs la primera vez).
+    """
+    cobertura = _coberturas.get(nombre)
+    if cobertura is None:
+        with _coberturas_lock:
+            cobertura = _coberturas.setdefault(nombre, CoberturaSolicitudes(nombre, **kwargs))
+    return cobertura
+
+
+def _exportar_prometheus():
+    with _coberturas_lock:
+        coberturas = list(_coberturas.values())
+    if not coberturas:
+        return []
+
+    lineas = [
+        '# HELP vinculacion_cobertura_solicitudes_total Solicitudes primarias y de cobertura (hedging).',
+        '# TYPE vinculacion_cobertura_solicitudes_total counter',
+    ]
+    for cobertura in coberturas:
+        datos = cobertura.estadisticas()
+        for tipo in ('primarias', 'coberturas', 'ganadas_por_cobertura', 'sin_presupuesto', 'sin_token'):
+            lineas.append(
+                f'vinculacion_cobertura_solicitudes_total{{llamada="{datos["nombre"]}",tipo="{tipo}"}} '
+                f'{datos[tipo]}'
+            )
+    return lineas
+
+
+registrar_exportador(_exportar_prometheus)
@@ -0,0 +1,323 @@
+# vinculacion/services/coordinacion.py
+
+"""
+COORDINACION DE LLAMADAS CONCURRENTES
+=====================================
+Dos piezas para no repetir la misma llamada externa:
+
+- SingleFlight: dentro de un proceso, las llamadas concurrentes con la
+  misma clave esperan el resultado de la primera (la "lider") en lugar
+  de hacer su propia peticion.
+- bloqueo_compartido: lock corto entre workers sobre el cache de Django
+  (cache.add es atomico en Redis y Memcached). Con DatabaseCache (el
+  default) cache.add no lo es: si la fila del lock existe vencida hace un
+  SELECT y luego un UPDATE sin bloquearla, y dos workers podrian tomarlo.
+  Por eso sobre la BD el lock se toma con un UPDATE condicional (solo si
+  la fila vencio) o un INSERT (la clave primaria rechaza al segundo) y se
+  libera con un DELETE condicionado al dueno. Con LocMemCache el lock solo
+  cubre al proceso actual.
+
+Ambas tienen version asyncio (SingleFlightAsync, bloqueo_compartido_async)
+para las vistas async.
+"""
+
+import asyncio
+import base64
+import logging
+import math
+import pickle
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache, caches
+from django.core.cache.backends.db import DatabaseCache
+from django.db import DatabaseError, connections, router, transaction
+from django.utils import timezone
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+
+class _Vuelo:
+    """
+    Llamada en curso: la lider publica el resultado y las demas lo esperan.
+    """
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.error = None
+        self.seguidores = 0
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes con la misma clave en una sola ejecucion.
+    """
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self._lock = threading.Lock()
+        self._vuelos = {}
+        self._ejecuciones = 0
+        self._compartidas = 0
+
+    def ejecutar(self, clave, funcion):
+        """
+        Ejecuta `funcion()` una sola vez por clave entre los hilos concurrentes.
+
+        Args:
+            clave (str): Identificador de la llamada (p.ej. idcaso o cedula)
+            funcion (callable): Llamada a ejecutar por la lider
+
+        Returns:
+            tuple: (resultado, compartido) - compartido es True si el
+            resultado vino de la llamada de otro hilo
+        """
+        with self._lock:
+            vuelo = self._vuelos.get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = _Vuelo()
+                self._vuelos[clave] = vuelo
+                self._ejecuciones += 1
+            else:
+                vuelo.seguidores += 1
+                self._compartidas += 1
+
+        if not lider:
+            vuelo.evento.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.resultado, True
+
+        try:
+            vuelo.resultado = funcion()
+            return vuelo.resultado, False
+        except Exception as e:
+            vuelo.error = e
+            raise
+        finally:
+            with self._lock:
+                self._vuelos.pop(clave, None)
+            vuelo.evento.set()
+            if vuelo.seguidores:
+                logger.info(
+                    "%s: %s llamadas concurrentes compartieron el resultado de %s",
+                    self.nombre,
+                    vuelo.seguidores,
+                    clave
+                )
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'nombre': self.nombre,
+                'en_curso': len(self._vuelos),
+                'ejecuciones': self._ejecuciones,
+                'compartidas': self._compartidas,
+            }
+
+
+def _cache_bd():
+    backend = caches['default']
+    return backend if isinstance(backend, DatabaseCache) else None
+
+
+def _sql_lock_bd(backend):
+    db = router.db_for_write(backend.cache_model_class)
+    connection = connections[db]
+    quote_name = connection.ops.quote_name
+    return db, connection, quote_name(backend._table), quote_name
+
+
+def _valor_bd(backend, valor):
+    # Mismo formato que DatabaseCache: cache.get() del lock sigue funcionando
+    return base64.b64encode(pickle.dumps(valor, backend.pickle_protocol)).decode('latin1')
+
+
+def _tomar_lock_bd(backend, clave_lock, dueno, ttl):
+    """
+    cache.add() atomico sobre la tabla de DatabaseCache.
+    """
+    db, connection, tabla, quote_name = _sql_lock_bd(backend)
+    clave_bd = backend.make_and_validate_key(clave_lock)
+    valor = _valor_bd(backend, dueno)
+    ahora = timezone.now().replace(microsecond=0)
+    expira = connection.ops.adapt_datetimefield_value(ahora + timedelta(seconds=math.ceil(ttl)))
+    ahora = connection.ops.adapt_datetimefield_value(ahora)
+
+    with connection.cursor() as cursor:
+        # Fila vencida: el UPDATE condicional bloquea la fila y solo un
+        # worker la ve vencida
+        with transaction.atomic(using=db):
+            cursor.execute(
+                f"UPDATE {tabla} SET {quote_name('value')} = %s, {quote_name('expires')} = %s "
+                f"WHERE {quote_name('cache_key')} = %s AND {quote_name('expires')} < %s",
+                [valor, expira, clave_bd, ahora]
+            )
+            if cursor.rowcount == 1:
+                return True
+        # Sin fila: la clave primaria deja pasar un solo INSERT
+        try:
+            with transaction.atomic(using=db):
+                cursor.execute(
+                    f"INSERT INTO {tabla} ({quote_name('cache_key')}, {quote_name('value')}, "
+                    f"{quote_name('expires')}) VALUES (%s, %s, %s)",
+                    [clave_bd, valor, expira]
+                )
+            return True
+        except DatabaseError:
+            return False
+
+
+def _soltar_lock_bd(backend, clave_lock, dueno):
+    db, connection, tabla, quote_name = _sql_lock_bd(backend)
+    with connection.cursor() as cursor:
+        with transaction.atomic(using=db):
+            cursor.execute(
+                f"DELETE FROM {tabla} WHERE {quote_name('cache_key')} = %s AND {quote_name('value')} = %s",
+                [backend.make_and_validate_key(clave_lock), _valor_bd(backend, dueno)]
+            )
+
+
+def _tomar_lock(clave_lock, dueno, ttl):
+    backend = _cache_bd()
+    if backend is not None:
+        return _tomar_lock_bd(backend, clave_lock, dueno, ttl)
+    return cache.add(clave_lock, dueno, ttl)
+
+
+def _soltar_lock(clave_lock, dueno):
+    backend = _cache_bd()
+    if backend is not None:
+        _soltar_lock_bd(backend, clave_lock, dueno)
+    elif cache.get(clave_lock) == dueno:
+        cache.delete(clave_lock)
+
+
+async def _tomar_lock_async(clave_lock, dueno, ttl):
+    if _cache_bd() is not None:
+        return await sync_to_async(_tomar_lock)(clave_lock, dueno, ttl)
+    return await cache.aadd(clave_lock, dueno, ttl)
+
+
+async def _soltar_lock_async(clave_lock, dueno):
+    if _cache_bd() is not None:
+        await sync_to_async(_soltar_lock)(clave_lock, dueno)
+    elif await cache.aget(clave_lock) == dueno:
+        await cache.adelete(clave_lock)
+
+
+@contextmanager
+def bloqueo_compartido(clave, ttl=10, espera=0, intervalo=0.1):
+    """
+    Lock corto entre workers sobre el cache de Django.
+
+    El lock expira solo tras `ttl` segundos si el worker muere con el
+    lock tomado. Al salir solo se libera si sigue siendo del dueno.
+
+    Args:
+        clave (str): Clave del lock en el cache
+        ttl (float): Segundos de vida maxima del lock
+        espera (float): Segundos a esperar si otro worker lo tiene (0 = no esperar)
+        intervalo (float): Segundos entre intentos mientras se espera
+
+    Yields:
+        bool: True si se obtuvo el lock
+    """
+    clave_lock = f"lock:{clave}"
+    dueno = uuid.uuid4().hex
+    limite = time.monotonic() + espera
+    obtenido = _tomar_lock(clave_lock, dueno, ttl)
+    while not obtenido and time.monotonic() < limite:
+        time.sleep(intervalo)
+        obtenido = _tomar_lock(clave_lock, dueno, ttl)
+
+    try:
+        yield obtenido
+    finally:
+        if obtenido:
+            _soltar_lock(clave_lock, dueno)
+
+
+class SingleFlightAsync:
+    """
+    Version asyncio de SingleFlight: las corrutinas del mismo event loop
+    con la misma clave esperan el resultado de la primera.
+    """
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self._vuelos = {}
+        self._ejecuciones = 0
+        self._compartidas = 0
+
+    async def ejecutar(self, clave, funcion):
+        """
+        Ejecuta `await funcion()` una sola vez por clave en el event loop actual.
+
+        Returns:
+            tuple: (resultado, compartido)
+        """
+        loop = asyncio.get_running_loop()
+        clave_loop = (id(loop), clave)
+        vuelo = self._vuelos.get(clave_loop)
+        if vuelo is not None and vuelo.get_loop() is loop:
+            self._compartidas += 1
+            # shield: cancelar a un seguidor no cancela la llamada de la lider
+            return await asyncio.shield(vuelo), True
+
+        vuelo = loop.create_future()
+        self._vuelos[clave_loop] = vuelo
+        self._ejecuciones += 1
+        try:
+            resultado = await funcion()
+            vuelo.set_result(resultado)
+            return resultado, False
+        except asyncio.CancelledError:
+            vuelo.cancel()
+            raise
+        except Exception as e:
+            vuelo.set_exception(e)
+            # Evitar "exception was never retrieved" si nadie esperaba
+            vuelo.exception()
+            raise
+        finally:
+            self._vuelos.pop(clave_loop, None)
+
+    def estadisticas(self):
+        return {
+            'nombre': self.nombre,
+            'en_curso': len(self._vuelos),
+            'ejecuciones': self._ejecuciones,
+            'compartidas': self._compartidas,
+        }
+
+
+@asynccontextmanager
+async def bloqueo_compartido_async(clave, ttl=10, espera=0, intervalo=0.1):
+    """
+    Version asyncio de bloqueo_compartido() (cache.aadd / cache.adelete, o
+    la tabla de DatabaseCache en el hilo de sync_to_async).
+
+    Yields:
+        bool: True si se obtuvo el lock
+    """
+    clave_lock = f"lock:{clave}"
+    dueno = uuid.uuid4().hex
+    limite = time.monotonic() + espera
+    obtenido = await _tomar_lock_async(clave_lock, dueno, ttl)
+    while not obtenido and time.monotonic() < limite:
+        await asyncio.sleep(intervalo)
+        obtenido = await _tomar_lock_async(clave_lock, dueno, ttl)
+
+    try:
+        yield obtenido
+    finally:
+        if obtenido:
+            await _soltar_lock_async(clave_lock, dueno)
@@ -0,0 +1,285 @@
+# vinculacion/services/http_pool.py
+
+"""
+SESIONES HTTP COMPARTIDAS (KEEP-ALIVE)
+======================================
+Una requests.Session por integracion y por proceso, con un pool de
+conexiones urllib3 dimensionado desde settings.py. Las llamadas
+sucesivas al mismo host reutilizan la conexion TCP/TLS abierta en
+lugar de hacer un handshake nuevo en cada peticion.
+
+La sesion se recrea si el proceso fue bifurcado (fork) despues de
+crearla: los sockets no se comparten entre workers de gunicorn.
+
+Para vistas async (ASGI) hay un httpx.AsyncClient por event loop, con
+HTTP/2 si el paquete h2 esta instalado. Si el loop cambia, el cliente del
+loop anterior se cierra.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import socket
+import threading
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+
+def _socket_options_keepalive():
+    """
+    Opciones de socket para TCP keep-alive (detecta conexiones muertas en el pool).
+    """
+    opciones = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # Parametros finos solo disponibles en Linux
+    for nombre, valor in (('TCP_KEEPIDLE', 60), ('TCP_KEEPINTVL', 15), ('TCP_KEEPCNT', 4)):
+        if hasattr(socket, nombre):
+            opciones.append((socket.IPPROTO_TCP, getattr(socket, nombre), valor))
+    return opciones
+
+
+class AdaptadorHTTP(HTTPAdapter):
+    """
+    HTTPAdapter con TCP keep-alive en los sockets del pool.
+    """
+
+    def __init__(self, tcp_keepalive=True, **kwargs):
+        self.tcp_keepalive = tcp_keepalive
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.tcp_keepalive:
+            from urllib3.connection import HTTPConnection
+
+            kwargs['socket_options'] = (
+                list(HTTPConnection.default_socket_options) + _socket_options_keepalive()
+            )
+        super().init_poolmanager(*args, **kwargs)
+
+
+_sesiones = {}
+_sesiones_lock = threading.Lock()
+
+
+def obtener_sesion_http(
+    nombre,
+    pool_connections=4,
+    pool_maxsize=10,
+    pool_block=False,
+    keepalive=True,
+    verify=None
+):
+    """
+    Retorna la sesion HTTP compartida `nombre` del proceso actual.
+
+    Args:
+        nombre (str): Integracion (p.ej. 'decrim'); una sesion por nombre
+        pool_connections (int): Hosts distintos con pool propio
+        pool_maxsize (int): Conexiones abiertas por host (>= hilos concurrentes)
+        pool_block (bool): Esperar una conexion libre en lugar de abrir una extra
+        keepalive (bool): Reutilizar conexiones (False envia Connection: close)
+        verify (bool|str): Verificacion TLS (bundle de CA o bool); None = default
+
+    Returns:
+        requests.Session: Sesion con el pool montado para http y https
+    """
+    pid = os.getpid()
+    entrada = _sesiones.get(nombre)
+    if entrada is not None and entrada[1] == pid:
+        return entrada[0]
+
+    with _sesiones_lock:
+        entrada = _sesiones.get(nombre)
+        if entrada is None or entrada[1] != pid:
+            sesion = requests.Session()
+            adaptador = AdaptadorHTTP(
+                tcp_keepalive=keepalive,
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                pool_block=pool_block
+            )
+            sesion.mount('https://', adaptador)
+            sesion.mount('http://', adaptador)
+            if not keepalive:
+                sesion.headers['Connection'] = 'close'
+            if verify is not None:
+                sesion.verify = verify
+            logger.info(
+                "Creando sesion HTTP %s (pid=%s, pool_maxsize=%s, keepalive=%s)",
+                nombre,
+                pid,
+                pool_maxsize,
+                keepalive
+            )
+            entrada = (sesion, pid, {
+                'pool_connections': pool_connections,
+                'pool_maxsize': pool_maxsize,
+                'pool_block': pool_block,
+                'keepalive': keepalive,
+            })
+            _sesiones[nombre] = entrada
+    return entrada[0]
+
+
+def cerrar_sesion_http(nombre):
+    """
+    Cierra la sesion `nombre` del proceso actual (util en pruebas).
+    """
+    with _sesiones_lock:
+        entrada = _sesiones.pop(nombre, None)
+    if entrada is not None and entrada[1] == os.getpid():
+        entrada[0].close()
+
+
+def estadisticas_sesion_http(nombre):
+    """
+    Reutilizacion de conexiones de la sesion `nombre` en este proceso.
+
+    Por host: peticiones hechas, conexiones nuevas abiertas y conexiones
+    libres en el pool. tasa_reutilizacion = 1 - conexiones_nuevas / peticiones.
+
+    Returns:
+        dict: Configuracion del pool y contadores por host
+    """
+    entrada = _sesiones.get(nombre)
+    datos = {'nombre': nombre, 'pid': os.getpid(), 'creada': False}
+    if entrada is None or entrada[1] != os.getpid():
+        return datos
+
+    sesion, _, configuracion = entrada
+    datos.update(configuracion)
+    datos['creada'] = True
+
+    hosts = {}
+    adaptador = sesion.get_adapter('https://')
+    pools = adaptador.poolmanager.pools
+    for clave in list(pools.keys()):
+        pool = pools.get(clave)
+        if pool is None:
+            continue
+        peticiones = pool.num_requests
+        nuevas = pool.num_connections
+        hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+            'peticiones': peticiones,
+            'conexiones_nuevas': nuevas,
+            'reutilizadas': max(peticiones - nuevas, 0),
+            'tasa_reutilizacion': round(1 - nuevas / peticiones, 4) if peticiones else None,
+            'libres_en_pool': pool.pool.qsize() if pool.pool is not None else 0,
+        }
+    datos['hosts'] = hosts
+    return datos
+
+
+def http2_disponible():
+    """
+    True si httpx puede negociar HTTP/2 (requiere el paquete h2).
+    """
+    return importlib.util.find_spec('h2') is not None
+
+
+# Clientes asyncio: cada uno esta ligado al event loop donde se crea
+_clientes_async = {}
+_http2_advertido = False
+
+
+def _cerrar_cliente_anterior(nombre, cliente, loop):
+    """
+    Cierra (aclose) el cliente de un event loop que ya no se usa, en su loop.
+
+    Si el loop ya se cerro no se puede hacer aclose(); los sockets se
+    liberan al recolectar el cliente.
+    """
+    if cliente.is_closed:
+        return
+    try:
+        if loop.is_closed():
+            logger.warning("Cliente HTTP async %s de un event loop cerrado: se descarta sin aclose()", nombre)
+            return
+        cierre = cliente.aclose()
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(cierre, loop)
+        else:
+            threading.Thread(
+                target=loop.run_until_complete,
+                args=(cierre,),
+                name=f'cierre-{nombre}',
+                daemon=True
+            ).start()
+    except Exception as e:
+        logger.warning("Error cerrando cliente HTTP async %s anterior: %s", nombre, e)
+
+
+def obtener_cliente_http_async(
+    nombre,
+    max_connections=100,
+    max_keepalive_connections=20,
+    keepalive_expiry=30,
+    http2=True,
+    verify=True
+):
+    """
+    Retorna el httpx.AsyncClient `nombre` del event loop actual.
+
+    Args:
+        nombre (str): Integracion (p.ej. 'decrim'); un cliente por nombre y loop
+        max_connections (int): Conexiones simultaneas (llamadas en vuelo por host)
+        max_keepalive_connections (int): Conexiones ociosas que se conservan
+        keepalive_expiry (float): Segundos que vive una conexion ociosa
+        http2 (bool): Negociar HTTP/2 (ALPN); si h2 no esta instalado se usa HTTP/1.1
+        verify (bool|str): Verificacion TLS (bundle de CA o bool)
+
+    Returns:
+        httpx.AsyncClient: Cliente con pool de conexiones keep-alive
+    """
+    global _http2_advertido
+
+    loop = asyncio.get_running_loop()
+    entrada = _clientes_async.get(nombre)
+    if entrada is not None and entrada[1] is loop and not entrada[0].is_closed:
+        return entrada[0]
+    if entrada is not None and entrada[1] is not loop:
+        _cerrar_cliente_anterior(nombre, entrada[0], entrada[1])
+
+    if http2 and not http2_disponible():
+        if not _http2_advertido:
+            logger.warning("Paquete h2 no instalado: el cliente %s usara HTTP/1.1", nombre)
+            _http2_advertido = True
+        http2 = False
+
+    logger.info(
+        "Creando cliente HTTP async %s (pid=%s, max_connections=%s, http2=%s)",
+        nombre,
+        os.getpid(),
+        max_connections,
+        http2
+    )
+    cliente = httpx.AsyncClient(
+        http2=http2,
+        verify=verify,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+    )
+    _clientes_async[nombre] = (cliente, loop, {
+        'max_connections': max_connections,
+        'max_keepalive_connections': max_keepalive_connections,
+        'http2': http2,
+    })
+    return cliente
+
+
+def estadisticas_cliente_http_async(nombre):
+    """
+    Configuracion del cliente async `nombre` (si existe en este proceso).
+    """
+    entrada = _clientes_async.get(nombre)
+    if entrada is None:
+        return {'nombre': nombre, 'creado': False}
+    return dict(entrada[2], nombre=nombre, creado=not entrada[0].is_closed)
@@ -0,0 +1,257 @@
+# vinculacion/services/indice_asociados.py
+
+"""
+INDICE LOCAL DE TERCEROS LINIX (FILTRO DE BLOOM)
+================================================
+Archivo compacto en disco con las identificaciones de GR_TERCERO,
+generado cada noche por el comando `construir_indice_asociados`.
+
+Cada worker lo abre con mmap (solo lectura, paginas compartidas entre
+procesos) y lo usa antes de SP_CONSULTACTU:
+- "no esta"   -> respuesta definitiva, no se consulta Oracle
+- "puede estar" -> se confirma con consultar_actu()
+
+Formato del archivo:
+    [4 bytes longitud del encabezado][encabezado JSON][bits del filtro]
+"""
+
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from django.conf import settings
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+MAGIC = 'VDBLOOM1'
+
+
+def _normalizar(identificacion):
+    return str(identificacion).strip().lstrip('0').encode('utf-8')
+
+
+def _posiciones(identificacion, num_bits, num_hashes):
+    """
+    Posiciones de bit por doble hashing (Kirsch-Mitzenmacher) sobre blake2b.
+    """
+    digest = hashlib.blake2b(_normalizar(identificacion), digest_size=16).digest()
+    h1, h2 = struct.unpack('<QQ', digest)
+    h2 |= 1
+    return [(h1 + i * h2) % num_bits for i in range(num_hashes)]
+
+
+def parametros_optimos(num_elementos, tasa_falsos_positivos):
+    """
+    Calcula bits (m) y funciones hash (k) para n elementos y una tasa p.
+    """
+    n = max(int(num_elementos), 1)
+    p = min(max(float(tasa_falsos_positivos), 1e-9), 0.5)
+    num_bits = int(math.ceil(-n * math.log(p) / (math.log(2) ** 2)))
+    num_bits = max(num_bits + (-num_bits % 8), 8)
+    num_hashes = max(1, int(round(num_bits / n * math.log(2))))
+    return num_bits, num_hashes
+
+
+def construir_indice(identificaciones, ruta, num_elementos_estimado, tasa_falsos_positivos=0.01):
+    """
+    Construye el filtro y lo escribe de forma atomica en `ruta`.
+
+    Args:
+        identificaciones (iterable): Identificaciones a incluir
+        ruta (str|Path): Archivo de salida
+        num_elementos_estimado (int): Cantidad esperada (dimensiona el filtro)
+        tasa_falsos_positivos (float): Tasa objetivo de falsos positivos
+
+    Returns:
+        dict: Encabezado escrito (metadatos del indice)
+    """
+    inicio = time.monotonic()
+    num_bits, num_hashes = parametros_optimos(num_elementos_estimado, tasa_falsos_positivos)
+    bits = bytearray(num_bits // 8)
+
+    total = 0
+    for identificacion in identificaciones:
+        if identificacion is None:
+            continue
+        for posicion in _posiciones(identificacion, num_bits, num_hashes):
+            bits[posicion >> 3] |= 1 << (posicion & 7)
+        total += 1
+
+    # Tasa real esperada con los elementos efectivamente insertados
+    tasa_estimada = (1 - math.exp(-num_hashes * total / num_bits)) ** num_hashes
+
+    encabezado = {
+        'magic': MAGIC,
+        'num_bits': num_bits,
+        'num_hashes': num_hashes,
+        'num_elementos': total,
+        'tasa_falsos_positivos': round(tasa_estimada, 6),
+        'tasa_objetivo': tasa_falsos_positivos,
+        'construido_en': int(time.time()),
+        'duracion_construccion_ms': int((time.monotonic() - inicio) * 1000),
+        'tamano_bytes': len(bits),
+    }
+    encabezado_bytes = json.dumps(encabezado).encode('utf-8')
+
+    ruta = str(ruta)
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    ruta_tmp = f"{ruta}.tmp-{os.getpid()}"
+    with open(ruta_tmp, 'wb') as archivo:
+        archivo.write(struct.pack('<I', len(encabezado_bytes)))
+        archivo.write(encabezado_bytes)
+        archivo.write(bits)
+    # Los workers que tengan el archivo anterior mapeado lo siguen leyendo
+    # hasta detectar el cambio de mtime.
+    os.replace(ruta_tmp, ruta)
+
+    return encabezado
+
+
+class IndiceAsociados:
+    """
+    Lector del filtro de Bloom mapeado en memoria.
+
+    El indice se recarga solo cuando cambia el archivo en disco y se
+    ignora si es mas antiguo que LINIX_INDICE_MAX_EDAD_HORAS (un indice
+    viejo no conoce a los asociados recientes).
+    """
+
+    def __init__(self, ruta):
+        self.ruta = str(ruta)
+        self._lock = threading.Lock()
+        # (mmap, encabezado, offset) se reemplaza como una unidad para que
+        # los lectores nunca vean un encabezado de un archivo y bits de otro
+        self._estado = None
+        self._mtime = None
+        self._ultima_revision = 0.0
+
+    def _cargar(self):
+        try:
+            mtime = os.stat(self.ruta).st_mtime
+        except FileNotFoundError:
+            self._cerrar()
+            return
+
+        if mtime == self._mtime:
+            return
+
+        with open(self.ruta, 'rb') as archivo:
+            datos = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        longitud, = struct.unpack('<I', datos[:4])
+        encabezado = json.loads(datos[4:4 + longitud].decode('utf-8'))
+        if encabezado.get('magic') != MAGIC:
+            datos.close()
+            logger.error("Indice de asociados con formato invalido: %s", self.ruta)
+            return
+
+        self._estado = (datos, encabezado, 4 + longitud)
+        self._mtime = mtime
+        logger.info(
+            "Indice de asociados cargado: %s elementos, %s bytes, fpr=%s",
+            encabezado['num_elementos'],
+            encabezado['tamano_bytes'],
+            encabezado['tasa_falsos_positivos']
+        )
+
+    def _cerrar(self):
+        # No se cierra el mmap explicitamente: un lector podria estar usandolo;
+        # se libera al perder la ultima referencia.
+        self._estado = None
+        self._mtime = None
+
+    def _revisar(self):
+        # Revisar el archivo en disco como maximo cada 30 segundos
+        ahora = time.monotonic()
+        if ahora - self._ultima_revision < 30 and self._estado is not None:
+            return
+        with self._lock:
+            self._ultima_revision = ahora
+            try:
+                self._cargar()
+            except (OSError, ValueError) as e:
+                logger.error(f"No se pudo cargar el indice de asociados: {e}")
+                self._cerrar()
+
+    @staticmethod
+    def _vigente(encabezado):
+        max_edad = float(getattr(settings, 'LINIX_INDICE_MAX_EDAD_HORAS', 36)) * 3600
+        return (time.time() - encabezado['construido_en']) <= max_edad
+
+    def _estado_vigente(self):
+        self._revisar()
+        estado = self._estado
+        if estado is None or not self._vigente(estado[1]):
+            return None
+        return estado
+
+    def disponible(self):
+        """
+        True si hay un indice cargado y no esta vencido.
+        """
+        return self._estado_vigente() is not None
+
+    def puede_contener(self, identificacion):
+        """
+        Consulta el filtro.
+
+        Returns:
+            bool|None: False = definitivamente no esta; True = puede estar;
+            None = indice no disponible (hay que consultar Oracle)
+        """
+        estado = self._estado_vigente()
+        if estado is None:
+            return None
+
+        datos, encabezado, offset = estado
+        for posicion in _posiciones(
+            identificacion,
+            encabezado['num_bits'],
+            encabezado['num_hashes']
+        ):
+            if not datos[offset + (posicion >> 3)] & (1 << (posicion & 7)):
+                return False
+        return True
+
+    def estadisticas(self):
+        """
+        Metadatos del indice: fecha de construccion, tamano y tasa de falsos positivos.
+        """
+        self._revisar()
+        estado = self._estado
+        if estado is None:
+            return {'cargado': False, 'ruta': self.ruta}
+        datos = dict(estado[1])
+        datos.pop('magic', None)
+        datos.update({
+            'cargado': True,
+            'vigente': self._vigente(estado[1]),
+            'ruta': self.ruta
+        })
+        return datos
+
+
+_indice = None
+_indice_lock = threading.Lock()
+
+
+def obtener_indice():
+    """
+    Indice compartido del proceso (None si no esta configurado).
+    """
+    global _indice
+
+    ruta = str(getattr(settings, 'LINIX_INDICE_ASOCIADOS_PATH', '') or '')
+    if not ruta:
+        return None
+    if _indice is None or _indice.ruta != ruta:
+        with _indice_lock:
+            if _indice is None or _indice.ruta != ruta:
+                _indice = IndiceAsociados(ruta)
+    return _indice
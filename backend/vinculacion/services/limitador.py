@@ -0,0 +1,273 @@
+# vinculacion/services/limitador.py
+
+"""
+LIMITADOR DE LLAMADAS SALIENTES (TOKEN BUCKET COMPARTIDO)
+=========================================================
+DECRIM cobra y limita por llamadas. El bucket vive en el cache de Django
+(Redis/Memcached/BD), asi todos los workers y nodos gastan el mismo
+presupuesto; cada actualizacion se hace bajo un lock corto
+(bloqueo_compartido). Con LocMemCache el limite seria por proceso.
+
+Cada presupuesto (p.ej. 'registro' y 'consulta' de DECRIM) tiene una
+tasa sostenida y una rafaga maxima. Si no hay token, la llamada espera su
+turno (los tokens pueden quedar en negativo: son reservas en cola) hasta
+`espera_max` segundos; si la espera seria mayor, se rechaza.
+
+Si el cache falla o su lock no se obtiene en 1 s, no hay forma de saber
+cuanto presupuesto queda: la llamada se rechaza, salvo que se pida lo
+contrario (permitir_sin_cache / DECRIM_LIMITE_PERMITIR_SIN_CACHE).
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .coordinacion import bloqueo_compartido, bloqueo_compartido_async
+from .metricas import registrar_exportador
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+
+class LimitadorTokens:
+    """
+    Token bucket compartido entre workers a traves del cache.
+    """
+
+    def __init__(self, nombre, por_minuto, rafaga, espera_max=0, permitir_sin_cache=False):
+        """
+        Args:
+            nombre (str): Presupuesto (clave en el cache y etiqueta de metricas)
+            por_minuto (float): Llamadas sostenidas por minuto (0 = sin limite)
+            rafaga (int): Tokens maximos acumulados
+            espera_max (float): Segundos que una llamada puede esperar turno (0 = rechazar)
+            permitir_sin_cache (bool): Dejar pasar la llamada si el cache no
+                responde (por defecto se rechaza)
+        """
+        self.nombre = nombre
+        self.tasa = float(por_minuto) / 60
+        self.capacidad = max(float(rafaga), 1.0)
+        self.espera_max = float(espera_max)
+        self.permitir_sin_cache = bool(permitir_sin_cache)
+        self._clave = f"limitador:{nombre}"
+        self._lock = threading.Lock()
+        self._contadores = {'permitidas': 0, 'en_cola': 0, 'rechazadas': 0, 'sin_cache': 0}
+        self._espera_total_s = 0.0
+        self._tokens_vistos = self.capacidad
+
+    @property
+    def activo(self):
+        return self.tasa > 0
+
+    def _tomar(self, estado, ahora, espera_max):
+        """
+        Calcula la reserva de un token sobre `estado` ({'tokens', 'ts'}).
+
+        Returns:
+            tuple: (nuevo_estado | None si se rechaza, segundos de espera)
+        """
+        if estado is None:
+            tokens = self.capacidad
+        else:
+            tokens = min(self.capacidad, estado['tokens'] + (ahora - estado['ts']) * self.tasa)
+
+        espera = max(0.0, (1 - tokens) / self.tasa)
+        if espera > espera_max:
+            return None, espera
+        return {'tokens': tokens - 1, 'ts': ahora}, espera
+
+    def _ttl(self):
+        # Suficiente para que el bucket se rellene por completo
+        return int(self.capacidad / self.tasa) + 60
+
+    def _contabilizar(self, resultado, tokens=None):
+        with self._lock:
+            if resultado['motivo'] == 'sin_cache':
+                self._contadores['sin_cache'] += 1
+            elif not resultado['permitido']:
+                self._contadores['rechazadas'] += 1
+            elif resultado['espera_s'] > 0:
+                self._contadores['en_cola'] += 1
+            if resultado['permitido']:
+                self._contadores['permitidas'] += 1
+                self._espera_total_s += resultado['espera_s']
+            if tokens is not None:
+                self._tokens_vistos = tokens
+
+    def _resultado(self, nuevo, espera, tokens_previos):
+        if nuevo is None:
+            logger.warning(
+                "Limite de llamadas %s alcanzado: rechazada (turno en %.1f s)",
+                self.nombre,
+                espera
+            )
+            resultado = {'permitido': False, 'espera_s': round(espera, 3), 'motivo': 'limite'}
+            self._contabilizar(resultado, tokens_previos)
+        else:
+            resultado = {'permitido': True, 'espera_s': round(espera, 3), 'motivo': None}
+            self._contabilizar(resultado, nuevo['tokens'])
+        return resultado
+
+    def _sin_cache(self, error=None):
+        # Sin cache no se sabe cuanto presupuesto queda: rechazar salvo permitir_sin_cache
+        logger.warning(
+            "Limitador %s sin cache (%s): llamada %s",
+            self.nombre,
+            error or 'lock ocupado',
+            'permitida' if self.permitir_sin_cache else 'rechazada'
+        )
+        resultado = {
+            'permitido': self.permitir_sin_cache,
+            'espera_s': 0.0 if self.permitir_sin_cache else 1.0,
+            'motivo': 'sin_cache'
+        }
+        self._contabilizar(resultado)
+        return resultado
+
+    def adquirir(self, espera_max=None):
+        """
+        Reserva un token; si hay cola, duerme hasta su turno.
+
+        Returns:
+            dict: {'permitido': bool, 'espera_s': float, 'motivo': None | 'limite' | 'sin_cache'}
+        """
+        if not self.activo:
+            return {'permitido': True, 'espera_s': 0.0, 'motivo': None}
+        espera_max = self.espera_max if espera_max is None else espera_max
+
+        try:
+            with bloqueo_compartido(self._clave, ttl=5, espera=1, intervalo=0.01) as obtenido:
+                if not obtenido:
+                    return self._sin_cache()
+                estado = cache.get(self._clave)
+                nuevo, espera = self._tomar(estado, time.time(), espera_max)
+                if nuevo is not None:
+                    cache.set(self._clave, nuevo, self._ttl())
+        except Exception as e:
+            return self._sin_cache(e)
+
+        resultado = self._resultado(nuevo, espera, estado['tokens'] if estado else None)
+        if resultado['permitido'] and espera > 0:
+            time.sleep(espera)
+        return resultado
+
+    async def adquirir_async(self, espera_max=None):
+        """
+        Version asyncio de adquirir() (espera con asyncio.sleep).
+        """
+        if not self.activo:
+            return {'permitido': True, 'espera_s': 0.0, 'motivo': None}
+        espera_max = self.espera_max if espera_max is None else espera_max
+
+        try:
+            async with bloqueo_compartido_async(self._clave, ttl=5, espera=1, intervalo=0.01) as obtenido:
+                if not obtenido:
+                    return self._sin_cache()
+                estado = await cache.aget(self._clave)
+                nuevo, espera = self._tomar(estado, time.time(), espera_max)
+                if nuevo is not None:
+                    await cache.aset(self._clave, nuevo, self._ttl())
+        except Exception as e:
+            return self._sin_cache(e)
+
+        resultado = self._resultado(nuevo, espera, estado['tokens'] if estado else None)
+        if resultado['permitido'] and espera > 0:
+            await asyncio.sleep(espera)
+        return resultado
+
+    def estadisticas(self):
+        """
+        Configuracion, contadores del proceso y saturacion del bucket.
+
+        saturacion = 1 - tokens/rafaga segun la ultima lectura del bucket
+        compartido (> 1 cuando hay llamadas en cola).
+        """
+        with self._lock:
+            contadores = dict(self._contadores)
+            espera_total_s = self._espera_total_s
+            tokens = self._tokens_vistos
+        return dict(
+            contadores,
+            nombre=self.nombre,
+            activo=self.activo,
+            por_minuto=round(self.tasa * 60, 2),
+            rafaga=self.capacidad,
+            espera_max_s=self.espera_max,
+            tokens=round(tokens, 2),
+            saturacion=round(1 - tokens / self.capacidad, 4),
+            espera_total_s=round(espera_total_s, 3),
+        )
+
+
+_limitadores = {}
+_limitadores_lock = threading.Lock()
+
+
+def obtener_limitador_decrim(presupuesto):
+    """
+    Limitador del presupuesto 'registro' o 'consulta' de DECRIM
+    (DECRIM_LIMITE_<PRESUPUESTO>_POR_MIN / _RAFAGA / _ESPERA_MAX).
+    """
+    limitador = _limitadores.get(presupuesto)
+    if limitador is not None:
+        return limitador
+
+    prefijo = f"DECRIM_LIMITE_{presupuesto.upper()}"
+    with _limitadores_lock:
+        limitador = _limitadores.get(presupuesto)
+        if limitador is None:
+            limitador = LimitadorTokens(
+                f"decrim_{presupuesto}",
+                por_minuto=float(getattr(settings, f"{prefijo}_POR_MIN", 0)),
+                rafaga=int(getattr(settings, f"{prefijo}_RAFAGA", 10)),
+                espera_max=float(getattr(settings, f"{prefijo}_ESPERA_MAX", 0)),
+                permitir_sin_cache=bool(getattr(settings, 'DECRIM_LIMITE_PERMITIR_SIN_CACHE', False))
+            )
+            _limitadores[presupuesto] = limitador
+    return limitador
+
+
+def estadisticas_limitadores():
+    """
+    Estadisticas de los limitadores usados por este proceso.
+    """
+    with _limitadores_lock:
+        limitadores = list(_limitadores.values())
+    return {limitador.nombre: limitador.estadisticas() for limitador in limitadores}
+
+
+def _exportar_prometheus():
+    datos = estadisticas_limitadores()
+    if not datos:
+        return []
+
+    lineas = [
+        '# HELP vinculacion_limitador_saturacion Fraccion del bucket consumida (>1 con llamadas en cola).',
+        '# TYPE vinculacion_limitador_saturacion gauge',
+    ]
+    for nombre, estado in sorted(datos.items()):
+        lineas.append(f'vinculacion_limitador_saturacion{{limitador="{nombre}"}} {estado["saturacion"]}')
+
+    lineas.append('# HELP vinculacion_limitador_llamadas_total Llamadas salientes por decision del limitador.')
+    lineas.append('# TYPE vinculacion_limitador_llamadas_total counter')
+    for nombre, estado in sorted(datos.items()):
+        for decision in ('permitidas', 'en_cola', 'rechazadas', 'sin_cache'):
+            lineas.append(
+                f'vinculacion_limitador_llamadas_total{{limitador="{nombre}",decision="{decision}"}} '
+                f'{estado[decision]}'
+            )
+
+    lineas.append('# HELP vinculacion_limitador_espera_segundos_total Tiempo esperando turno en el limitador.')
+    lineas.append('# TYPE vinculacion_limitador_espera_segundos_total counter')
+    for nombre, estado in sorted(datos.items()):
+        lineas.append(
+            f'vinculacion_limitador_espera_segundos_total{{limitador="{nombre}"}} {estado["espera_total_s"]}'
+        )
+    return lineas
+
+
+registrar_exportador(_exportar_prometheus)
@@ -0,0 +1,412 @@
+# vinculacion/services/linix_local.py
+
+"""
+SIMULADOR LOCAL DE LINIX (LINIX_BACKEND=local)
+==============================================
+Implementa las primitivas de SesionOracle (SP_CONSULTACTU, SP_FLUJOEXITOSO,
+GR_TERCERO) sobre un archivo SQLite, con latencias y tasas de error
+configurables, para hacer pruebas de carga de las vistas completas
+(Paso 1 y Paso 4) en un portatil o en CI, sin la base de produccion.
+
+Los errores simulados son oracledb.DatabaseError con los mismos codigos
+que Oracle (DPY-4024, DPY-4005, ORA-03113, ORA-20050), de modo que el
+circuit breaker, las metricas y el manejo de errores de LinixService
+se comportan igual que contra Oracle.
+
+Datos de prueba:
+    python manage.py poblar_linix_local --cantidad 100000
+"""
+
+import asyncio
+import logging
+import math
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+
+import oracledb
+from django.conf import settings
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+ESQUEMA = """
+    CREATE TABLE IF NOT EXISTS gr_tercero (
+        n_identificacion TEXT PRIMARY KEY,
+        id_tercero TEXT NOT NULL,
+        primer_nombre TEXT,
+        segundo_nombre TEXT,
+        primer_apellido TEXT,
+        segundo_apellido TEXT,
+        estado TEXT,
+        fecha_expedicion TEXT,
+        flujo TEXT NOT NULL DEFAULT 'PDTE'
+    )
+"""
+
+COLUMNAS_TERCERO = (
+    'ID_TERCERO',
+    'N_IDENTIFICACION',
+    'PRIMER_NOMBRE',
+    'SEGUNDO_NOMBRE',
+    'PRIMER_APELLIDO',
+    'SEGUNDO_APELLIDO',
+    'ESTADO',
+)
+
+SQL_TERCERO = """
+    SELECT id_tercero, n_identificacion, primer_nombre, segundo_nombre,
+           primer_apellido, segundo_apellido, estado
+    FROM gr_tercero
+"""
+
+SQL_TERCERO_FLUJO = """
+    SELECT flujo, id_tercero, primer_nombre, segundo_nombre,
+           primer_apellido, segundo_apellido, estado
+    FROM gr_tercero
+"""
+
+COLUMNAS_TERCERO_FLUJO = (
+    'ID_TERCERO',
+    'PRIMER_NOMBRE',
+    'SEGUNDO_NOMBRE',
+    'PRIMER_APELLIDO',
+    'SEGUNDO_APELLIDO',
+    'ESTADO',
+)
+
+# Perfil de latencia por procedimiento: mediana y p99 en milisegundos
+PERFIL_LATENCIA_DEFECTO = 'SP_CONSULTACTU=40:250,SP_FLUJOEXITOSO=60:400,GR_TERCERO=5:40'
+
+
+class _ErrorSimulado:
+    """
+    Imita oracledb._Error (code, full_code, message) para los manejadores existentes.
+    """
+
+    def __init__(self, full_code, mensaje):
+        self.full_code = full_code
+        self.code = int(full_code.split('-')[1])
+        self.message = f"{full_code}: {mensaje}"
+
+    def __str__(self):
+        return self.message
+
+
+class ErrorLinixLocal(oracledb.DatabaseError):
+    """
+    Error simulado por el backend local.
+    """
+
+    def __init__(self, full_code, mensaje):
+        super().__init__(_ErrorSimulado(full_code, mensaje))
+
+
+def _parsear_perfil(texto):
+    """
+    'SP=mediana:p99,...' -> {SP: (mu, sigma)} de una distribucion lognormal.
+    """
+    perfil = {}
+    for parte in str(texto or '').split(','):
+        if '=' not in parte:
+            continue
+        nombre, valores = parte.split('=', 1)
+        mediana, _, p99 = valores.partition(':')
+        mediana = max(float(mediana), 0.01)
+        p99 = max(float(p99 or mediana), mediana)
+        # z(0.99) = 2.326
+        perfil[nombre.strip().upper()] = (math.log(mediana), (math.log(p99) - math.log(mediana)) / 2.326)
+    return perfil
+
+
+def conectar_sqlite(ruta):
+    """
+    Abre (y crea si hace falta) la base SQLite del simulador.
+    """
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    conexion = sqlite3.connect(ruta, timeout=30, check_same_thread=False)
+    conexion.execute('PRAGMA journal_mode=WAL')
+    conexion.execute(ESQUEMA)
+    conexion.commit()
+    return conexion
+
+
+class SesionLinixLocal:
+    """
+    Sesion del simulador: mismas primitivas que SesionOracle.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.call_timeout = 0
+
+    def close(self):
+        self.backend._liberar()
+
+    # ---- simulacion de latencia y errores ----
+
+    def _plan(self, procedimiento):
+        """
+        Decide la latencia (segundos) y el error simulado de una llamada.
+        """
+        latencia_ms = self.backend.latencia_ms(procedimiento)
+        error = None
+        azar = random.random()
+        if azar < self.backend.tasa_error:
+            error = ErrorLinixLocal('ORA-03113', 'end-of-file on communication channel (simulado)')
+        elif azar < self.backend.tasa_error + self.backend.tasa_timeout:
+            # Llamada colgada: solo termina por call_timeout
+            latencia_ms = float('inf')
+
+        if self.call_timeout and latencia_ms > self.call_timeout:
+            return self.call_timeout / 1000, ErrorLinixLocal(
+                'DPY-4024',
+                f'call timeout of {self.call_timeout} ms exceeded (simulado)'
+            )
+        if math.isinf(latencia_ms):
+            latencia_ms = 30000
+        return latencia_ms / 1000, error
+
+    def _simular(self, procedimiento):
+        espera, error = self._plan(procedimiento)
+        time.sleep(espera)
+        if error is not None:
+            raise error
+
+    # ---- primitivas ----
+
+    def consultar_actu(self, numero_cedula, fecha_expedicion):
+        self._simular('SP_CONSULTACTU')
+        return self.backend.fila_actu(numero_cedula, fecha_expedicion)
+
+    def flujo_exitoso(self, numero_cedula):
+        self._simular('SP_FLUJOEXITOSO')
+        return self.backend.respuesta_flujo(numero_cedula)
+
+    def flujos_exitosos(self, cedulas):
+        self._simular('SP_FLUJOEXITOSO')
+        return [self.backend.respuesta_flujo(cedula) for cedula in cedulas]
+
+    def tercero(self, numero_cedula):
+        self._simular('GR_TERCERO')
+        filas = self.backend.terceros([numero_cedula])
+        return filas[0] if filas else None
+
+    def terceros(self, cedulas):
+        self._simular('GR_TERCERO')
+        return self.backend.terceros(cedulas)
+
+    def contar_terceros(self):
+        return self.backend.contar_terceros()
+
+    def identificaciones_terceros(self, tamano_lote):
+        yield from self.backend.identificaciones_terceros(tamano_lote)
+
+    def ping(self):
+        self.backend.contar_terceros()
+
+    def sesiones_por_nodo(self):
+        with self.backend._lock:
+            ocupadas = self.backend._ocupadas
+        return [{
+            'MACHINE': socket.gethostname(),
+            'SERVER': 'LOCAL',
+            'STATUS': 'ACTIVE',
+            'SESIONES': ocupadas,
+        }]
+
+
+class SesionLinixLocalAsync(SesionLinixLocal):
+    """
+    Version asyncio: la latencia simulada no bloquea el event loop.
+    """
+
+    async def close(self):
+        self.backend._liberar()
+
+    async def _simular_async(self, procedimiento):
+        espera, error = self._plan(procedimiento)
+        await asyncio.sleep(espera)
+        if error is not None:
+            raise error
+
+    async def consultar_actu(self, numero_cedula, fecha_expedicion):
+        await self._simular_async('SP_CONSULTACTU')
+        return self.backend.fila_actu(numero_cedula, fecha_expedicion)
+
+    async def flujo_exitoso(self, numero_cedula):
+        await self._simular_async('SP_FLUJOEXITOSO')
+        return self.backend.respuesta_flujo(numero_cedula)
+
+    async def tercero(self, numero_cedula):
+        await self._simular_async('GR_TERCERO')
+        filas = self.backend.terceros([numero_cedula])
+        return filas[0] if filas else None
+
+
+class BackendLinixLocal:
+    """
+    Backend local: datos en SQLite y un "pool" de ORACLE_POOL_MAX sesiones
+    para reproducir la contencion de un worker real.
+    """
+
+    nombre = 'local'
+
+    def __init__(self, ruta):
+        self.ruta = str(ruta)
+        self.perfil = _parsear_perfil(
+            getattr(settings, 'LINIX_LOCAL_LATENCIA_MS', PERFIL_LATENCIA_DEFECTO)
+        )
+        self.tasa_error = float(getattr(settings, 'LINIX_LOCAL_TASA_ERROR', 0.0))
+        self.tasa_timeout = float(getattr(settings, 'LINIX_LOCAL_TASA_TIMEOUT', 0.0))
+        self.max_sesiones = int(getattr(settings, 'ORACLE_POOL_MAX', 4))
+        self.wait_timeout_ms = int(getattr(settings, 'ORACLE_POOL_WAIT_TIMEOUT_MS', 5000))
+        self._semaforo = threading.BoundedSemaphore(self.max_sesiones)
+        self._lock = threading.Lock()
+        self._ocupadas = 0
+        self._local = threading.local()
+
+    # ---- "pool" ----
+
+    def _ocupar(self):
+        with self._lock:
+            self._ocupadas += 1
+
+    def _liberar(self):
+        with self._lock:
+            self._ocupadas -= 1
+        self._semaforo.release()
+
+    def _error_pool(self):
+        return ErrorLinixLocal(
+            'DPY-4005',
+            'timed out waiting for the connection pool to return a connection (simulado)'
+        )
+
+    def adquirir(self):
+        if not self._semaforo.acquire(timeout=self.wait_timeout_ms / 1000):
+            raise self._error_pool()
+        self._ocupar()
+        return SesionLinixLocal(self)
+
+    async def adquirir_async(self):
+        # Espera no bloqueante por un cupo del mismo semaforo
+        limite = time.monotonic() + self.wait_timeout_ms / 1000
+        while not self._semaforo.acquire(blocking=False):
+            if time.monotonic() >= limite:
+                raise self._error_pool()
+            await asyncio.sleep(0.005)
+        self._ocupar()
+        return SesionLinixLocalAsync(self)
+
+    def estadisticas(self):
+        from .linix_services import estadisticas_pool
+
+        datos = estadisticas_pool()
+        with self._lock:
+            ocupadas = self._ocupadas
+        datos.update({
+            'creado': True,
+            'max': self.max_sesiones,
+            'ocupadas': ocupadas,
+            'libres': self.max_sesiones - ocupadas,
+            'wait_timeout_ms': self.wait_timeout_ms,
+            'ruta': self.ruta,
+            'tasa_error': self.tasa_error,
+            'tasa_timeout': self.tasa_timeout,
+        })
+        return datos
+
+    # ---- datos ----
+
+    def _db(self):
+        # Una conexion SQLite por hilo
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = conectar_sqlite(self.ruta)
+            self._local.conexion = conexion
+        return conexion
+
+    def latencia_ms(self, procedimiento):
+        parametros = self.perfil.get(procedimiento)
+        if parametros is None:
+            return 0.0
+        mu, sigma = parametros
+        return random.lognormvariate(mu, sigma)
+
+    def fila_actu(self, numero_cedula, fecha_expedicion):
+        fila = self._db().execute(
+            'SELECT id_tercero, fecha_expedicion FROM gr_tercero WHERE n_identificacion = ?',
+            (str(numero_cedula).strip(),)
+        ).fetchone()
+        if fila is None:
+            raise ErrorLinixLocal('ORA-20050', 'No existe el asociado (simulado)')
+        id_tercero, fecha = fila
+        if fecha and fecha != str(fecha_expedicion).strip():
+            return ('Error', 'Fecha de expedicion no coincide')
+        return (id_tercero, str(numero_cedula).strip())
+
+    def respuesta_flujo(self, numero_cedula):
+        """
+        (estado, error, tercero) como SesionOracle.flujos_exitosos().
+        """
+        cedula = str(numero_cedula).strip()
+        fila = self._db().execute(
+            f'{SQL_TERCERO_FLUJO} WHERE n_identificacion = ?',
+            (cedula,)
+        ).fetchone()
+        if fila is None:
+            return ('PDTE', None, None)
+        estado = fila[0]
+        tercero = None
+        if estado == 'OK':
+            tercero = dict(zip(COLUMNAS_TERCERO_FLUJO, fila[1:]))
+            tercero['N_IDENTIFICACION'] = cedula
+        return (estado, None, tercero)
+
+    def terceros(self, cedulas):
+        cedulas = [str(cedula).strip() for cedula in cedulas]
+        marcadores = ','.join('?' * len(cedulas))
+        filas = self._db().execute(
+            f'{SQL_TERCERO} WHERE n_identificacion IN ({marcadores})',
+            cedulas
+        ).fetchall()
+        return [dict(zip(COLUMNAS_TERCERO, fila)) for fila in filas]
+
+    def contar_terceros(self):
+        total, = self._db().execute('SELECT COUNT(*) FROM gr_tercero').fetchone()
+        return int(total)
+
+    def identificaciones_terceros(self, tamano_lote):
+        cursor = self._db().execute('SELECT n_identificacion FROM gr_tercero')
+        while True:
+            filas = cursor.fetchmany(tamano_lote)
+            if not filas:
+                break
+            for fila in filas:
+                yield str(fila[0]).strip()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def obtener_backend_local():
+    """
+    Backend local compartido del proceso.
+    """
+    global _backend
+
+    ruta = str(
+        getattr(settings, 'LINIX_LOCAL_DB_PATH', '')
+        or os.path.join(settings.BASE_DIR, 'var', 'linix_local.sqlite3')
+    )
+    if _backend is None or _backend.ruta != ruta:
+        with _backend_lock:
+            if _backend is None or _backend.ruta != ruta:
+                logger.warning("LINIX_BACKEND=local: usando el simulador de LINIX en %s", ruta)
+                _backend = BackendLinixLocal(ruta)
+    return _backend
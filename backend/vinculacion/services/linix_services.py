@@ -7,15 +7,801 @@ Maneja la conexion con la base de datos Oracle
 y la ejecucion de procedimientos almacenados.
 """
 
+import asyncio
+import functools
 import oracledb
 import logging
+import os
+import socket
+import threading
+import time
 from django.conf import settings
-from contextlib import contextmanager
+from django.core.cache import cache
+from contextlib import asynccontextmanager, contextmanager
+
+from .circuit_breaker import CircuitBreaker, CircuitoAbiertoError
+from .indice_asociados import obtener_indice
+from .metricas import estadisticas_latencia, registrar_latencia
 
 # Configurar logger
 logger = logging.getLogger(__name__)
 
 
+# ============================================
+# POOL DE SESIONES ORACLE (por proceso)
+# ============================================
+# Cada worker de gunicorn mantiene su propio pool. El pool se crea
+# perezosamente en el primer uso y se recrea si el proceso fue
+# bifurcado (fork) despues de crearlo, porque las sesiones no se
+# pueden compartir entre procesos.
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_estadisticas_lock = threading.Lock()
+_estadisticas_pool = {
+    'adquisiciones': 0,
+    'errores_adquisicion': 0,
+    'espera_total_ms': 0.0,
+    'espera_max_ms': 0.0,
+}
+
+
+PURITIES = {
+    'default': oracledb.PURITY_DEFAULT,
+    'new': oracledb.PURITY_NEW,
+    'self': oracledb.PURITY_SELF,
+}
+
+
+def _parametros_drcp():
+    """
+    Parametros de Database Resident Connection Pooling (ORACLE_DRCP).
+
+    Con DRCP cada sesion del pool local es solo una conexion al broker;
+    el proceso servidor se toma del pool del servidor durante cada llamada,
+    asi que muchos nodos/workers comparten pocas sesiones reales.
+    """
+    if not getattr(settings, 'ORACLE_DRCP', False):
+        return {}
+    purity = str(getattr(settings, 'ORACLE_PURITY', 'self')).lower()
+    return {
+        'server_type': 'pooled',
+        # Las sesiones solo se reutilizan dentro de la misma clase
+        'cclass': getattr(settings, 'ORACLE_CCLASS', 'VINCULACION') or None,
+        'purity': PURITIES.get(purity, oracledb.PURITY_SELF),
+    }
+
+
+def _parametros_pool():
+    """
+    Parametros comunes del pool (sincrono y asyncio) definidos en settings.py.
+    """
+    parametros = {
+        'user': getattr(settings, 'ORACLE_USER', ''),
+        'password': getattr(settings, 'ORACLE_PASSWORD', ''),
+        'dsn': getattr(settings, 'ORACLE_DSN', ''),
+        'min': int(getattr(settings, 'ORACLE_POOL_MIN', 1)),
+        'max': int(getattr(settings, 'ORACLE_POOL_MAX', 4)),
+        'increment': int(getattr(settings, 'ORACLE_POOL_INCREMENT', 1)),
+        # Segundos de inactividad tras los cuales se hace ping al adquirir
+        # (0 = ping en cada adquisicion, negativo = nunca)
+        'ping_interval': int(getattr(settings, 'ORACLE_POOL_PING_INTERVAL', 60)),
+        # Segundos que una sesion ociosa permanece abierta por encima de `min`
+        'timeout': int(getattr(settings, 'ORACLE_POOL_SESSION_TIMEOUT', 300)),
+        # Vida maxima de una sesion (0 = sin limite)
+        'max_lifetime_session': int(getattr(settings, 'ORACLE_POOL_MAX_LIFETIME', 0)),
+        'getmode': oracledb.POOL_GETMODE_TIMEDWAIT,
+        # Milisegundos que se espera por una sesion libre cuando el pool esta lleno
+        'wait_timeout': int(getattr(settings, 'ORACLE_POOL_WAIT_TIMEOUT_MS', 5000)),
+        # Sentencias preparadas reutilizadas por sesion (evita re-parsear en Oracle)
+        'stmtcachesize': int(getattr(settings, 'ORACLE_STMT_CACHE_SIZE', 40)),
+        # Segundos maximos para abrir el socket con el listener (falla rapido si cae)
+        'tcp_connect_timeout': float(getattr(settings, 'ORACLE_CONNECT_TIMEOUT', 5)),
+    }
+    parametros.update(_parametros_drcp())
+    return parametros
+
+
+def _crear_pool():
+    """
+    Crea el pool de sesiones con los parametros definidos en settings.py.
+    """
+    parametros = _parametros_pool()
+    logger.info(
+        "Creando pool Oracle (pid=%s, min=%s, max=%s, increment=%s, drcp=%s)",
+        os.getpid(),
+        parametros['min'],
+        parametros['max'],
+        parametros['increment'],
+        parametros.get('cclass') if 'server_type' in parametros else 'no'
+    )
+    return oracledb.create_pool(**parametros)
+
+
+def obtener_pool():
+    """
+    Retorna el pool de sesiones del proceso actual, creandolo si no existe.
+
+    Returns:
+        oracledb.ConnectionPool: Pool de sesiones Oracle
+    """
+    global _pool, _pool_pid
+
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            _pool = _crear_pool()
+            _pool_pid = pid
+    return _pool
+
+
+def cerrar_pool():
+    """
+    Cierra el pool del proceso actual (util en pruebas o al apagar el worker).
+    """
+    global _pool, _pool_pid
+
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            try:
+                _pool.close(force=True)
+            except oracledb.Error as e:
+                logger.warning(f"Error cerrando pool Oracle: {e}")
+        _pool = None
+        _pool_pid = None
+
+
+# Codigos de error que indican que se agoto el tiempo (no un error de negocio):
+# DPY-4024 call_timeout excedido, DPY-4005 sin sesion libre en el pool,
+# ORA-03156 call_timeout excedido en modo thick.
+CODIGOS_TIMEOUT = {'DPY-4024', 'DPY-4005', 'ORA-03156'}
+
+
+def es_timeout(error):
+    """
+    Indica si un oracledb._Error corresponde a un tiempo agotado.
+    """
+    return getattr(error, 'full_code', None) in CODIGOS_TIMEOUT
+
+
+# Errores de conectividad/disponibilidad de la base (cuentan para el circuit
+# breaker). Los errores de negocio, p.ej. ORA-20050, no abren el circuito.
+CODIGOS_CONECTIVIDAD = {
+    'ORA-01033', 'ORA-01034', 'ORA-01089', 'ORA-03113', 'ORA-03114',
+    'ORA-03135', 'ORA-03156', 'ORA-12170', 'ORA-12514', 'ORA-12528',
+    'ORA-12537', 'ORA-12541', 'ORA-12543', 'ORA-12545',
+}
+
+
+def es_fallo_infraestructura(error):
+    """
+    Indica si un oracledb._Error significa que Oracle no esta disponible
+    (red, listener, timeouts, pool agotado), no un error de negocio.
+    """
+    codigo = getattr(error, 'full_code', '') or ''
+    return codigo.startswith(('DPY-4', 'DPY-6')) or codigo in CODIGOS_CONECTIVIDAD
+
+
+def desenlace_error(error):
+    """
+    Clasifica un oracledb._Error para las metricas de latencia.
+    
+    Returns:
+        str: timeout, no_disponible, error_negocio (raise_application_error,
+        ORA-20000 a ORA-20999, p.ej. ORA-20050) o error_oracle
+    """
+    codigo = getattr(error, 'full_code', '') or ''
+    if es_timeout(error):
+        return 'timeout'
+    if es_fallo_infraestructura(error):
+        return 'no_disponible'
+    if codigo.startswith('ORA-20') and len(codigo) == 9:
+        return 'error_negocio'
+    return 'error_oracle'
+
+
+def _call_timeout_ms(call_timeout_ms):
+    # None = tiempo por defecto de settings; 0 = sin limite
+    if call_timeout_ms is None:
+        return int(getattr(settings, 'ORACLE_CALL_TIMEOUT_MS', 10000))
+    return int(call_timeout_ms)
+
+
+def medir_tiempo(metodo):
+    """
+    Decorador que agrega 'tiempo_respuesta_ms' al dict que retorna el metodo
+    (sincrono o asyncio), como hace BiometriaService.
+    """
+    if asyncio.iscoroutinefunction(metodo):
+        @functools.wraps(metodo)
+        async def envoltura_async(*args, **kwargs):
+            inicio = time.monotonic()
+            resultado = await metodo(*args, **kwargs)
+            resultado['tiempo_respuesta_ms'] = int((time.monotonic() - inicio) * 1000)
+            return resultado
+        return envoltura_async
+
+    @functools.wraps(metodo)
+    def envoltura(*args, **kwargs):
+        inicio = time.monotonic()
+        resultado = metodo(*args, **kwargs)
+        resultado['tiempo_respuesta_ms'] = int((time.monotonic() - inicio) * 1000)
+        return resultado
+    return envoltura
+
+
+_circuit_breaker = None
+_circuit_breaker_lock = threading.Lock()
+
+
+def obtener_circuit_breaker():
+    """
+    Circuit breaker de Oracle del proceso actual.
+    """
+    global _circuit_breaker
+
+    if _circuit_breaker is None:
+        with _circuit_breaker_lock:
+            if _circuit_breaker is None:
+                _circuit_breaker = CircuitBreaker(
+                    'Oracle LINIX',
+                    umbral_fallos=int(getattr(settings, 'LINIX_CIRCUIT_UMBRAL_FALLOS', 5)),
+                    intervalo_prueba=float(getattr(settings, 'LINIX_CIRCUIT_INTERVALO_PRUEBA', 30)),
+                    max_pruebas=int(getattr(settings, 'LINIX_CIRCUIT_MAX_PRUEBAS', 1)),
+                )
+    return _circuit_breaker
+
+
+# Pool asyncio: esta ligado al event loop donde se crea (uno por loop).
+# Solo bajo ASGI (core/asgi.py), donde cada worker tiene un loop de larga
+# vida. Bajo WSGI, async_to_sync crea y cierra un loop por peticion: un
+# pool por loop dejaria sesiones abiertas en Oracle en cada peticion.
+_pool_async = None
+_pool_async_loop = None
+
+
+def _parametros_conexion_async():
+    """
+    Parametros de una conexion asyncio suelta (sin pool).
+    """
+    parametros = _parametros_pool()
+    conexion = {
+        clave: parametros[clave]
+        for clave in ('user', 'password', 'dsn', 'stmtcachesize', 'tcp_connect_timeout')
+    }
+    conexion.update(_parametros_drcp())
+    return conexion
+
+
+def _cerrar_pool_async_anterior(pool, loop):
+    """
+    Cierra el pool asyncio de un event loop que ya no se usa.
+
+    El cierre debe correr en el loop del pool: si sigue vivo se programa
+    alli; si ya se cerro, sus sesiones no se pueden liberar desde otro loop.
+    """
+    try:
+        if loop.is_closed():
+            logger.error(
+                "Pool Oracle asyncio de un event loop cerrado (pid=%s): sus sesiones "
+                "quedan abiertas hasta que Oracle las detecte caidas",
+                os.getpid()
+            )
+            return
+        cierre = pool.close(force=True)
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(cierre, loop)
+        else:
+            threading.Thread(
+                target=loop.run_until_complete,
+                args=(cierre,),
+                name='cierre-pool-oracle',
+                daemon=True
+            ).start()
+    except Exception as e:
+        logger.warning(f"Error cerrando pool Oracle asyncio anterior: {e}")
+
+
+def obtener_pool_async():
+    """
+    Retorna el pool asyncio del event loop actual, creandolo si no existe.
+
+    Debe llamarse desde una corrutina. Fuera de ASGI (SERVIDOR_ASGI=False)
+    retorna None: cada llamada usa su propia conexion (ver adquirir_async).
+
+    Returns:
+        oracledb.AsyncConnectionPool | None: Pool asyncio de sesiones Oracle
+    """
+    global _pool_async, _pool_async_loop
+
+    if not getattr(settings, 'SERVIDOR_ASGI', False):
+        return None
+
+    loop = asyncio.get_running_loop()
+    if _pool_async is None or _pool_async_loop is not loop:
+        if _pool_async is not None:
+            _cerrar_pool_async_anterior(_pool_async, _pool_async_loop)
+        parametros = _parametros_pool()
+        logger.info(
+            "Creando pool Oracle asyncio (pid=%s, min=%s, max=%s)",
+            os.getpid(),
+            parametros['min'],
+            parametros['max']
+        )
+        _pool_async = oracledb.create_pool_async(**parametros)
+        _pool_async_loop = loop
+    return _pool_async
+
+
+async def cerrar_pool_async():
+    """
+    Cierra el pool asyncio del event loop actual (apagado del worker ASGI).
+    """
+    global _pool_async, _pool_async_loop
+
+    if _pool_async is not None and _pool_async_loop is asyncio.get_running_loop():
+        try:
+            await _pool_async.close(force=True)
+        except oracledb.Error as e:
+            logger.warning(f"Error cerrando pool Oracle asyncio: {e}")
+        _pool_async = None
+        _pool_async_loop = None
+
+
+@functools.lru_cache(maxsize=32)
+def _rowfactory_dict(columnas):
+    """
+    Rowfactory que convierte cada fila en dict, compilada una vez por
+    conjunto de columnas y reutilizada en todas las consultas.
+    """
+    def fabrica(*valores):
+        return dict(zip(columnas, valores))
+    return fabrica
+
+
+def _aplicar_rowfactory_dict(cursor):
+    cursor.rowfactory = _rowfactory_dict(tuple(col[0] for col in cursor.description))
+
+
+def _registrar_adquisicion(espera_ms, exitosa):
+    with _estadisticas_lock:
+        if exitosa:
+            _estadisticas_pool['adquisiciones'] += 1
+        else:
+            _estadisticas_pool['errores_adquisicion'] += 1
+        _estadisticas_pool['espera_total_ms'] += espera_ms
+        if espera_ms > _estadisticas_pool['espera_max_ms']:
+            _estadisticas_pool['espera_max_ms'] = espera_ms
+
+
+def estadisticas_pool():
+    """
+    Estadisticas del pool del proceso actual.
+
+    Sirve para dimensionar ORACLE_POOL_MAX frente al numero de workers
+    de gunicorn: sesiones totales = nodos x workers x ORACLE_POOL_MAX
+    (con DRCP esas son conexiones al broker; los procesos servidor los
+    limita el pool DRCP de la base).
+
+    Returns:
+        dict: Configuracion, sesiones abiertas/ocupadas y tiempos de espera
+    """
+    with _estadisticas_lock:
+        contadores = dict(_estadisticas_pool)
+
+    intentos = contadores['adquisiciones'] + contadores['errores_adquisicion']
+    drcp = _parametros_drcp()
+    datos = {
+        'nodo': socket.gethostname(),
+        'pid': os.getpid(),
+        'drcp': bool(drcp),
+        'cclass': drcp.get('cclass'),
+        'purity': str(getattr(settings, 'ORACLE_PURITY', 'self')).lower() if drcp else None,
+        'creado': False,
+        'adquisiciones': contadores['adquisiciones'],
+        'errores_adquisicion': contadores['errores_adquisicion'],
+        'espera_promedio_ms': (
+            round(contadores['espera_total_ms'] / intentos, 2) if intentos else 0.0
+        ),
+        'espera_max_ms': round(contadores['espera_max_ms'], 2),
+    }
+
+    pool = _pool if _pool_pid == os.getpid() else None
+    if pool is not None:
+        datos.update({
+            'creado': True,
+            'min': pool.min,
+            'max': pool.max,
+            'increment': pool.increment,
+            'abiertas': pool.opened,
+            'ocupadas': pool.busy,
+            'libres': pool.opened - pool.busy,
+            'ping_interval': pool.ping_interval,
+            'session_timeout': pool.timeout,
+            'wait_timeout_ms': int(getattr(settings, 'ORACLE_POOL_WAIT_TIMEOUT_MS', 5000)),
+        })
+    return datos
+
+
+# ============================================
+# SESIONES: PRIMITIVAS DE LINIX
+# ============================================
+# LinixService no usa cursores directamente: habla con una "sesion" que
+# implementa las primitivas de LINIX. SesionOracle las ejecuta en Oracle;
+# el backend local (linix_local.py) las implementa sobre SQLite para
+# pruebas de carga sin la base de produccion.
+
+
+class SesionOracle:
+    """
+    Primitivas de LINIX sobre una sesion oracledb tomada del pool.
+    """
+
+    # Bloque anonimo que ejecuta SP_FLUJOEXITOSO y, si el flujo esta OK, lee
+    # el tercero de GR_TERCERO en la misma llamada. Se usa con executemany
+    # (un solo round trip para todo el lote). Los errores de una cedula se
+    # capturan en su propio OUT bind para no abortar el lote completo; si
+    # falla solo la lectura del tercero, el estado del flujo se conserva.
+    # Los binds posicionales se asocian en orden de aparicion:
+    #   :1 cedula  :2 estado
+    #   :3..:8 ID_TERCERO, PRIMER_NOMBRE, SEGUNDO_NOMBRE, PRIMER_APELLIDO,
+    #          SEGUNDO_APELLIDO, ESTADO
+    #   :9 error al leer el tercero  :10 error del SP
+    # La lectura del tercero usa la misma tabla y columnas que SQL_TERCERO.
+    SQL_FLUJOEXITOSO_LOTE = """
+        DECLARE
+            v_cedula VARCHAR2(50) := :1;
+            v_estado VARCHAR2(100);
+        BEGIN
+            SP_FLUJOEXITOSO(v_cedula, v_estado);
+            :2 := v_estado;
+            IF UPPER(TRIM(v_estado)) = 'OK' THEN
+                BEGIN
+                    SELECT TO_CHAR(ID_TERCERO), PRIMER_NOMBRE, SEGUNDO_NOMBRE,
+                           PRIMER_APELLIDO, SEGUNDO_APELLIDO, ESTADO
+                      INTO :3, :4, :5, :6, :7, :8
+                      FROM GR_TERCERO
+                     WHERE N_IDENTIFICACION = v_cedula
+                       AND ROWNUM = 1;
+                EXCEPTION
+                    WHEN NO_DATA_FOUND THEN
+                        NULL;
+                    WHEN OTHERS THEN
+                        :9 := SUBSTR(SQLERRM, 1, 4000);
+                END;
+            END IF;
+        EXCEPTION
+            WHEN OTHERS THEN
+                :10 := SUBSTR(SQLERRM, 1, 4000);
+        END;
+    """
+
+    # Columnas de GR_TERCERO que devuelve SQL_FLUJOEXITOSO_LOTE (binds :3..:8)
+    COLUMNAS_TERCERO_FLUJO = (
+        'ID_TERCERO',
+        'PRIMER_NOMBRE',
+        'SEGUNDO_NOMBRE',
+        'PRIMER_APELLIDO',
+        'SEGUNDO_APELLIDO',
+        'ESTADO',
+    )
+
+    # TODO: Ajustar nombre de tabla y columnas segun tu esquema
+    SQL_TERCERO = """
+        SELECT 
+            ID_TERCERO,
+            N_IDENTIFICACION,
+            PRIMER_NOMBRE,
+            SEGUNDO_NOMBRE,
+            PRIMER_APELLIDO,
+            SEGUNDO_APELLIDO,
+            ESTADO
+        FROM GR_TERCERO
+        WHERE N_IDENTIFICACION = :cedula
+        AND ROWNUM = 1
+    """
+
+    # Misma consulta para un arreglo de cedulas (bind de coleccion, un solo round trip)
+    SQL_TERCEROS_LOTE = """
+        SELECT 
+            ID_TERCERO,
+            N_IDENTIFICACION,
+            PRIMER_NOMBRE,
+            SEGUNDO_NOMBRE,
+            PRIMER_APELLIDO,
+            SEGUNDO_APELLIDO,
+            ESTADO
+        FROM GR_TERCERO
+        WHERE N_IDENTIFICACION IN (
+            SELECT COLUMN_VALUE FROM TABLE(:cedulas)
+        )
+    """
+
+    # Sesiones por nodo del lado del servidor. Con DRCP, SERVER = 'POOLED'
+    # son las sesiones que se estan atendiendo con un proceso del pool DRCP.
+    SQL_SESIONES_POR_NODO = """
+        SELECT MACHINE, SERVER, STATUS, COUNT(*) AS SESIONES
+        FROM V$SESSION
+        WHERE USERNAME = USER
+        GROUP BY MACHINE, SERVER, STATUS
+        ORDER BY MACHINE, SERVER, STATUS
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @property
+    def call_timeout(self):
+        return self.connection.call_timeout
+
+    @call_timeout.setter
+    def call_timeout(self, valor):
+        self.connection.call_timeout = valor
+
+    def close(self):
+        self.connection.close()
+
+    @staticmethod
+    def _preparar_consulta_unica(cursor):
+        # Una fila esperada: prefetch de 2 para detectar el fin de filas
+        # en el mismo round trip del execute
+        cursor.prefetchrows = 2
+        cursor.arraysize = 1
+
+    def consultar_actu(self, numero_cedula, fecha_expedicion):
+        """
+        SP_CONSULTACTU: primera fila del REF CURSOR (None si no hay filas).
+        """
+        cursor = self.connection.cursor()
+        # REF CURSOR con prefetch: la fila llega junto con la ejecucion
+        # del procedimiento, sin un round trip extra para el fetch
+        result_cursor = self.connection.cursor()
+        result_cursor.prefetchrows = 2
+        result_cursor.arraysize = 1
+
+        cursor.callproc('SP_CONSULTACTU', [numero_cedula, fecha_expedicion, result_cursor])
+
+        row = result_cursor.fetchone()
+        result_cursor.close()
+        cursor.close()
+        return row
+
+    @classmethod
+    def _binds_flujos(cls, cursor, cantidad):
+        """
+        OUT binds de SQL_FLUJOEXITOSO_LOTE dimensionados para `cantidad` cedulas.
+        """
+        out_estado = cursor.var(oracledb.DB_TYPE_VARCHAR, arraysize=cantidad)
+        out_error = cursor.var(oracledb.DB_TYPE_VARCHAR, 4000, arraysize=cantidad)
+        out_error_tercero = cursor.var(oracledb.DB_TYPE_VARCHAR, 4000, arraysize=cantidad)
+        out_tercero = [
+            cursor.var(oracledb.DB_TYPE_VARCHAR, 200, arraysize=cantidad)
+            for _ in cls.COLUMNAS_TERCERO_FLUJO
+        ]
+        cursor.setinputsizes(None, out_estado, *out_tercero, out_error_tercero, out_error)
+        return out_estado, out_error, out_error_tercero, out_tercero
+
+    @classmethod
+    def _leer_flujos(cls, cedulas, out_estado, out_error, out_error_tercero, out_tercero):
+        respuesta = []
+        for posicion, cedula in enumerate(cedulas):
+            error_tercero = out_error_tercero.getvalue(posicion)
+            if error_tercero:
+                logger.warning(
+                    "Flujo de cedula %s leido, pero fallo la consulta a GR_TERCERO: %s",
+                    cedula,
+                    error_tercero
+                )
+            tercero = dict(zip(
+                cls.COLUMNAS_TERCERO_FLUJO,
+                (variable.getvalue(posicion) for variable in out_tercero)
+            ))
+            if tercero['ID_TERCERO'] is None:
+                tercero = None
+            else:
+                tercero['N_IDENTIFICACION'] = cedula
+            respuesta.append((out_estado.getvalue(posicion), out_error.getvalue(posicion), tercero))
+        return respuesta
+
+    def flujo_exitoso(self, numero_cedula):
+        """
+        SP_FLUJOEXITOSO de una cedula (ver flujos_exitosos).
+
+        Returns:
+            tuple: (estado_raw, error_sp, tercero)
+        """
+        return self.flujos_exitosos([str(numero_cedula)])[0]
+
+    def flujos_exitosos(self, cedulas):
+        """
+        SP_FLUJOEXITOSO + datos basicos de GR_TERCERO para un arreglo de
+        cedulas en un solo round trip.
+
+        Returns:
+            list: (estado_raw, error_sp, tercero) por cedula, en el mismo
+            orden; tercero es un dict de GR_TERCERO o None (flujo no OK o
+            tercero no encontrado)
+        """
+        cursor = self.connection.cursor()
+        binds = self._binds_flujos(cursor, len(cedulas))
+        cursor.executemany(
+            self.SQL_FLUJOEXITOSO_LOTE,
+            [(cedula,) for cedula in cedulas]
+        )
+        respuesta = self._leer_flujos(cedulas, *binds)
+        cursor.close()
+        return respuesta
+
+    def tercero(self, numero_cedula):
+        """
+        Fila de GR_TERCERO como dict (None si no existe).
+        """
+        cursor = self.connection.cursor()
+        self._preparar_consulta_unica(cursor)
+        cursor.execute(self.SQL_TERCERO, cedula=numero_cedula)
+
+        # Cada fila se convierte en dict con la rowfactory compilada
+        _aplicar_rowfactory_dict(cursor)
+        resultado = cursor.fetchone()
+        cursor.close()
+        return resultado
+
+    def terceros(self, cedulas):
+        """
+        Filas de GR_TERCERO (dicts) para un arreglo de cedulas.
+
+        Las cedulas se envian como una coleccion SYS.ODCIVARCHAR2LIST
+        (bind de arreglo) y todas las filas llegan con el execute gracias
+        al prefetch dimensionado al tamano del lote.
+        """
+        tipo_lista = self.connection.gettype("SYS.ODCIVARCHAR2LIST")
+        cursor = self.connection.cursor()
+        cursor.prefetchrows = len(cedulas) + 1
+        cursor.arraysize = len(cedulas)
+        cursor.execute(
+            self.SQL_TERCEROS_LOTE,
+            cedulas=tipo_lista.newobject(cedulas)
+        )
+        _aplicar_rowfactory_dict(cursor)
+        filas = cursor.fetchall()
+        cursor.close()
+        return filas
+
+    def contar_terceros(self):
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM GR_TERCERO")
+        total, = cursor.fetchone()
+        cursor.close()
+        return int(total)
+
+    def identificaciones_terceros(self, tamano_lote):
+        cursor = self.connection.cursor()
+        cursor.arraysize = tamano_lote
+        cursor.prefetchrows = tamano_lote
+        cursor.execute(
+            "SELECT N_IDENTIFICACION FROM GR_TERCERO WHERE N_IDENTIFICACION IS NOT NULL"
+        )
+        while True:
+            filas = cursor.fetchmany()
+            if not filas:
+                break
+            for fila in filas:
+                yield str(fila[0]).strip()
+        cursor.close()
+
+    def ping(self):
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT 1 FROM DUAL")
+        cursor.fetchone()
+        cursor.close()
+
+    def sesiones_por_nodo(self):
+        """
+        Sesiones del usuario de la aplicacion en Oracle agrupadas por maquina
+        (requiere SELECT sobre V$SESSION).
+        """
+        cursor = self.connection.cursor()
+        cursor.execute(self.SQL_SESIONES_POR_NODO)
+        _aplicar_rowfactory_dict(cursor)
+        filas = cursor.fetchall()
+        cursor.close()
+        return filas
+
+
+class SesionOracleAsync:
+    """
+    Version asyncio de SesionOracle (solo las primitivas usadas por las vistas async).
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @property
+    def call_timeout(self):
+        return self.connection.call_timeout
+
+    @call_timeout.setter
+    def call_timeout(self, valor):
+        self.connection.call_timeout = valor
+
+    async def close(self):
+        await self.connection.close()
+
+    async def consultar_actu(self, numero_cedula, fecha_expedicion):
+        cursor = self.connection.cursor()
+        result_cursor = self.connection.cursor()
+        result_cursor.prefetchrows = 2
+        result_cursor.arraysize = 1
+
+        await cursor.callproc('SP_CONSULTACTU', [numero_cedula, fecha_expedicion, result_cursor])
+
+        row = await result_cursor.fetchone()
+        result_cursor.close()
+        cursor.close()
+        return row
+
+    async def flujo_exitoso(self, numero_cedula):
+        cedulas = [str(numero_cedula)]
+        cursor = self.connection.cursor()
+        binds = SesionOracle._binds_flujos(cursor, 1)
+        await cursor.executemany(
+            SesionOracle.SQL_FLUJOEXITOSO_LOTE,
+            [(cedula,) for cedula in cedulas]
+        )
+        respuesta = SesionOracle._leer_flujos(cedulas, *binds)
+        cursor.close()
+        return respuesta[0]
+
+    async def tercero(self, numero_cedula):
+        cursor = self.connection.cursor()
+        SesionOracle._preparar_consulta_unica(cursor)
+        await cursor.execute(SesionOracle.SQL_TERCERO, cedula=numero_cedula)
+        _aplicar_rowfactory_dict(cursor)
+        resultado = await cursor.fetchone()
+        cursor.close()
+        return resultado
+
+
+class BackendOracle:
+    """
+    Backend de produccion: sesiones del pool oracledb del proceso.
+    """
+
+    nombre = 'oracle'
+
+    def adquirir(self):
+        return SesionOracle(obtener_pool().acquire())
+
+    async def adquirir_async(self):
+        pool = obtener_pool_async()
+        if pool is None:
+            # Loop de una sola peticion: conexion propia, close() la cierra
+            return SesionOracleAsync(await oracledb.connect_async(**_parametros_conexion_async()))
+        return SesionOracleAsync(await pool.acquire())
+
+    def estadisticas(self):
+        return estadisticas_pool()
+
+
+_backend_oracle = BackendOracle()
+
+
+def obtener_backend():
+    """
+    Backend de LINIX segun LINIX_BACKEND: 'oracle' (default) o 'local'.
+    El simulador solo se usa con DEBUG o LINIX_LOCAL_SIN_DEBUG explicito.
+    """
+    local = str(getattr(settings, 'LINIX_BACKEND', 'oracle')).lower() == 'local'
+    if local and (settings.DEBUG or getattr(settings, 'LINIX_LOCAL_SIN_DEBUG', False)):
+        from .linix_local import obtener_backend_local
+        return obtener_backend_local()
+    return _backend_oracle
+
+
 class LinixService:
     """
     Servicio para interactuar con la base de datos Oracle de LINIX.
@@ -24,6 +810,9 @@ class LinixService:
     - Conexion a Oracle
     - Ejecucion de procedimientos almacenados
     - Manejo de errores de BD
+    
+    Las llamadas pasan por un backend intercambiable (LINIX_BACKEND):
+    Oracle en produccion o el simulador local para pruebas de carga.
     """
     
     def __init__(self):
@@ -35,51 +824,252 @@ class LinixService:
         self.oracle_user = getattr(settings, 'ORACLE_USER', '')
         self.oracle_password = getattr(settings, 'ORACLE_PASSWORD', '')
         self.oracle_dsn = getattr(settings, 'ORACLE_DSN', '')  # host:port/service_name
-        
-        # Configuracion de encoding
+        # Las sesiones se toman del pool compartido del proceso (ver obtener_pool)
+        # o del simulador local (ver linix_local.py)
+        self.backend = obtener_backend()
     
     @contextmanager
-    def get_connection(self):
+    def get_connection(self, call_timeout_ms=None, procedimiento=None):
         """
-        Context manager para manejar conexiones a Oracle.
+        Context manager para obtener una sesion del backend de LINIX.
+        
+        Args:
+            call_timeout_ms (int): Tiempo maximo de cada round trip en la
+                sesion (None = ORACLE_CALL_TIMEOUT_MS, 0 = sin limite)
+            procedimiento (str): Nombre con el que se registra la latencia de
+                la llamada (adquisicion + ejecucion) en las metricas
         
         Uso:
-            with service.get_connection() as connection:
-                cursor = connection.cursor()
-                # hacer operaciones
+            with service.get_connection() as sesion:
+                row = sesion.consultar_actu(cedula, fecha)
         
         Ventajas del context manager:
-        - Cierra automaticamente la conexion al salir
+        - Devuelve automaticamente la sesion al pool al salir
         - Maneja errores correctamente
-        - Mas limpio y seguro
+        - Evita un logon completo a Oracle por cada llamada
+        - Pasa por el circuit breaker: si Oracle esta caido, rechaza de
+          inmediato en lugar de esperar la conexion
         
         Yields:
-            oracledb.Connection: Conexion activa a Oracle
+            SesionOracle: Sesion activa tomada del pool (o sesion del
+            simulador local con las mismas primitivas)
+            
+        Raises:
+            CircuitoAbiertoError: Si el circuit breaker de Oracle esta abierto
         """
-        connection = None
+        breaker = obtener_circuit_breaker()
+        breaker.permitir()
+        sesion = None
+        desenlace = None
+        metrica = 'error'
+        inicio = time.monotonic()
         try:
-            # Establecer conexion
-            logger.debug("Estableciendo conexion con Oracle...")
-            connection = oracledb.connect(
-                user=self.oracle_user,
-                password=self.oracle_password,
-                dsn=self.oracle_dsn
-            )
-            logger.debug("Conexion establecida exitosamente")
+            # Tomar sesion del pool
+            try:
+                sesion = self.backend.adquirir()
+            except oracledb.DatabaseError:
+                _registrar_adquisicion((time.monotonic() - inicio) * 1000, exitosa=False)
+                raise
+            _registrar_adquisicion((time.monotonic() - inicio) * 1000, exitosa=True)
+            logger.debug("Sesion Oracle adquirida del pool")
+            # Se fija en cada adquisicion: la sesion puede traer el valor
+            # de un uso anterior
+            sesion.call_timeout = _call_timeout_ms(call_timeout_ms)
             
-            yield connection
+            yield sesion
+            desenlace = 'exito'
+            metrica = 'ok'
             
         except oracledb.DatabaseError as e:
             error, = e.args
             logger.error(f"Error de Oracle: {error.code} - {error.message}")
+            desenlace = error.message if es_fallo_infraestructura(error) else 'exito'
+            metrica = desenlace_error(error)
             raise
         
         finally:
-            # Cerrar conexion siempre, incluso si hay error
-            if connection:
-                connection.close()
-                logger.debug("Conexion cerrada")
+            self._registrar_desenlace(breaker, desenlace)
+            if procedimiento:
+                registrar_latencia(procedimiento, (time.monotonic() - inicio) * 1000, metrica)
+            # Devolver la sesion al pool siempre, incluso si hay error
+            if sesion:
+                sesion.close()
+                logger.debug("Sesion devuelta al pool")
     
+    @asynccontextmanager
+    async def get_connection_async(self, call_timeout_ms=None, procedimiento=None):
+        """
+        Version asyncio de get_connection(): toma una sesion del pool asyncio
+        sin bloquear el event loop.
+        
+        Uso:
+            async with service.get_connection_async() as sesion:
+                row = await sesion.consultar_actu(cedula, fecha)
+        
+        Yields:
+            SesionOracleAsync: Sesion activa tomada del pool asyncio
+            
+        Raises:
+            CircuitoAbiertoError: Si el circuit breaker de Oracle esta abierto
+        """
+        breaker = obtener_circuit_breaker()
+        breaker.permitir()
+        sesion = None
+        desenlace = None
+        metrica = 'error'
+        inicio = time.monotonic()
+        try:
+            try:
+                sesion = await self.backend.adquirir_async()
+            except oracledb.DatabaseError:
+                _registrar_adquisicion((time.monotonic() - inicio) * 1000, exitosa=False)
+                raise
+            _registrar_adquisicion((time.monotonic() - inicio) * 1000, exitosa=True)
+            # Se fija en cada adquisicion: la sesion puede traer el valor
+            # de un uso anterior
+            sesion.call_timeout = _call_timeout_ms(call_timeout_ms)
+            
+            yield sesion
+            desenlace = 'exito'
+            metrica = 'ok'
+            
+        except oracledb.DatabaseError as e:
+            error, = e.args
+            logger.error(f"Error de Oracle: {error.code} - {error.message}")
+            desenlace = error.message if es_fallo_infraestructura(error) else 'exito'
+            metrica = desenlace_error(error)
+            raise
+        
+        finally:
+            self._registrar_desenlace(breaker, desenlace)
+            if procedimiento:
+                registrar_latencia(procedimiento, (time.monotonic() - inicio) * 1000, metrica)
+            if sesion:
+                await sesion.close()
+    
+    @staticmethod
+    def _registrar_desenlace(breaker, desenlace):
+        # desenlace: 'exito', el mensaje del fallo de infraestructura o None
+        if desenlace == 'exito':
+            breaker.registrar_exito()
+        elif desenlace:
+            breaker.registrar_fallo(desenlace)
+        else:
+            # Error ajeno a Oracle (p.ej. de Python): no cuenta para el circuito
+            breaker.liberar_prueba()
+
+    @staticmethod
+    def _resultado_circuito_abierto(error):
+        logger.info(f"Llamada a Oracle rechazada: {error}")
+        return {
+            'exitoso': False,
+            'circuito_abierto': True,
+            'error': str(error)
+        }
+
+    def _verificacion_dry_run(self, numero_cedula):
+        return {
+            'exitoso': True,
+            'encontrado': True,
+            'id_tercero': f"DRY-{numero_cedula}",
+            'estado_flujo': 'OK',
+            'mensaje': 'Flujo confirmado en modo de prueba local.',
+            'datos_completos': {
+                'procedimiento': 'SP_FLUJOEXITOSO',
+                'cedula': str(numero_cedula),
+                'estado': 'OK',
+                'id_tercero': f"DRY-{numero_cedula}",
+                'dry_run': True,
+            }
+        }
+
+    def _interpretar_respuesta_flujo(self, numero_cedula, respuesta):
+        """
+        Convierte (estado_raw, error_sp, tercero) de la sesion en el dict de resultado.
+        """
+        estado_raw, error_sp, tercero = respuesta
+        if error_sp:
+            logger.error(
+                "Error ejecutando SP_FLUJOEXITOSO para cedula %s: %s",
+                numero_cedula,
+                error_sp
+            )
+            return {
+                'exitoso': False,
+                'error': f'Error de base de datos: {error_sp}'
+            }
+        return self._interpretar_flujo(numero_cedula, estado_raw, tercero)
+
+    def _interpretar_flujo(self, numero_cedula, estado_raw, tercero=None):
+        """
+        Convierte la respuesta de SP_FLUJOEXITOSO (OK/PDTE) en el dict de resultado.
+        
+        Args:
+            tercero (dict): Fila de GR_TERCERO leida en la misma llamada
+                (solo cuando el flujo esta OK)
+        """
+        proc_name = "SP_FLUJOEXITOSO"
+        estado = str(estado_raw).strip().upper() if estado_raw is not None else ""
+
+        if estado not in {"OK", "PDTE"}:
+            logger.error(
+                "Respuesta inesperada en %s para cedula %s: %s",
+                proc_name,
+                numero_cedula,
+                estado_raw
+            )
+            return {
+                'exitoso': False,
+                'error': (
+                    f'Respuesta inesperada de {proc_name}: '
+                    f'{estado_raw!r}'
+                ),
+                'datos_completos': {
+                    'procedimiento': proc_name,
+                    'cedula': str(numero_cedula),
+                    'estado': estado,
+                    'estado_raw': estado_raw
+                }
+            }
+
+        encontrado = estado == "OK"
+        mensaje = (
+            "Flujo confirmado en LINIX."
+            if encontrado
+            else "Flujo pendiente en LINIX o con novedad (PDTE)."
+        )
+        # El tercero llega en la misma llamada que el estado del flujo
+        id_tercero = None
+        if encontrado and tercero and tercero.get('ID_TERCERO') is not None:
+            id_tercero = str(tercero['ID_TERCERO']).strip()
+
+        logger.info(
+            "Verificacion %s completada para cedula %s: estado=%s, id_tercero=%s",
+            proc_name,
+            numero_cedula,
+            estado,
+            id_tercero
+        )
+
+        datos_completos = {
+            'procedimiento': proc_name,
+            'cedula': str(numero_cedula),
+            'estado': estado,
+            'id_tercero': id_tercero,
+            'mensaje': mensaje
+        }
+        if encontrado and tercero:
+            datos_completos['tercero'] = tercero
+
+        return {
+            'exitoso': True,
+            'encontrado': encontrado,
+            'id_tercero': id_tercero,
+            'estado_flujo': estado,
+            'mensaje': mensaje,
+            'datos_completos': datos_completos
+        }
+
     def verificar_flujo_vinculacion(self, numero_cedula):
         """
         Verifica si se creo exitosamente el flujo de vinculacion en LINIX.
@@ -88,6 +1078,9 @@ class LinixService:
         - OK: el flujo se creo correctamente
         - PDTE: el flujo no se creo aun o presenta alguna novedad
 
+        Si el flujo esta OK, en la misma llamada se leen ID_TERCERO y los
+        datos basicos de GR_TERCERO (mismo camino que verificar_flujos()).
+
         Args:
             numero_cedula (str): Cedula del usuario a verificar
 
@@ -96,95 +1089,45 @@ class LinixService:
         """
 
         logger.info(f"Verificando flujo de vinculacion para cedula: {numero_cedula}")
-        dry_run = bool(getattr(settings, 'LINIX_VERIFICACION_DRY_RUN', False) and settings.DEBUG)
-        if dry_run:
+        cedula = str(numero_cedula).strip()
+        resultado = self.verificar_flujos([cedula]).get(cedula)
+        if resultado is None:
             return {
-                'exitoso': True,
-                'encontrado': True,
-                'id_tercero': f"DRY-{numero_cedula}",
-                'estado_flujo': 'OK',
-                'mensaje': 'Flujo confirmado en modo de prueba local.',
-                'datos_completos': {
-                    'procedimiento': 'SP_FLUJOEXITOSO',
-                    'cedula': str(numero_cedula),
-                    'estado': 'OK',
-                    'id_tercero': f"DRY-{numero_cedula}",
-                    'dry_run': True,
-                }
+                'exitoso': False,
+                'error': 'Cedula vacia'
             }
+        return resultado
 
-        try:
-            with self.get_connection() as connection:
-                cursor = connection.cursor()
-
-                proc_name = "SP_FLUJOEXITOSO"
-                out_estado = cursor.var(oracledb.DB_TYPE_VARCHAR)
-                cursor.callproc(proc_name, [str(numero_cedula), out_estado])
-                estado_raw = out_estado.getvalue()
-
-                estado = str(estado_raw).strip().upper() if estado_raw is not None else ""
-
-                if estado not in {"OK", "PDTE"}:
-                    cursor.close()
-                    logger.error(
-                        "Respuesta inesperada en %s para cedula %s: %s",
-                        proc_name,
-                        numero_cedula,
-                        estado_raw
-                    )
-                    return {
-                        'exitoso': False,
-                        'error': (
-                            f'Respuesta inesperada de {proc_name}: '
-                            f'{estado_raw!r}'
-                        ),
-                        'datos_completos': {
-                            'procedimiento': proc_name,
-                            'cedula': str(numero_cedula),
-                            'estado': estado,
-                            'estado_raw': estado_raw
-                        }
-                    }
+    @medir_tiempo
+    async def verificar_flujo_vinculacion_async(self, numero_cedula):
+        """
+        Version asyncio de verificar_flujo_vinculacion().
 
-                encontrado = estado == "OK"
-                mensaje = (
-                    "Flujo confirmado en LINIX."
-                    if encontrado
-                    else "Flujo pendiente en LINIX o con novedad (PDTE)."
-                )
-                # En este flujo solo se consulta el SP; no se hace SELECT adicional.
-                id_tercero = None
+        Args:
+            numero_cedula (str): Cedula del usuario a verificar
 
-                cursor.close()
+        Returns:
+            dict: Resultado de la verificacion (misma forma que la version sincrona)
+        """
+        logger.info(f"Verificando flujo de vinculacion (async) para cedula: {numero_cedula}")
+        dry_run = bool(getattr(settings, 'LINIX_VERIFICACION_DRY_RUN', False) and settings.DEBUG)
+        if dry_run:
+            return self._verificacion_dry_run(numero_cedula)
 
-                logger.info(
-                    "Verificacion %s completada para cedula %s: estado=%s, id_tercero=%s",
-                    proc_name,
-                    numero_cedula,
-                    estado,
-                    id_tercero
-                )
+        try:
+            async with self.get_connection_async(procedimiento='SP_FLUJOEXITOSO') as sesion:
+                respuesta = await sesion.flujo_exitoso(numero_cedula)
+                return self._interpretar_respuesta_flujo(numero_cedula, respuesta)
 
-                return {
-                    'exitoso': True,
-                    'encontrado': encontrado,
-                    'id_tercero': id_tercero,
-                    'estado_flujo': estado,
-                    'mensaje': mensaje,
-                    'datos_completos': {
-                        'procedimiento': proc_name,
-                        'cedula': str(numero_cedula),
-                        'estado': estado,
-                        'id_tercero': id_tercero,
-                        'mensaje': mensaje
-                    }
-                }
+        except CircuitoAbiertoError as e:
+            return self._resultado_circuito_abierto(e)
 
         except oracledb.DatabaseError as e:
             error, = e.args
             logger.error(f"Error ejecutando procedimiento SP_FLUJOEXITOSO: {error.message}")
             return {
                 'exitoso': False,
+                'timeout': es_timeout(error),
                 'error': f'Error de base de datos: {error.message}'
             }
 
@@ -195,9 +1138,140 @@ class LinixService:
                 'error': f'Error inesperado: {str(e)}'
             }
 
+    def verificar_flujos(self, cedulas, call_timeout_ms=None, limite=None):
+        """
+        Verifica el flujo de vinculacion de varias cedulas en un solo round trip.
+
+        Ejecuta SP_FLUJOEXITOSO para todo el arreglo de cedulas con
+        executemany sobre un bloque PL/SQL anonimo (una sola sesion del
+        pool y un solo viaje de red), en lugar de una llamada por cedula.
+        El mismo bloque devuelve ID_TERCERO y los datos basicos de
+        GR_TERCERO de las cedulas con flujo OK.
+
+        Args:
+            cedulas (list): Cedulas a verificar
+            call_timeout_ms (int): Tiempo maximo para el round trip del lote
+                (None = ORACLE_CALL_TIMEOUT_MS). Si se agota, cada resultado
+                lleva 'timeout': True.
+            limite (float): Instante (time.monotonic()) en que la llamada debe
+                haber terminado. La espera por una sesion del pool se descuenta
+                del call_timeout, de modo que la sesion nunca sigue ocupada
+                despues de limite.
+
+        Returns:
+            dict: {cedula: resultado}, donde cada resultado tiene la misma
+            forma que el de verificar_flujo_vinculacion(); su
+            'tiempo_respuesta_ms' es la duracion del lote completo
+        """
+        cedulas = list(dict.fromkeys(str(c).strip() for c in cedulas if c))
+        if not cedulas:
+            return {}
+
+        logger.info(f"Verificando flujo de vinculacion en lote para {len(cedulas)} cedulas")
+        inicio = time.monotonic()
+        dry_run = bool(getattr(settings, 'LINIX_VERIFICACION_DRY_RUN', False) and settings.DEBUG)
+        if dry_run:
+            resultados = {cedula: self._verificacion_dry_run(cedula) for cedula in cedulas}
+        else:
+            resultados = self._ejecutar_flujos_lote(cedulas, call_timeout_ms, limite)
+
+        tiempo_respuesta_ms = int((time.monotonic() - inicio) * 1000)
+        for resultado in resultados.values():
+            resultado['tiempo_respuesta_ms'] = tiempo_respuesta_ms
+        return resultados
+
+    def _ejecutar_flujos_lote(self, cedulas, call_timeout_ms, limite=None):
+        """
+        Ejecuta SP_FLUJOEXITOSO para el lote con executemany (ver verificar_flujos).
+        """
+        timeout = False
+        try:
+            with self.get_connection(
+                call_timeout_ms=call_timeout_ms,
+                procedimiento='SP_FLUJOEXITOSO' if len(cedulas) == 1 else 'SP_FLUJOEXITOSO_LOTE'
+            ) as sesion:
+                if limite is not None:
+                    restante_ms = int((limite - time.monotonic()) * 1000)
+                    if restante_ms <= 0:
+                        return {
+                            cedula: {
+                                'exitoso': False,
+                                'error': 'Plazo agotado esperando una sesion del pool',
+                                'timeout': True
+                            }
+                            for cedula in cedulas
+                        }
+                    sesion.call_timeout = min(sesion.call_timeout or restante_ms, restante_ms)
+                respuesta = sesion.flujos_exitosos(cedulas)
+                return {
+                    cedula: self._interpretar_respuesta_flujo(cedula, respuesta_cedula)
+                    for cedula, respuesta_cedula in zip(cedulas, respuesta)
+                }
+
+        except CircuitoAbiertoError as e:
+            resultado = self._resultado_circuito_abierto(e)
+            return {cedula: dict(resultado) for cedula in cedulas}
+
+        except oracledb.DatabaseError as e:
+            error, = e.args
+            logger.error(f"Error ejecutando SP_FLUJOEXITOSO en lote: {error.message}")
+            error_msg = f'Error de base de datos: {error.message}'
+            timeout = es_timeout(error)
+
+        except Exception as e:
+            logger.exception(f"Error inesperado en verificacion en lote: {str(e)}")
+            error_msg = f'Error inesperado: {str(e)}'
+
+        return {
+            cedula: {'exitoso': False, 'error': error_msg, 'timeout': timeout}
+            for cedula in cedulas
+        }
+
+    @staticmethod
+    def _clave_cache_actu(numero_cedula, fecha_expedicion):
+        if hasattr(fecha_expedicion, 'strftime'):
+            fecha_expedicion = fecha_expedicion.strftime('%d/%m/%Y')
+        return f"linix:actu:{str(numero_cedula).strip()}:{str(fecha_expedicion).strip()}"
+
+    def _ttl_cache_actu(self, resultado):
+        """
+        TTL (segundos) segun el tipo de resultado: asociado encontrado,
+        no encontrado (incluye ORA-20050) o error.
+        """
+        if resultado.get('circuito_abierto'):
+            return 0
+        if not resultado.get('exitoso'):
+            return int(getattr(settings, 'LINIX_ACTU_CACHE_TTL_ERROR', 10))
+        if resultado.get('encontrado'):
+            return int(getattr(settings, 'LINIX_ACTU_CACHE_TTL_ENCONTRADO', 3600))
+        return int(getattr(settings, 'LINIX_ACTU_CACHE_TTL_NO_ENCONTRADO', 600))
+
+    def invalidar_cache_actu(self, numero_cedula, fecha_expedicion):
+        """
+        Elimina el resultado cacheado de SP_CONSULTACTU para una cedula.
+
+        Se debe llamar cuando cambia la condicion de asociado del ciudadano
+        (por ejemplo, al confirmar el flujo en LINIX).
+
+        Args:
+            numero_cedula (str): Cedula del ciudadano
+            fecha_expedicion (str|date): Fecha de expedicion (DD/MM/YYYY o date)
+        """
+        cache.delete(self._clave_cache_actu(numero_cedula, fecha_expedicion))
+
+    @medir_tiempo
     def consultar_actu(self, numero_cedula, fecha_expedicion):
         """
-        Ejecuta SP_CONSULTACTU para validar si el ciudadano ya es asociado.
+        Valida si el ciudadano ya es asociado (SP_CONSULTACTU), con cache.
+
+        Orden de consulta:
+        1. Indice local de GR_TERCERO (filtro de Bloom): si la cedula
+           definitivamente no esta, no es asociado y no se consulta Oracle.
+        2. Cache por (cedula, fecha_expedicion) con TTL distinto para
+           encontrado, no encontrado y error, de modo que los reintentos del
+           Paso 1 (doble clic, recarga, regreso tras DECRIM) no vuelvan a
+           consultar Oracle.
+        3. SP_CONSULTACTU en Oracle.
 
         Args:
             numero_cedula (str): Cedula del ciudadano
@@ -207,47 +1281,137 @@ class LinixService:
             dict: {
                 'exitoso': bool,
                 'encontrado': bool,
+                'origen': 'indice' | 'cache' | 'oracle',
+                'tiempo_respuesta_ms': int,
                 'error': str (solo si exitoso=False)
             }
         """
-        logger.info(f"Consultando SP_CONSULTACTU para cedula: {numero_cedula}")
+        resultado = self._actu_desde_indice(numero_cedula)
+        if resultado:
+            return resultado
 
-        try:
-            with self.get_connection() as connection:
-                cursor = connection.cursor()
-                out_cursor = cursor.var(oracledb.DB_TYPE_CURSOR)
+        clave = self._clave_cache_actu(numero_cedula, fecha_expedicion)
+        cacheado = cache.get(clave)
+        if cacheado is not None:
+            logger.info(f"SP_CONSULTACTU desde cache para cedula: {numero_cedula}")
+            return dict(cacheado, origen='cache')
 
-                cursor.callproc('SP_CONSULTACTU', [numero_cedula, fecha_expedicion, out_cursor])
+        resultado = self._consultar_actu_oracle(numero_cedula, fecha_expedicion)
+        ttl = self._ttl_cache_actu(resultado)
+        if ttl > 0:
+            cache.set(clave, resultado, ttl)
+        return dict(resultado, origen='oracle')
 
-                result_cursor = out_cursor.getvalue()
-                row = result_cursor.fetchone() if result_cursor else None
-                logger.info(f"Datos que devuelve SP_CONSULTACTU: {row}")    
-                if result_cursor:
-                    result_cursor.close()
-                cursor.close()
+    @medir_tiempo
+    async def consultar_actu_async(self, numero_cedula, fecha_expedicion):
+        """
+        Version asyncio de consultar_actu() (indice, cache y SP_CONSULTACTU).
 
-                encontrado = row is not None and str(row[0]) != 'Error'
+        Args:
+            numero_cedula (str): Cedula del ciudadano
+            fecha_expedicion (str): Fecha de expedicion en formato DD/MM/YYYY
 
-                return {
-                    'exitoso': True,
-                    'encontrado': encontrado
-                }
+        Returns:
+            dict: Misma forma que consultar_actu()
+        """
+        resultado = self._actu_desde_indice(numero_cedula)
+        if resultado:
+            return resultado
+
+        clave = self._clave_cache_actu(numero_cedula, fecha_expedicion)
+        cacheado = await cache.aget(clave)
+        if cacheado is not None:
+            logger.info(f"SP_CONSULTACTU desde cache para cedula: {numero_cedula}")
+            return dict(cacheado, origen='cache')
+
+        resultado = await self._consultar_actu_oracle_async(numero_cedula, fecha_expedicion)
+        ttl = self._ttl_cache_actu(resultado)
+        if ttl > 0:
+            await cache.aset(clave, resultado, ttl)
+        return dict(resultado, origen='oracle')
+
+    def _actu_desde_indice(self, numero_cedula):
+        """
+        Resultado definitivo "no asociado" si la cedula no esta en el indice local.
+        """
+        indice = obtener_indice()
+        if indice is not None and indice.puede_contener(numero_cedula) is False:
+            logger.info(f"Cedula {numero_cedula} ausente en indice local; se omite SP_CONSULTACTU")
+            return {
+                'exitoso': True,
+                'encontrado': False,
+                'origen': 'indice'
+            }
+        return None
+
+    @staticmethod
+    def _interpretar_actu(row):
+        logger.info(f"Datos que devuelve SP_CONSULTACTU: {row}")
+        encontrado = row is not None and str(row[0]) != 'Error'
+        return {
+            'exitoso': True,
+            'encontrado': encontrado
+        }
+
+    @staticmethod
+    def _error_actu(error):
+        message = error.message or ''
+        if 'ORA-20050' in message or 'No existe el asociado' in message:
+            logger.info("SP_CONSULTACTU: asociado no encontrado (se permite continuar)")
+            return {
+                'exitoso': True,
+                'encontrado': False
+            }
+        logger.error(f"Error ejecutando SP_CONSULTACTU: {message}")
+        return {
+            'exitoso': False,
+            'timeout': es_timeout(error),
+            'error': f'Error de base de datos: {message}'
+        }
+
+    def _consultar_actu_oracle(self, numero_cedula, fecha_expedicion):
+        """
+        Ejecuta SP_CONSULTACTU en el backend (sin cache).
+        """
+        logger.info(f"Consultando SP_CONSULTACTU para cedula: {numero_cedula}")
+
+        try:
+            with self.get_connection(procedimiento='SP_CONSULTACTU') as sesion:
+                row = sesion.consultar_actu(numero_cedula, fecha_expedicion)
+                return self._interpretar_actu(row)
+
+        except CircuitoAbiertoError as e:
+            return self._resultado_circuito_abierto(e)
 
         except oracledb.DatabaseError as e:
             error, = e.args
-            message = error.message or ''
-            if 'ORA-20050' in message or 'No existe el asociado' in message:
-                logger.info("SP_CONSULTACTU: asociado no encontrado (se permite continuar)")
-                return {
-                    'exitoso': True,
-                    'encontrado': False
-                }
-            logger.error(f"Error ejecutando SP_CONSULTACTU: {message}")
+            return self._error_actu(error)
+
+        except Exception as e:
+            logger.exception(f"Error inesperado en SP_CONSULTACTU: {str(e)}")
             return {
                 'exitoso': False,
-                'error': f'Error de base de datos: {message}'
+                'error': f'Error inesperado: {str(e)}'
             }
 
+    async def _consultar_actu_oracle_async(self, numero_cedula, fecha_expedicion):
+        """
+        Ejecuta SP_CONSULTACTU con el pool asyncio del backend (sin cache).
+        """
+        logger.info(f"Consultando SP_CONSULTACTU (async) para cedula: {numero_cedula}")
+
+        try:
+            async with self.get_connection_async(procedimiento='SP_CONSULTACTU') as sesion:
+                row = await sesion.consultar_actu(numero_cedula, fecha_expedicion)
+                return self._interpretar_actu(row)
+
+        except CircuitoAbiertoError as e:
+            return self._resultado_circuito_abierto(e)
+
+        except oracledb.DatabaseError as e:
+            error, = e.args
+            return self._error_actu(error)
+
         except Exception as e:
             logger.exception(f"Error inesperado en SP_CONSULTACTU: {str(e)}")
             return {
@@ -255,6 +1419,14 @@ class LinixService:
                 'error': f'Error inesperado: {str(e)}'
             }
     
+    @staticmethod
+    def _interpretar_tercero(numero_cedula, resultado):
+        if resultado:
+            logger.info(f"Tercero encontrado: ID={resultado['ID_TERCERO']}")
+            return resultado
+        logger.info(f"No se encontro tercero con cedula: {numero_cedula}")
+        return None
+
     def consultar_tercero_por_cedula(self, numero_cedula):
         """
         Consulta directa a la tabla gr_tercero para obtener datos del tercero.
@@ -272,42 +1444,13 @@ class LinixService:
         logger.info(f"Consultando tercero por cedula: {numero_cedula}")
         
         try:
-            with self.get_connection() as connection:
-                cursor = connection.cursor()
-                
-                # TODO: Ajustar nombre de tabla y columnas segun tu esquema
-                query = """
-                    SELECT 
-                        ID_TERCERO,
-                        N_IDENTIFICACION,
-                        PRIMER_NOMBRE,
-                        SEGUNDO_NOMBRE,
-                        PRIMER_APELLIDO,
-                        SEGUNDO_APELLIDO,
-                        ESTADO
-                    FROM GR_TERCERO
-                    WHERE N_IDENTIFICACION = :cedula
-                    AND ROWNUM = 1
-                """
-                
-                cursor.execute(query, cedula=numero_cedula)
-                
-                # Obtener nombres de columnas
-                columns = [col[0] for col in cursor.description]
-                
-                # Obtener resultado
-                row = cursor.fetchone()
-                
-                cursor.close()
-                
-                if row:
-                    # Convertir tupla a diccionario
-                    resultado = dict(zip(columns, row))
-                    logger.info(f"Tercero encontrado: ID={resultado['ID_TERCERO']}")
-                    return resultado
-                else:
-                    logger.info(f"No se encontro tercero con cedula: {numero_cedula}")
-                    return None
+            with self.get_connection(procedimiento='GR_TERCERO') as sesion:
+                resultado = sesion.tercero(numero_cedula)
+                return self._interpretar_tercero(numero_cedula, resultado)
+        
+        except CircuitoAbiertoError as e:
+            logger.info(f"Consulta de tercero rechazada: {e}")
+            return None
         
         except oracledb.DatabaseError as e:
             error, = e.args
@@ -318,6 +1461,161 @@ class LinixService:
             logger.exception(f"Error inesperado: {str(e)}")
             return None
     
+    async def consultar_tercero_por_cedula_async(self, numero_cedula):
+        """
+        Version asyncio de consultar_tercero_por_cedula().
+        
+        Args:
+            numero_cedula (str): Cedula a buscar
+            
+        Returns:
+            dict: Datos del tercero o None si no existe
+        """
+        
+        logger.info(f"Consultando tercero (async) por cedula: {numero_cedula}")
+        
+        try:
+            async with self.get_connection_async(procedimiento='GR_TERCERO') as sesion:
+                resultado = await sesion.tercero(numero_cedula)
+                return self._interpretar_tercero(numero_cedula, resultado)
+        
+        except CircuitoAbiertoError as e:
+            logger.info(f"Consulta de tercero rechazada: {e}")
+            return None
+        
+        except oracledb.DatabaseError as e:
+            error, = e.args
+            logger.error(f"Error consultando tercero: {error.message}")
+            return None
+        
+        except Exception as e:
+            logger.exception(f"Error inesperado: {str(e)}")
+            return None
+    
+    def consultar_terceros_por_cedulas(self, cedulas):
+        """
+        Consulta varios terceros de GR_TERCERO en un solo round trip
+        (ver SesionOracle.terceros).
+        
+        Args:
+            cedulas (list): Cedulas a buscar
+            
+        Returns:
+            dict: {cedula: datos del tercero o None si no existe}
+        """
+        cedulas = list(dict.fromkeys(str(c).strip() for c in cedulas if c))
+        if not cedulas:
+            return {}
+        
+        logger.info(f"Consultando {len(cedulas)} terceros por cedula en lote")
+        resultados = {cedula: None for cedula in cedulas}
+        
+        try:
+            with self.get_connection(procedimiento='GR_TERCERO_LOTE') as sesion:
+                for tercero in sesion.terceros(cedulas):
+                    cedula = str(tercero['N_IDENTIFICACION']).strip()
+                    # Igual que ROWNUM = 1: se conserva la primera fila por cedula
+                    if resultados.get(cedula) is None:
+                        resultados[cedula] = tercero
+        
+        except CircuitoAbiertoError as e:
+            logger.info(f"Consulta de terceros en lote rechazada: {e}")
+        
+        except oracledb.DatabaseError as e:
+            error, = e.args
+            logger.error(f"Error consultando terceros en lote: {error.message}")
+        
+        except Exception as e:
+            logger.exception(f"Error inesperado: {str(e)}")
+        
+        return resultados
+    
+    def contar_terceros(self):
+        """
+        Cantidad de registros en GR_TERCERO (dimensiona el indice local).
+        
+        Returns:
+            int: Numero de terceros
+        """
+        # Proceso nocturno: sin call_timeout
+        with self.get_connection(call_timeout_ms=0) as sesion:
+            return sesion.contar_terceros()
+    
+    def iterar_identificaciones_terceros(self, tamano_lote=10000):
+        """
+        Recorre todas las identificaciones de GR_TERCERO en bloques grandes.
+        
+        Se usa para la exportacion nocturna del indice local; la sesion se
+        mantiene tomada mientras se consume el generador.
+        
+        Args:
+            tamano_lote (int): Filas por round trip (arraysize/prefetchrows)
+            
+        Yields:
+            str: N_IDENTIFICACION de cada tercero
+        """
+        with self.get_connection(call_timeout_ms=0) as sesion:
+            yield from sesion.identificaciones_terceros(tamano_lote)
+    
+    def estadisticas_indice(self):
+        """
+        Metadatos del indice local de terceros (None si no esta configurado).
+        """
+        indice = obtener_indice()
+        return indice.estadisticas() if indice is not None else None
+    
+    def estadisticas_latencia(self):
+        """
+        Histogramas de latencia por procedimiento de este proceso.
+        
+        Returns:
+            dict: Ver metricas.estadisticas_latencia()
+        """
+        return estadisticas_latencia()
+    
+    def estado_circuit_breaker(self):
+        """
+        Estado del circuit breaker de Oracle de este proceso.
+        
+        Returns:
+            dict: Estado (CERRADO/ABIERTO/SEMI_ABIERTO), fallos y rechazos
+        """
+        return obtener_circuit_breaker().estado()
+    
+    def sesiones_por_nodo(self):
+        """
+        Sesiones abiertas en Oracle por nodo (maquina) para el usuario de la
+        aplicacion, para vigilar el limite de sesiones de LINIX cuando se
+        escalan los contenedores del backend.
+        
+        Returns:
+            dict: {'exitoso': bool, 'sesiones': [{'MACHINE', 'SERVER',
+            'STATUS', 'SESIONES'}], 'error': str (solo si exitoso=False)}
+        """
+        try:
+            with self.get_connection() as sesion:
+                return {'exitoso': True, 'sesiones': sesion.sesiones_por_nodo()}
+        
+        except CircuitoAbiertoError as e:
+            return self._resultado_circuito_abierto(e)
+        
+        except oracledb.DatabaseError as e:
+            error, = e.args
+            logger.warning(f"No se pudieron consultar las sesiones por nodo: {error.message}")
+            return {
+                'exitoso': False,
+                'error': f'Error de base de datos: {error.message}'
+            }
+    
+    def estadisticas_pool(self):
+        """
+        Estadisticas del pool de sesiones del backend en este proceso.
+        
+        Returns:
+            dict: Ver estadisticas_pool() del modulo (o las del simulador local)
+        """
+        return dict(self.backend.estadisticas(), backend=self.backend.nombre)
+    
     def test_connection(self):
         """
         Metodo de utilidad para probar la conexion a Oracle.
@@ -326,11 +1624,8 @@ class LinixService:
             bool: True si la conexion fue exitosa
         """
         try:
-            with self.get_connection() as connection:
-                cursor = connection.cursor()
-                cursor.execute("SELECT 1 FROM DUAL")
-                result = cursor.fetchone()
-                cursor.close()
+            with self.get_connection() as sesion:
+                sesion.ping()
                 
                 logger.info("Test de conexion exitoso")
                 return True
@@ -0,0 +1,176 @@
+# vinculacion/services/metricas.py
+
+"""
+METRICAS DE LATENCIA POR PROCEDIMIENTO
+======================================
+Histogramas acumulativos (por proceso) de la duracion de cada llamada a
+las integraciones, p.ej. SP_CONSULTACTU, SP_FLUJOEXITOSO y la consulta
+a GR_TERCERO.
+
+Se consultan como JSON (estadisticas_latencia) o en formato de texto de
+Prometheus (exportar_prometheus) para que un scraper los recoja de cada
+worker. Otros modulos agregan sus series con registrar_exportador().
+"""
+
+import threading
+
+# Limites superiores de los buckets en milisegundos (+Inf implicito)
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class HistogramaLatencia:
+    """
+    Histograma de latencias de un procedimiento, con conteo por desenlace.
+    """
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._conteos = [0] * (len(self.buckets) + 1)
+        self._suma_ms = 0.0
+        self._total = 0
+        self._maximo_ms = 0.0
+        self._desenlaces = {}
+
+    def observar(self, duracion_ms, desenlace='ok'):
+        """
+        Registra una llamada.
+
+        Args:
+            duracion_ms (float): Duracion de la llamada
+            desenlace (str): ok, error, timeout, ...
+        """
+        posicion = len(self.buckets)
+        for i, limite in enumerate(self.buckets):
+            if duracion_ms <= limite:
+                posicion = i
+                break
+        with self._lock:
+            self._conteos[posicion] += 1
+            self._suma_ms += duracion_ms
+            self._total += 1
+            self._maximo_ms = max(self._maximo_ms, duracion_ms)
+            self._desenlaces[desenlace] = self._desenlaces.get(desenlace, 0) + 1
+
+    def _percentil(self, conteos, total, fraccion):
+        # Estimacion por el limite superior del bucket que alcanza la fraccion
+        objetivo = fraccion * total
+        acumulado = 0
+        for i, conteo in enumerate(conteos):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                return self.buckets[i] if i < len(self.buckets) else None
+        return None
+
+    def datos(self):
+        """
+        Copia consistente del histograma.
+        """
+        with self._lock:
+            conteos = list(self._conteos)
+            total = self._total
+            suma_ms = self._suma_ms
+            maximo_ms = self._maximo_ms
+            desenlaces = dict(self._desenlaces)
+
+        acumulados = []
+        acumulado = 0
+        for conteo in conteos:
+            acumulado += conteo
+            acumulados.append(acumulado)
+
+        return {
+            'total': total,
+            'suma_ms': round(suma_ms, 2),
+            'promedio_ms': round(suma_ms / total, 2) if total else 0,
+            'maximo_ms': round(maximo_ms, 2),
+            'p50_ms': self._percentil(conteos, total, 0.5) if total else None,
+            'p95_ms': self._percentil(conteos, total, 0.95) if total else None,
+            'p99_ms': self._percentil(conteos, total, 0.99) if total else None,
+            'desenlaces': desenlaces,
+            'buckets': {
+                str(limite): acumulados[i] for i, limite in enumerate(self.buckets)
+            },
+        }
+
+
+_histogramas = {}
+_histogramas_lock = threading.Lock()
+
+# Funciones que retornan lineas adicionales para exportar_prometheus()
+_exportadores = []
+
+
+def _histograma(procedimiento):
+    histograma = _histogramas.get(procedimiento)
+    if histograma is None:
+        with _histogramas_lock:
+            histograma = _histogramas.setdefault(procedimiento, HistogramaLatencia())
+    return histograma
+
+
+def registrar_latencia(procedimiento, duracion_ms, desenlace='ok'):
+    """
+    Registra la duracion de una llamada a `procedimiento`.
+    """
+    _histograma(procedimiento).observar(duracion_ms, desenlace)
+
+
+def estadisticas_latencia():
+    """
+    Histogramas de todos los procedimientos observados por este proceso.
+
+    Returns:
+        dict: {procedimiento: datos del histograma}
+    """
+    with _histogramas_lock:
+        histogramas = dict(_histogramas)
+    return {nombre: histograma.datos() for nombre, histograma in sorted(histogramas.items())}
+
+
+def registrar_exportador(funcion):
+    """
+    Agrega series a exportar_prometheus(): `funcion()` retorna una lista de
+    lineas en formato de texto de Prometheus (con sus # HELP / # TYPE).
+    """
+    if funcion not in _exportadores:
+        _exportadores.append(funcion)
+
+
+def exportar_prometheus(nombre_metrica='vinculacion_integracion_latencia_ms'):
+    """
+    Histogramas en formato de texto de exposicion de Prometheus.
+
+    Returns:
+        str: Una serie por procedimiento (buckets, _sum y _count) y un
+        contador de llamadas por desenlace
+    """
+    lineas = [
+        f'# HELP {nombre_metrica} Duracion de llamadas a integraciones en milisegundos.',
+        f'# TYPE {nombre_metrica} histogram',
+    ]
+    desenlaces = []
+    for procedimiento, datos in estadisticas_latencia().items():
+        for limite, acumulado in datos['buckets'].items():
+            lineas.append(
+                f'{nombre_metrica}_bucket{{procedimiento="{procedimiento}",le="{limite}"}} {acumulado}'
+            )
+        lineas.append(
+            f'{nombre_metrica}_bucket{{procedimiento="{procedimiento}",le="+Inf"}} {datos["total"]}'
+        )
+        lineas.append(f'{nombre_metrica}_sum{{procedimiento="{procedimiento}"}} {datos["suma_ms"]}')
+        lineas.append(f'{nombre_metrica}_count{{procedimiento="{procedimiento}"}} {datos["total"]}')
+        for desenlace, total in sorted(datos['desenlaces'].items()):
+            desenlaces.append(
+                f'vinculacion_integracion_llamadas_total'
+                f'{{procedimiento="{procedimiento}",desenlace="{desenlace}"}} {total}'
+            )
+
+    if desenlaces:
+        lineas.append('# HELP vinculacion_integracion_llamadas_total Llamadas a integraciones por desenlace.')
+        lineas.append('# TYPE vinculacion_integracion_llamadas_total counter')
+        lineas.extend(desenlaces)
+
+    for exportador in list(_exportadores):
+        lineas.extend(exportador())
+    return '\n'.join(lineas) + '\n'
@@ -0,0 +1,313 @@
+# vinculacion/services/reconciliacion_biometria_services.py
+
+"""
+RECONCILIACION DE ESTADOS DE BIOMETRIA
+======================================
+En modo webhook el polling responde desde la BD, asi que un webhook
+perdido (o un usuario que cerro el navegador) dejaria el caso en
+PENDIENTE/EN_PROCESO para siempre. Este servicio consulta DECRIM solo
+para los casos cuyo webhook esta atrasado (sin cambios hace
+DECRIM_RECONCILIAR_TRAS_MIN minutos) y les aplica las mismas
+transiciones que el polling.
+
+Cada caso sin novedades se revisa cada vez mas espaciado (backoff por
+caso guardado en el cache), y las consultas HTTP de una pasada se
+reparten en un grupo acotado de hilos.
+"""
+
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import LogIntegracion, PreRegistro
+from .biometria_services import BiometriaService
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+
+class ReconciliacionBiometriaService:
+    """
+    Consulta en DECRIM los casos con webhook atrasado y actualiza la BD.
+
+    IMPORTANTE: los hilos solo hablan con DECRIM; el ORM de Django (logs y
+    transiciones) se usa unicamente en el hilo que llama a reconciliar().
+    """
+
+    ESTADOS_ABIERTOS = (PreRegistro.BIOMETRIA_PENDIENTE, PreRegistro.BIOMETRIA_EN_PROCESO)
+
+    def __init__(self, biometria_service=None):
+        """
+        Constructor del servicio.
+
+        Inicializa los plazos de reconciliacion desde settings.py
+        """
+        self.biometria_service = biometria_service or BiometriaService()
+        self.tras_minutos = int(getattr(settings, 'DECRIM_RECONCILIAR_TRAS_MIN', 10))
+        self.max_horas = int(getattr(settings, 'DECRIM_RECONCILIAR_MAX_HORAS', 48))
+        self.lote = int(getattr(settings, 'DECRIM_RECONCILIAR_LOTE', 100))
+        self.backoff_max_min = int(getattr(settings, 'DECRIM_RECONCILIAR_BACKOFF_MAX_MIN', 240))
+        # No tiene sentido usar mas hilos que conexiones en el pool HTTP
+        self.max_workers = max(1, min(
+            int(getattr(settings, 'DECRIM_RECONCILIAR_WORKERS', 4)),
+            int(getattr(settings, 'DECRIM_POOL_MAXSIZE', 10))
+        ))
+
+    def casos_atrasados(self):
+        """
+        Pre-registros abiertos con caso en DECRIM y sin cambios recientes,
+        del mas atrasado al mas reciente.
+
+        Los casos creados hace mas de DECRIM_RECONCILIAR_MAX_HORAS se
+        consideran abandonados y no se consultan.
+        """
+        ahora = timezone.now()
+        return (
+            PreRegistro.objects
+            .filter(
+                estado_biometria__in=self.ESTADOS_ABIERTOS,
+                idcaso_biometria__isnull=False,
+                vetado=False,
+                updated_at__lte=ahora - timedelta(minutes=self.tras_minutos),
+                created_at__gte=ahora - timedelta(hours=self.max_horas),
+            )
+            .exclude(idcaso_biometria='')
+            .order_by('updated_at')
+        )
+
+    @staticmethod
+    def _clave_backoff(preregistro_id):
+        return f"decrim:reconciliar:{preregistro_id}"
+
+    def casos_a_revisar(self, limite=None):
+        """
+        Casos atrasados cuyo backoff ya vencio (hasta `limite`).
+        """
+        limite = limite or self.lote
+        candidatos = list(self.casos_atrasados()[:limite * 10])
+        backoffs = cache.get_many([self._clave_backoff(caso.pk) for caso in candidatos])
+        ahora = time.time()
+        casos = []
+        for caso in candidatos:
+            backoff = backoffs.get(self._clave_backoff(caso.pk))
+            if backoff and backoff['proxima'] > ahora:
+                continue
+            casos.append(caso)
+            if len(casos) >= limite:
+                break
+        return casos
+
+    def _registrar_backoff(self, preregistro_id, caso):
+        """
+        Espacia la proxima revision del caso: tras_min * 2^n minutos (con
+        jitter, hasta DECRIM_RECONCILIAR_BACKOFF_MAX_MIN) mientras no cambie.
+        """
+        clave = self._clave_backoff(preregistro_id)
+        if caso['cambio'] and caso['estado'] not in self.ESTADOS_ABIERTOS:
+            cache.delete(clave)
+            return
+
+        revisiones = (cache.get(clave) or {}).get('revisiones', 0) + 1
+        espera_min = min(self.tras_minutos * (2 ** revisiones), self.backoff_max_min)
+        espera_s = espera_min * 60 * random.uniform(0.8, 1.2)
+        cache.set(
+            clave,
+            {'revisiones': revisiones, 'proxima': time.time() + espera_s},
+            self.max_horas * 3600
+        )
+
+    def reconciliar_caso(self, preregistro):
+        """
+        Consulta DECRIM para un caso y aplica el estado si cambio.
+
+        Returns:
+            dict: {
+                'preregistro_id', 'estado_anterior', 'estado',
+                'cambio': bool, 'error': str | None
+            }
+        """
+        resultado = self.biometria_service.consultar_estado_caso(
+            preregistro.numero_cedula,
+            preregistro.idcaso_biometria
+        )
+        self._registrar_intentos(preregistro, resultado)
+        return self.aplicar_resultado(preregistro, resultado)
+
+    def aplicar_resultado(self, preregistro, resultado):
+        """
+        Aplica al pre-registro el resultado de consultar_estado_caso().
+
+        `preregistro` se leyo antes de consultar DECRIM: la fila se vuelve a
+        leer con select_for_update y, si un webhook o el polling cambio el
+        estado mientras tanto, el resultado se descarta (omitido=True) para
+        no pisarlo ni contar dos veces un rechazo.
+        """
+        estado_anterior = preregistro.estado_biometria
+        cambio = False
+        omitido = False
+        error = None
+
+        if resultado.get('exitoso'):
+            estado_nuevo, _ = self.biometria_service.interpretar_estado(resultado.get('estado', ''))
+        elif resultado.get('estado') in ['NO_ENCONTRADO', 'EN_PROCESO']:
+            estado_nuevo = PreRegistro.BIOMETRIA_EN_PROCESO
+        else:
+            estado_nuevo = None
+            error = resultado.get('error', 'Error desconocido')
+
+        if estado_nuevo is not None:
+            with transaction.atomic():
+                actual = PreRegistro.objects.select_for_update().filter(pk=preregistro.pk).first()
+                if (
+                    actual is None
+                    or actual.estado_biometria != estado_anterior
+                    or actual.vetado != preregistro.vetado
+                ):
+                    omitido = True
+                elif resultado.get('exitoso'):
+                    cambio = actual.aplicar_estado_biometria(
+                        estado_nuevo,
+                        idcaso=resultado.get('idcaso'),
+                        justificacion=resultado.get('justificacion')
+                    )
+                elif actual.estado_biometria == PreRegistro.BIOMETRIA_PENDIENTE:
+                    cambio = actual.aplicar_estado_biometria(estado_nuevo)
+
+                if not omitido and not cambio:
+                    # Sin cambios: no volver a consultarlo hasta dentro de N minutos
+                    actual.save(update_fields=['updated_at'])
+            if actual is not None:
+                preregistro = actual
+
+        if omitido:
+            logger.info(
+                "Reconciliacion biometria %s omitida: el estado cambio durante la consulta (%s -> %s)",
+                preregistro.pk,
+                estado_anterior,
+                preregistro.estado_biometria
+            )
+        elif cambio:
+            logger.info(
+                "Reconciliacion biometria %s: %s -> %s",
+                preregistro.pk,
+                estado_anterior,
+                preregistro.estado_biometria
+            )
+            self.biometria_service.invalidar_estado_cache(
+                preregistro.pk,
+                numero_cedula=preregistro.numero_cedula,
+                idcaso=preregistro.idcaso_biometria
+            )
+
+        return {
+            'preregistro_id': preregistro.pk,
+            'estado_anterior': estado_anterior,
+            'estado': preregistro.estado_biometria,
+            'cambio': cambio,
+            'omitido': omitido,
+            'error': error,
+        }
+
+    @staticmethod
+    def _registrar_intentos(preregistro, resultado):
+        for intento in resultado.get('intentos', [resultado]):
+            LogIntegracion.objects.create(
+                preregistro=preregistro,
+                accion=LogIntegracion.ACCION_CONSULTA_BIOMETRIA,
+                exitoso=intento.get('exitoso', False),
+                request_data=dict(intento.get('request_data') or {}, origen='reconciliacion'),
+                response_data=intento.get('datos_completos', {}),
+                error_message=intento.get('error'),
+                tiempo_respuesta_ms=intento.get('tiempo_respuesta_ms')
+            )
+
+    def reconciliar(self, limite=None, max_workers=None):
+        """
+        Una pasada sobre los casos atrasados cuyo backoff vencio.
+
+        Args:
+            limite (int): Casos maximos (default DECRIM_RECONCILIAR_LOTE)
+            max_workers (int): Consultas HTTP simultaneas (default DECRIM_RECONCILIAR_WORKERS)
+
+        Returns:
+            dict: {
+                'revisados', 'actualizados', 'errores', 'duracion_ms',
+                'casos_por_segundo': float,
+                'atrasados': int (casos abiertos atrasados, incluidos en backoff),
+                'retraso_max_s' / 'retraso_promedio_s': segundos desde el
+                    ultimo cambio de los casos revisados,
+                'casos': [...]
+            }
+        """
+        inicio = time.monotonic()
+        casos_revisar = self.casos_a_revisar(limite)
+        ahora = timezone.now()
+        retrasos = [(ahora - caso.updated_at).total_seconds() for caso in casos_revisar]
+        casos = []
+
+        if casos_revisar:
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers or self.max_workers,
+                thread_name_prefix='reconciliar-decrim'
+            )
+            try:
+                futures = {
+                    executor.submit(
+                        self.biometria_service.consultar_estado_caso,
+                        preregistro.numero_cedula,
+                        preregistro.idcaso_biometria
+                    ): preregistro
+                    for preregistro in casos_revisar
+                }
+                # El ORM solo en este hilo, a medida que llegan las respuestas
+                for future in as_completed(futures):
+                    preregistro = futures[future]
+                    try:
+                        resultado = future.result()
+                        self._registrar_intentos(preregistro, resultado)
+                        caso = self.aplicar_resultado(preregistro, resultado)
+                    except Exception as e:
+                        logger.exception(f"Error reconciliando pre-registro {preregistro.pk}: {str(e)}")
+                        caso = {
+                            'preregistro_id': preregistro.pk,
+                            'estado_anterior': preregistro.estado_biometria,
+                            'estado': preregistro.estado_biometria,
+                            'cambio': False,
+                            'omitido': False,
+                            'error': f'Error inesperado: {str(e)}',
+                        }
+                    self._registrar_backoff(preregistro.pk, caso)
+                    casos.append(caso)
+            finally:
+                executor.shutdown(wait=True)
+
+        duracion = time.monotonic() - inicio
+        resumen = {
+            'revisados': len(casos),
+            'actualizados': sum(1 for caso in casos if caso['cambio']),
+            'errores': sum(1 for caso in casos if caso['error']),
+            'duracion_ms': int(duracion * 1000),
+            'casos_por_segundo': round(len(casos) / duracion, 2) if casos and duracion else 0,
+            'atrasados': self.casos_atrasados().count(),
+            'retraso_max_s': round(max(retrasos), 1) if retrasos else 0,
+            'retraso_promedio_s': round(sum(retrasos) / len(retrasos), 1) if retrasos else 0,
+            'casos': casos,
+        }
+        logger.info(
+            "Reconciliacion biometria: %s revisados, %s actualizados, %s errores, "
+            "%s casos/s, retraso max %s s, %s atrasados",
+            resumen['revisados'],
+            resumen['actualizados'],
+            resumen['errores'],
+            resumen['casos_por_segundo'],
+            resumen['retraso_max_s'],
+            resumen['atrasados']
+        )
+        return resumen
@@ -0,0 +1,271 @@
+# vinculacion/services/registro_decrim_services.py
+
+"""
+REGISTRO DEL CASO EN DECRIM (PASO 1)
+====================================
+Crea el caso en DECRIM para un pre-registro y guarda Idcaso y URL de
+validacion. Con DECRIM_REGISTRO_ASINCRONO=True el Paso 1 responde 202
+tras guardar el pre-registro y el registro corre en un grupo de hilos
+del proceso; el frontend toma `url_biometria` del detalle o del estado.
+
+Si el proceso se reinicia con registros en cola, quedan pendientes en la
+BD: `python manage.py recuperar_registros_decrim` los completa.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import LogIntegracion, PreRegistro
+from .biometria_services import BiometriaService
+from .limitador import obtener_limitador_decrim
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Grupo de hilos del proceso (se recrea tras un fork)
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _obtener_executor():
+    global _executor, _executor_pid
+
+    pid = os.getpid()
+    if _executor is not None and _executor_pid == pid:
+        return _executor
+    with _executor_lock:
+        if _executor is None or _executor_pid != pid:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(getattr(settings, 'DECRIM_REGISTRO_WORKERS', 4)),
+                thread_name_prefix='registro-decrim'
+            )
+            _executor_pid = pid
+    return _executor
+
+
+class RegistroDecrimService:
+    """
+    Crea el caso en DECRIM y aplica el resultado al pre-registro.
+    """
+
+    REGISTRO_PENDIENTE = 'PENDIENTE'
+    REGISTRO_ERROR = 'ERROR'
+
+    def __init__(self, biometria_service=None):
+        """
+        Constructor del servicio.
+
+        Inicializa los plazos de recuperacion desde settings.py
+        """
+        self.biometria_service = biometria_service or BiometriaService()
+        self.recuperar_tras_s = int(getattr(settings, 'DECRIM_REGISTRO_RECUPERAR_TRAS_S', 120))
+        self.lote = int(getattr(settings, 'DECRIM_RECONCILIAR_LOTE', 100))
+        # Un reclamo dura mas que la llamada mas lenta (espera del limitador
+        # incluida); vencido, la recuperacion puede volver a tomarlo
+        self.reclamo_s = max(
+            self.recuperar_tras_s,
+            sum(self.biometria_service.timeout) + obtener_limitador_decrim('registro').espera_max + 10
+        )
+
+    @staticmethod
+    def _sin_caso():
+        return (
+            (Q(idcaso_biometria__isnull=True) | Q(idcaso_biometria=''))
+            & (Q(url_biometria__isnull=True) | Q(url_biometria=''))
+        )
+
+    @classmethod
+    def estado_registro(cls, preregistro):
+        """
+        Estado del registro en DECRIM de un pre-registro sin caso.
+
+        Returns:
+            str | None: PENDIENTE (en cola o en curso), ERROR (fallo; el
+            detalle esta en mensaje_error) o None si ya tiene caso
+        """
+        if preregistro.idcaso_biometria or preregistro.url_biometria:
+            return None
+        if preregistro.estado_biometria != PreRegistro.BIOMETRIA_PENDIENTE or preregistro.vetado:
+            return None
+        if preregistro.estado_vinculacion == PreRegistro.ESTADO_INICIADO:
+            return cls.REGISTRO_PENDIENTE
+        if preregistro.estado_vinculacion == PreRegistro.ESTADO_ERROR:
+            return cls.REGISTRO_ERROR
+        return None
+
+    def aplicar_resultado(self, preregistro, resultado):
+        """
+        Registra la llamada en LogIntegracion y guarda Idcaso y URL, o
+        marca el error.
+
+        Una llamada frenada por el limitador no marca error: el
+        pre-registro sigue pendiente de registro.
+
+        Returns:
+            bool: True si el caso quedo creado
+        """
+        if resultado.get('limitado'):
+            logger.warning(f"Registro DECRIM del pre-registro {preregistro.pk} frenado por el limitador")
+            return False
+
+        LogIntegracion.objects.create(
+            preregistro=preregistro,
+            accion=LogIntegracion.ACCION_REGISTRO_DECRIM,
+            exitoso=resultado.get('exitoso', False),
+            request_data=resultado.get('request_data', {}),
+            response_data=resultado.get('response_data', {}),
+            error_message=resultado.get('error')
+        )
+
+        if not resultado.get('exitoso') or not resultado.get('url'):
+            preregistro.marcar_error(
+                resultado.get('error', 'Error creando registro en DECRIM')
+            )
+            return False
+
+        preregistro.idcaso_biometria = resultado.get('codigo')
+        preregistro.url_biometria = resultado.get('url')
+        preregistro.estado_biometria = PreRegistro.BIOMETRIA_EN_PROCESO
+        preregistro.save(update_fields=[
+            'idcaso_biometria',
+            'url_biometria',
+            'estado_biometria',
+            'updated_at'
+        ])
+        return True
+
+    def _pendiente(self):
+        return Q(
+            self._sin_caso(),
+            estado_biometria=PreRegistro.BIOMETRIA_PENDIENTE,
+            estado_vinculacion=PreRegistro.ESTADO_INICIADO,
+            vetado=False,
+        )
+
+    def _sin_reclamo(self, ahora):
+        return (
+            Q(registro_decrim_reclamado__isnull=True)
+            | Q(registro_decrim_reclamado__lte=ahora - timedelta(seconds=self.reclamo_s))
+        )
+
+    def _reclamar(self, preregistro_id):
+        """
+        Toma el pre-registro con un UPDATE condicional: solo un worker (de
+        este u otro proceso) ve una fila actualizada.
+
+        Returns:
+            datetime | None: Marca del reclamo, o None si no quedo pendiente
+            o ya lo tiene otro worker
+        """
+        ahora = timezone.now()
+        actualizados = (
+            PreRegistro.objects
+            .filter(self._pendiente(), self._sin_reclamo(ahora), pk=preregistro_id)
+            .update(registro_decrim_reclamado=ahora)
+        )
+        return ahora if actualizados == 1 else None
+
+    def _liberar(self, preregistro_id, reclamo):
+        # Solo el reclamo propio: si vencio y otro worker lo tomo, no tocarlo
+        PreRegistro.objects.filter(
+            pk=preregistro_id,
+            registro_decrim_reclamado=reclamo
+        ).update(registro_decrim_reclamado=None)
+
+    def registrar(self, preregistro_id):
+        """
+        Crea el caso en DECRIM si el pre-registro sigue sin caso.
+
+        El pre-registro se reclama en la BD antes de llamar a DECRIM, asi
+        la cola y la recuperacion (en cualquier worker) no crean dos casos.
+
+        Returns:
+            dict: {'preregistro_id', 'exitoso', 'omitido': bool, 'error'}
+        """
+        resumen = {'preregistro_id': preregistro_id, 'exitoso': False, 'omitido': False, 'error': None}
+
+        reclamo = self._reclamar(preregistro_id)
+        if reclamo is None:
+            resumen['omitido'] = True
+            return resumen
+
+        try:
+            preregistro = PreRegistro.objects.get(pk=preregistro_id)
+            resultado = self.biometria_service.crear_registro_decrim(
+                preregistro.numero_cedula,
+                preregistro.tipo_documento,
+                preregistro.nombres_completos
+            )
+            resumen['exitoso'] = self.aplicar_resultado(preregistro, resultado)
+            if not resumen['exitoso']:
+                resumen['error'] = resultado.get('error') or preregistro.mensaje_error
+        finally:
+            self._liberar(preregistro_id, reclamo)
+
+        if resumen['exitoso']:
+            logger.info(f"Caso DECRIM creado en segundo plano: pre-registro ID={preregistro_id}")
+        else:
+            logger.warning(f"No se pudo crear el caso DECRIM del pre-registro {preregistro_id}: {resumen['error']}")
+        return resumen
+
+    def _registrar_en_hilo(self, preregistro_id):
+        # Hilo del executor: conexiones de BD propias, cerrarlas si caducaron
+        close_old_connections()
+        try:
+            return self.registrar(preregistro_id)
+        except Exception as e:
+            logger.exception(f"Error registrando en DECRIM el pre-registro {preregistro_id}: {str(e)}")
+        finally:
+            close_old_connections()
+
+    def encolar(self, preregistro):
+        """
+        Programa el registro en DECRIM en el grupo de hilos del proceso,
+        despues del commit de la transaccion actual (si la hay).
+        """
+        preregistro_id = preregistro.pk
+        transaction.on_commit(
+            lambda: _obtener_executor().submit(self._registrar_en_hilo, preregistro_id)
+        )
+
+    def pendientes(self):
+        """
+        Pre-registros sin caso en DECRIM y sin cambios hace
+        DECRIM_REGISTRO_RECUPERAR_TRAS_S segundos (cola perdida) que ningun
+        worker tiene reclamados.
+        """
+        ahora = timezone.now()
+        return (
+            PreRegistro.objects
+            .filter(
+                self._pendiente(),
+                self._sin_reclamo(ahora),
+                updated_at__lte=ahora - timedelta(seconds=self.recuperar_tras_s),
+            )
+            .order_by('updated_at')
+        )
+
+    def recuperar(self, limite=None):
+        """
+        Completa en el hilo actual los registros pendientes.
+
+        Returns:
+            dict: {'revisados', 'creados', 'errores', 'omitidos', 'casos': [...]}
+        """
+        casos = [self.registrar(pk) for pk in self.pendientes().values_list('pk', flat=True)[:limite or self.lote]]
+        return {
+            'revisados': len(casos),
+            'creados': sum(1 for caso in casos if caso['exitoso']),
+            'errores': sum(1 for caso in casos if caso['error']),
+            'omitidos': sum(1 for caso in casos if caso['omitido']),
+            'casos': casos,
+        }
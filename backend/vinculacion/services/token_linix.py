@@ -0,0 +1,242 @@
+# vinculacion/services/token_linix.py
+
+"""
+TOKEN DE ACCESO A LINIX (COMPARTIDO ENTRE WORKERS)
+==================================================
+El bearer token de LINIX vive en el cache de Django junto con su hora de
+obtencion y de expiracion, asi todos los workers (con un cache compartido:
+Redis, Memcached o BD) usan el mismo token.
+
+- Solo un refresco a la vez: dentro del proceso las llamadas se agrupan
+  (SingleFlight) y entre workers un lock corto en el cache deja que solo
+  uno llame a /token/; los demas esperan el token que publica.
+- Refresco anticipado: pasado `expires_in - LINIX_TOKEN_CACHE_SAFETY_SECONDS`
+  se sigue devolviendo el token vigente y un hilo del proceso pide el
+  nuevo en segundo plano. Solo se espera el refresco si no hay token o si
+  LINIX lo rechazo (401/403).
+"""
+
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from .coordinacion import SingleFlight, bloqueo_compartido
+from .metricas import registrar_exportador
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Un token a menos de estos segundos de expirar ya no se entrega
+_MARGEN_EXPIRA_S = 5
+
+
+class GestorTokenLinix:
+    """
+    Lectura, refresco coordinado y refresco anticipado del token LINIX.
+    """
+
+    def __init__(self, clave_cache, margen_refresco_s=60):
+        """
+        Args:
+            clave_cache (str): Clave del token en el cache (LINIX_TOKEN_CACHE_KEY)
+            margen_refresco_s (int): Segundos antes de expirar en que se
+                refresca en segundo plano (LINIX_TOKEN_CACHE_SAFETY_SECONDS)
+        """
+        self.clave_cache = clave_cache
+        self.margen_refresco_s = int(margen_refresco_s)
+        self._vuelos = SingleFlight('token_linix')
+        self._lock = threading.Lock()
+        self._hilo_refresco = None
+        self._contadores = {
+            'desde_cache': 0,
+            'refrescos': 0,
+            'refrescos_anticipados': 0,
+            'errores': 0,
+        }
+
+    def _contar(self, contador):
+        with self._lock:
+            self._contadores[contador] += 1
+
+    def _leer(self):
+        """
+        Entrada vigente del cache o None.
+
+        Returns:
+            dict | None: {'token', 'obtenido', 'refrescar_en', 'expira'}
+        """
+        try:
+            entrada = cache.get(self.clave_cache)
+        except Exception as e:
+            logger.warning("No se pudo leer el token LINIX del cache: %s", e)
+            return None
+        if not entrada:
+            return None
+        if isinstance(entrada, str):
+            # Formato anterior (solo el token): vigente hasta su TTL en el cache
+            return {'token': entrada, 'obtenido': None, 'refrescar_en': None, 'expira': None}
+        if entrada.get('expira') and time.time() >= entrada['expira'] - _MARGEN_EXPIRA_S:
+            return None
+        return entrada
+
+    def _guardar(self, token, expires_in):
+        ahora = time.time()
+        expires_in = max(int(expires_in), 1)
+        entrada = {
+            'token': token,
+            'obtenido': ahora,
+            'refrescar_en': ahora + max(expires_in - self.margen_refresco_s, expires_in / 2),
+            'expira': ahora + expires_in,
+        }
+        try:
+            cache.set(self.clave_cache, entrada, expires_in)
+        except Exception as e:
+            logger.warning("No se pudo guardar el token LINIX en el cache: %s", e)
+        return entrada
+
+    def _pedir(self, solicitar):
+        token, expires_in = solicitar()
+        self._contar('refrescos')
+        return self._guardar(token, expires_in)
+
+    def obtener(self, solicitar, timeout=30, forzar=False, token_rechazado=None):
+        """
+        Token LINIX vigente; lo pide al core solo si hace falta.
+
+        Args:
+            solicitar (callable): Llamada a /token/ -> (access_token, expires_in)
+            timeout (float): Segundos maximos de la llamada a /token/
+            forzar (bool): Ignorar el token del cache (LINIX respondio 401/403)
+            token_rechazado (str): Token que LINIX rechazo; si otro worker
+                ya lo reemplazo se usa el nuevo sin volver a pedirlo
+
+        Returns:
+            str: access_token
+        """
+        if not forzar:
+            entrada = self._leer()
+            if entrada is not None:
+                self._contar('desde_cache')
+                if entrada['refrescar_en'] and time.time() >= entrada['refrescar_en']:
+                    self._refrescar_en_segundo_plano(solicitar, timeout)
+                return entrada['token']
+
+        clave = f"forzado:{token_rechazado}" if forzar else 'vigente'
+        entrada, _ = self._vuelos.ejecutar(
+            clave,
+            lambda: self._refrescar(solicitar, timeout, forzar, token_rechazado)
+        )
+        return entrada['token']
+
+    def _refrescar(self, solicitar, timeout, forzar, token_rechazado):
+        """
+        Refresco sincrono: un solo worker pide el token, los demas esperan
+        a que lo publique.
+        """
+        with bloqueo_compartido(
+            f"{self.clave_cache}:refresco",
+            ttl=timeout + 10,
+            espera=timeout + 5,
+            intervalo=0.05
+        ) as obtenido:
+            entrada = self._leer()
+            if entrada is not None and (
+                not forzar or (token_rechazado is not None and entrada['token'] != token_rechazado)
+            ):
+                # Otro worker lo refresco mientras se esperaba el lock
+                return entrada
+            if not obtenido:
+                logger.warning("Lock de refresco del token LINIX ocupado: se pide sin coordinar")
+            try:
+                return self._pedir(solicitar)
+            except Exception:
+                self._contar('errores')
+                raise
+
+    def _refrescar_en_segundo_plano(self, solicitar, timeout):
+        with self._lock:
+            if self._hilo_refresco is not None and self._hilo_refresco.is_alive():
+                return
+            self._hilo_refresco = threading.Thread(
+                target=self._refresco_anticipado,
+                args=(solicitar, timeout),
+                name='token-linix',
+                daemon=True
+            )
+            self._hilo_refresco.start()
+
+    def _refresco_anticipado(self, solicitar, timeout):
+        # Hilo propio: con DatabaseCache abre su conexion, cerrarla al final
+        try:
+            with bloqueo_compartido(f"{self.clave_cache}:refresco", ttl=timeout + 10) as obtenido:
+                if not obtenido:
+                    # Otro worker ya lo esta refrescando
+                    return
+                entrada = self._leer()
+                if entrada is not None and entrada['refrescar_en'] and time.time() < entrada['refrescar_en']:
+                    return
+                self._pedir(solicitar)
+                self._contar('refrescos_anticipados')
+                logger.info("Token LINIX refrescado en segundo plano")
+        except Exception as e:
+            # El token anterior sigue vigente; se reintenta en la proxima llamada
+            self._contar('errores')
+            logger.warning("No se pudo refrescar el token LINIX en segundo plano: %s", e)
+        finally:
+            close_old_connections()
+
+    def estadisticas(self):
+        with self._lock:
+            contadores = dict(self._contadores)
+        entrada = self._leer()
+        ahora = time.time()
+        return dict(
+            contadores,
+            clave_cache=self.clave_cache,
+            vigente=entrada is not None,
+            expira_en_s=round(entrada['expira'] - ahora, 1) if entrada and entrada['expira'] else None,
+            refrescar_en_s=(
+                round(entrada['refrescar_en'] - ahora, 1) if entrada and entrada['refrescar_en'] else None
+            ),
+        )
+
+
+_gestores = {}
+_gestores_lock = threading.Lock()
+
+
+def obtener_gestor_token(clave_cache, margen_refresco_s=60):
+    """
+    GestorTokenLinix del proceso para `clave_cache`.
+    """
+    gestor = _gestores.get(clave_cache)
+    if gestor is None:
+        with _gestores_lock:
+            gestor = _gestores.setdefault(clave_cache, GestorTokenLinix(clave_cache, margen_refresco_s))
+    return gestor
+
+
+def _exportar_prometheus():
+    with _gestores_lock:
+        gestores = list(_gestores.values())
+    if not gestores:
+        return []
+
+    lineas = [
+        '# HELP vinculacion_linix_token_total Lecturas y refrescos del token LINIX en este proceso.',
+        '# TYPE vinculacion_linix_token_total counter',
+    ]
+    for gestor in gestores:
+        datos = gestor.estadisticas()
+        for evento in ('desde_cache', 'refrescos', 'refrescos_anticipados', 'errores'):
+            lineas.append(
+                f'vinculacion_linix_token_total{{clave="{datos["clave_cache"]}",evento="{evento}"}} '
+                f'{datos[evento]}'
+            )
+    return lineas
+
+
+registrar_exportador(_exportar_prometheus)
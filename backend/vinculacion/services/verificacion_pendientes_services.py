@@ -0,0 +1,201 @@
+# vinculacion/services/verificacion_pendientes_services.py
+
+"""
+MOTOR DE VERIFICACION DE PENDIENTES EN LINIX
+============================================
+Reparte la verificacion de SP_FLUJOEXITOSO de muchos preregistros
+entre un grupo acotado de hilos, con un plazo por lote, un plazo por
+cedula y un presupuesto total, para que el endpoint de n8n responda
+siempre antes del proxy_read_timeout de nginx.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from django.conf import settings
+
+from .linix_services import LinixService
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+
+class VerificacionPendientesService:
+    """
+    Verifica en paralelo el flujo de vinculacion de varias cedulas.
+
+    Las cedulas se dividen en lotes (cada lote es un solo round trip con
+    LinixService.verificar_flujos) que se ejecutan en un ThreadPoolExecutor.
+    Cada lote tiene su propio plazo (call_timeout de la sesion Oracle), que
+    empieza a correr cuando un hilo lo toma, no al encolarlo. Si un lote
+    agota su plazo, sus cedulas se reintentan una por una con el plazo por
+    cedula: una sesion colgada solo hace fallar a su propia cedula.
+
+    La espera total nunca supera el presupuesto configurado: lo que no
+    termino a tiempo se reporta como timeout, separado de los errores.
+
+    IMPORTANTE: los hilos solo hablan con Oracle; el ORM de Django se usa
+    unicamente en el hilo de la vista.
+    """
+
+    def __init__(self, linix_service=None):
+        """
+        Constructor del servicio.
+
+        Inicializa los limites de concurrencia y tiempo desde settings.py
+        """
+        self.linix_service = linix_service or LinixService()
+        # No tiene sentido usar mas hilos que sesiones en el pool del proceso
+        self.max_workers = max(1, min(
+            int(getattr(settings, 'LINIX_VERIFICACION_WORKERS', 4)),
+            int(getattr(settings, 'ORACLE_POOL_MAX', 4))
+        ))
+        self.tamano_lote = max(1, int(getattr(settings, 'LINIX_VERIFICACION_TAMANO_LOTE', 10)))
+        self.timeout_lote = float(getattr(settings, 'LINIX_VERIFICACION_TIMEOUT_LOTE', 20))
+        self.timeout_cedula = float(getattr(settings, 'LINIX_VERIFICACION_TIMEOUT_CEDULA', 10))
+        self.presupuesto = float(getattr(settings, 'LINIX_VERIFICACION_PRESUPUESTO', 90))
+
+    def _lotes(self, cedulas):
+        for inicio in range(0, len(cedulas), self.tamano_lote):
+            yield cedulas[inicio:inicio + self.tamano_lote]
+
+    @staticmethod
+    def _resultado_timeout(mensaje):
+        return {
+            'exitoso': False,
+            'timeout': True,
+            'error': mensaje
+        }
+
+    def _verificar_lote(self, lote, limite, plazo_max):
+        """
+        Corre en un hilo del executor: el plazo se calcula al empezar, con
+        lo que queda del presupuesto en ese momento.
+        """
+        restante = limite - time.monotonic()
+        if restante <= 0:
+            return {
+                cedula: self._resultado_timeout(
+                    'Presupuesto de verificacion agotado antes de consultar Oracle'
+                )
+                for cedula in lote
+            }
+        plazo = min(plazo_max, restante)
+        # limite: la espera por una sesion del pool tambien cuenta, asi el
+        # hilo nunca retiene la sesion mas alla del presupuesto
+        return self.linix_service.verificar_flujos(
+            lote,
+            call_timeout_ms=max(int(plazo * 1000), 1),
+            limite=time.monotonic() + plazo
+        )
+
+    def verificar(self, cedulas):
+        """
+        Verifica todas las cedulas respetando el presupuesto total.
+
+        Args:
+            cedulas (list): Cedulas a verificar
+
+        Returns:
+            dict: {
+                'resultados': {cedula: resultado},
+                'timeouts': [cedula, ...],
+                'sin_terminar': int,
+                'duracion_ms': int
+            }
+            Los resultados tienen la forma de verificar_flujo_vinculacion();
+            las cedulas en 'timeouts' llevan 'timeout': True en su resultado.
+            'sin_terminar' cuenta los lotes que seguian en Oracle al agotarse
+            el presupuesto (su call_timeout los corta en ese mismo limite).
+        """
+        inicio = time.monotonic()
+        limite = inicio + self.presupuesto
+        cedulas = list(dict.fromkeys(str(c).strip() for c in cedulas if c))
+        resultados = {}
+
+        if not cedulas:
+            return {'resultados': resultados, 'timeouts': [], 'sin_terminar': 0, 'duracion_ms': 0}
+
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='verificacion-linix'
+        )
+        pendientes = {}
+
+        def enviar(lote, plazo_max):
+            future = executor.submit(self._verificar_lote, lote, limite, plazo_max)
+            pendientes[future] = lote
+
+        try:
+            for lote in self._lotes(cedulas):
+                enviar(lote, self.timeout_lote)
+
+            while pendientes:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                terminados, _ = wait(pendientes, timeout=restante, return_when=FIRST_COMPLETED)
+                for future in terminados:
+                    lote = pendientes.pop(future)
+                    try:
+                        resultados_lote = future.result()
+                    except Exception as e:
+                        logger.exception(f"Error inesperado verificando lote: {str(e)}")
+                        for cedula in lote:
+                            resultados[cedula] = {
+                                'exitoso': False,
+                                'error': f'Error inesperado: {str(e)}'
+                            }
+                        continue
+
+                    resultados.update(resultados_lote)
+                    vencidas = [
+                        cedula for cedula in lote
+                        if resultados_lote.get(cedula, {}).get('timeout')
+                    ]
+                    if len(lote) > 1 and vencidas and limite - time.monotonic() > 0:
+                        # Reintentar una por una: aislar la cedula que cuelga el lote
+                        logger.warning(
+                            "Lote de %s cedulas vencio su plazo; reintentando %s una por una",
+                            len(lote),
+                            len(vencidas)
+                        )
+                        for cedula in vencidas:
+                            enviar([cedula], self.timeout_cedula)
+        finally:
+            # No esperar a los lotes colgados: su call_timeout los liberara
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        sin_terminar = sum(1 for future in pendientes if future.running())
+        if sin_terminar:
+            logger.warning(
+                "Presupuesto de verificacion agotado con %s lotes aun en Oracle; "
+                "sus sesiones se liberan al vencer su call_timeout",
+                sin_terminar
+            )
+
+        for lote in pendientes.values():
+            for cedula in lote:
+                resultados[cedula] = self._resultado_timeout(
+                    'Presupuesto de verificacion agotado antes de obtener respuesta de Oracle'
+                )
+
+        timeouts = [
+            cedula for cedula in cedulas
+            if resultados.get(cedula, {}).get('timeout')
+        ]
+        duracion_ms = int((time.monotonic() - inicio) * 1000)
+        logger.info(
+            "Verificacion de pendientes: %s cedulas, %s timeouts, %s ms",
+            len(cedulas),
+            len(timeouts),
+            duracion_ms
+        )
+
+        return {
+            'resultados': resultados,
+            'timeouts': timeouts,
+            'sin_terminar': sin_terminar,
+            'duracion_ms': duracion_ms
+        }
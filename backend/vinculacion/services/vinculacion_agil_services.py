@@ -7,7 +7,9 @@ from decimal import Decimal, InvalidOperation
 
 import requests
 from django.conf import settings
-from django.core.cache import cache
+
+from .http_pool import obtener_sesion_http
+from .token_linix import obtener_gestor_token
 
 logger = logging.getLogger(__name__)
 
@@ -79,6 +81,16 @@ class VinculacionAgilService:
         self.catalog_defaults = getattr(settings, "LINIX_CATALOG_DEFAULTS", {})
         self.linix_dry_run = bool(getattr(settings, "LINIX_DRY_RUN", False) and settings.DEBUG)
         self.request_verify = self.ca_bundle if self.ca_bundle else self.verify_ssl
+        # Sesion HTTP compartida por el proceso: token y vinculacion reutilizan
+        # la conexion TLS con LINIX (el reintento por 401/403 no abre otra)
+        self.session = obtener_sesion_http(
+            "linix_api",
+            pool_connections=int(getattr(settings, "LINIX_POOL_CONNECTIONS", 2)),
+            pool_maxsize=int(getattr(settings, "LINIX_POOL_MAXSIZE", 10)),
+            pool_block=bool(getattr(settings, "LINIX_POOL_BLOCK", False)),
+            keepalive=bool(getattr(settings, "LINIX_KEEPALIVE", True)),
+            verify=self.request_verify,
+        )
         self.sucursal_map = DEFAULT_SUCURSAL_MAP
 
     def _build_url(self, path):
@@ -324,15 +336,28 @@ class VinculacionAgilService:
 
         return trama
 
-    def get_linix_token(self, force_refresh=False):
+    def get_linix_token(self, force_refresh=False, token_rechazado=None):
         """
-        Obtiene token desde cache y si no existe/expira, lo solicita al core.
+        Obtiene el token compartido entre workers (ver token_linix.py).
+
+        Con force_refresh (LINIX rechazo el token) se pide uno nuevo, salvo
+        que otro worker ya haya reemplazado `token_rechazado`.
         """
-        if not force_refresh:
-            cached = cache.get(self.token_cache_key)
-            if cached:
-                return cached
+        gestor = obtener_gestor_token(self.token_cache_key, self.token_safety_seconds)
+        return gestor.obtener(
+            self._solicitar_token_linix,
+            timeout=self.timeout,
+            forzar=force_refresh,
+            token_rechazado=token_rechazado
+        )
 
+    def _solicitar_token_linix(self):
+        """
+        Solicita un token nuevo al core.
+
+        Returns:
+            tuple: (access_token, expires_in)
+        """
         if not self.client_id or not self.client_secret:
             raise VinculacionAgilError("Credenciales LINIX incompletas en configuracion.")
 
@@ -343,7 +368,7 @@ class VinculacionAgilService:
         }
         logger.info("Solicitando token LINIX a %s", token_url)
         try:
-            response = requests.post(
+            response = self.session.post(
                 token_url,
                 json=payload,
                 timeout=self.timeout,
@@ -382,9 +407,7 @@ class VinculacionAgilService:
                 data.get("message") or f"Error LINIX token result={result_code}."
             )
 
-        ttl = max(expires_in - self.token_safety_seconds, 60)
-        cache.set(self.token_cache_key, access_token, ttl)
-        return access_token
+        return access_token, expires_in
 
     def send_linix_vinculacion(self, payload):
         """
@@ -405,7 +428,7 @@ class VinculacionAgilService:
 
         def _do_request(current_token):
             try:
-                return requests.post(
+                return self.session.post(
                     vinc_url,
                     json=payload,
                     headers={
@@ -429,7 +452,7 @@ class VinculacionAgilService:
 
         response = _do_request(token)
         if response.status_code in {401, 403}:
-            token = self.get_linix_token(force_refresh=True)
+            token = self.get_linix_token(force_refresh=True, token_rechazado=token)
             response = _do_request(token)
 
         try:
@@ -0,0 +1,64 @@
+# vinculacion/tests/test_archivos_biometria.py
+
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from vinculacion.models import PreRegistro
+from vinculacion.services import BiometriaService
+
+SHA = 'a' * 64
+RESULTADO_DECRIM = {
+    'exitoso': True,
+    'archivos': [{'campo': 'data.Certificado', 'sha256': SHA, 'bytes': 10, 'tipo': 'application/pdf'}],
+    'datos_completos': {},
+    'request_data': {},
+}
+
+
+class ArchivosBiometriaTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.preregistro = PreRegistro.objects.create(
+            numero_cedula='1000000002',
+            nombres_completos='PRUEBA ARCHIVOS',
+            tipo_documento=1,
+            fecha_expedicion=date(2010, 1, 1),
+            idcaso_biometria='9',
+        )
+        self.url = reverse('vinculacion:preregistro-archivos-biometria', args=[self.preregistro.pk])
+        self.staff = get_user_model().objects.create_user('analista', password='x', is_staff=True)
+
+    def test_anonimo_no_accede(self):
+        with mock.patch.object(BiometriaService, 'consultar_caso_por_dni') as consultar:
+            respuesta = self.client.get(self.url)
+            archivo = self.client.get(
+                reverse('vinculacion:preregistro-archivo-biometria', args=[self.preregistro.pk, SHA])
+            )
+
+        self.assertEqual(respuesta.status_code, 403)
+        self.assertEqual(archivo.status_code, 403)
+        consultar.assert_not_called()
+
+    def test_usuario_sin_staff_no_accede(self):
+        self.client.force_login(get_user_model().objects.create_user('ciudadano', password='x'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_actualizar_limitado_por_caso(self):
+        self.client.force_login(self.staff)
+        with mock.patch.object(BiometriaService, 'consultar_caso_por_dni', return_value=RESULTADO_DECRIM) as consultar:
+            primera = self.client.get(self.url)
+            segunda = self.client.get(self.url, {'actualizar': '1'})
+            sin_actualizar = self.client.get(self.url)
+
+        self.assertEqual(primera.status_code, 200)
+        self.assertEqual(primera.json()['archivos'][0]['sha256'], SHA)
+        self.assertEqual(segunda.status_code, 429)
+        self.assertIn('Retry-After', segunda)
+        self.assertEqual(sin_actualizar.status_code, 200)
+        self.assertEqual(consultar.call_count, 1)
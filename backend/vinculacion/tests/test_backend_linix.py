@@ -0,0 +1,24 @@
+# vinculacion/tests/test_backend_linix.py
+
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from vinculacion.services import linix_services
+
+
+class ObtenerBackendTests(SimpleTestCase):
+
+    @override_settings(DEBUG=False, LINIX_BACKEND='local', LINIX_LOCAL_SIN_DEBUG=False)
+    def test_local_sin_debug_usa_oracle(self):
+        self.assertIs(linix_services.obtener_backend(), linix_services._backend_oracle)
+
+    @override_settings(DEBUG=True, LINIX_BACKEND='local')
+    def test_local_con_debug_usa_el_simulador(self):
+        with mock.patch('vinculacion.services.linix_local.obtener_backend_local') as local:
+            self.assertIs(linix_services.obtener_backend(), local.return_value)
+
+    @override_settings(DEBUG=False, LINIX_BACKEND='local', LINIX_LOCAL_SIN_DEBUG=True)
+    def test_local_confirmado_sin_debug_usa_el_simulador(self):
+        with mock.patch('vinculacion.services.linix_local.obtener_backend_local') as local:
+            self.assertIs(linix_services.obtener_backend(), local.return_value)
@@ -0,0 +1,158 @@
+# vinculacion/tests/test_cobertura_decrim.py
+
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from vinculacion.services import biometria_services
+from vinculacion.services.biometria_services import BiometriaService
+from vinculacion.services.cobertura import CoberturaSolicitudes
+from vinculacion.services.limitador import LimitadorTokens
+
+PERMITIDO = {'permitido': True, 'espera_s': 0.0, 'motivo': None}
+
+
+@override_settings(DECRIM_COBERTURA=True, DECRIM_COBERTURA_MAX_EN_CURSO=1)
+class CoberturaSincronaTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cobertura = mock.Mock()
+        self.cobertura.retardo_s.return_value = 0.02
+        self.cobertura.tomar_cobertura.return_value = True
+        self.limitador = mock.Mock()
+        self.limitador.adquirir.return_value = PERMITIDO
+        self.llamadas = []
+        self.lentas = threading.Event()
+
+        parches = [
+            mock.patch.object(BiometriaService, '_cobertura', return_value=self.cobertura),
+            mock.patch.object(BiometriaService, '_post_consulta', side_effect=self._post),
+            mock.patch.object(biometria_services, 'obtener_limitador_decrim', return_value=self.limitador),
+            # Cupo nuevo con DECRIM_COBERTURA_MAX_EN_CURSO de la prueba
+            mock.patch.object(biometria_services, '_cupo_coberturas', None),
+        ]
+        for parche in parches:
+            parche.start()
+            self.addCleanup(parche.stop)
+        self.addCleanup(self.lentas.set)
+        self.servicio = BiometriaService()
+
+    def _post(self, payload, payload_safe, timeout):
+        numero = len(self.llamadas)
+        self.llamadas.append(numero)
+        if numero % 2 == 0:
+            # Primaria lenta: solo termina al liberar la prueba
+            self.lentas.wait(5)
+            return {'exitoso': True, 'llamada': numero}
+        return {'exitoso': True, 'llamada': numero}
+
+    def _consultar(self):
+        return self.servicio._post_consulta_cubierta({}, {}, 5)
+
+    def test_cobertura_gana_a_la_primaria_lenta(self):
+        resultado = self._consultar()
+
+        self.assertEqual(resultado['cobertura'], 'cobertura')
+        self.assertEqual(len(self.llamadas), 2)
+        self.limitador.adquirir.assert_called_once_with(espera_max=0)
+        self.cobertura.registrar_cobertura.assert_called_once_with()
+        self.cobertura.devolver_cobertura.assert_not_called()
+
+    def test_sin_token_no_cubre(self):
+        self.limitador.adquirir.return_value = {'permitido': False, 'espera_s': 1.0, 'motivo': 'limite'}
+        # La primaria sigue lenta: se llega a pedir el token
+        threading.Timer(0.2, self.lentas.set).start()
+
+        resultado = self._consultar()
+
+        self.assertNotIn('cobertura', resultado)
+        self.assertEqual(len(self.llamadas), 1)
+        self.cobertura.devolver_cobertura.assert_called_once_with()
+        self.cobertura.registrar_cobertura.assert_not_called()
+
+    def test_permiso_sin_cache_no_cubre(self):
+        self.limitador.adquirir.return_value = {'permitido': True, 'espera_s': 0.0, 'motivo': 'sin_cache'}
+        threading.Timer(0.2, self.lentas.set).start()
+
+        self._consultar()
+
+        self.assertEqual(len(self.llamadas), 1)
+        self.limitador.adquirir.assert_called_once_with(espera_max=0)
+        self.cobertura.devolver_cobertura.assert_called_once_with()
+
+    def test_perdedora_en_vuelo_retiene_el_cupo(self):
+        self.assertEqual(self._consultar()['cobertura'], 'cobertura')
+
+        # La primaria perdedora sigue en curso: la siguiente consulta no se cubre
+        consulta = threading.Thread(target=self._consultar)
+        consulta.start()
+        time.sleep(0.1)
+        self.assertEqual(len(self.llamadas), 3)
+        self.assertEqual(self.limitador.adquirir.call_count, 1)
+
+        self.lentas.set()
+        consulta.join(5)
+        self.assertTrue(biometria_services._obtener_cupo_coberturas().acquire(timeout=1))
+
+
+@override_settings(DECRIM_COBERTURA=True)
+class CoberturaAsyncTests(TransactionTestCase):
+    """
+    Cobertura async con el cache por defecto (DatabaseCache): el token del
+    limitador se pide con adquirir_async, fuera del event loop.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.cobertura = CoberturaSolicitudes('prueba_async', min_ms=10, max_fraccion=1, min_muestras=1)
+        self.cobertura.observar(10)
+        self.limitador = LimitadorTokens('prueba_cobertura_async', por_minuto=60, rafaga=1)
+        self.llamadas = []
+
+        parches = [
+            mock.patch.object(BiometriaService, '_cobertura', return_value=self.cobertura),
+            mock.patch.object(BiometriaService, '_post_consulta_async', side_effect=self._post),
+            mock.patch.object(biometria_services, 'obtener_limitador_decrim', return_value=self.limitador),
+        ]
+        for parche in parches:
+            parche.start()
+            self.addCleanup(parche.stop)
+        self.servicio = BiometriaService()
+
+    async def _post(self, payload, payload_safe, timeout):
+        numero = len(self.llamadas)
+        self.llamadas.append(numero)
+        if numero % 2 == 0:
+            await asyncio.sleep(0.3)
+        return {'exitoso': True, 'llamada': numero}
+
+    def _consultar(self):
+        return asyncio.run(self.servicio._post_consulta_cubierta_async({}, {}, 5))
+
+    def test_cubre_con_token_del_cache(self):
+        resultado = self._consultar()
+
+        self.assertEqual(resultado['cobertura'], 'cobertura')
+        self.assertEqual(len(self.llamadas), 2)
+        estadisticas = self.cobertura.estadisticas()
+        self.assertEqual(estadisticas['coberturas'], 1)
+        self.assertEqual(self.limitador.estadisticas()['sin_cache'], 0)
+
+    def test_sin_token_devuelve_el_credito(self):
+        self._consultar()
+        creditos = self.cobertura.estadisticas()['creditos']
+
+        # El bucket (rafaga 1) quedo vacio: la segunda consulta no se cubre
+        resultado = self._consultar()
+
+        self.assertNotIn('cobertura', resultado)
+        self.assertEqual(len(self.llamadas), 3)
+        estadisticas = self.cobertura.estadisticas()
+        self.assertEqual(estadisticas['coberturas'], 1)
+        self.assertEqual(estadisticas['sin_token'], 1)
+        # La primaria sumo un credito y la cobertura no enviada lo devolvio
+        self.assertEqual(estadisticas['creditos'], creditos + 1)
@@ -0,0 +1,171 @@
+# vinculacion/tests/test_coordinacion.py
+
+import asyncio
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from vinculacion.services.coordinacion import (
+    SingleFlight,
+    SingleFlightAsync,
+    bloqueo_compartido,
+)
+
+# La logica no depende del backend; LocMem evita la BD en los hilos
+CACHE_LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class SingleFlightTests(SimpleTestCase):
+
+    def _en_paralelo(self, vuelos, funcion, hilos=5):
+        liberar = threading.Event()
+        resultados, errores = [], []
+
+        def lider():
+            liberar.wait(5)
+            return funcion()
+
+        def llamar():
+            try:
+                resultados.append(vuelos.ejecutar('caso-1', lider))
+            except Exception as e:
+                errores.append(e)
+
+        trabajadores = [threading.Thread(target=llamar) for _ in range(hilos)]
+        for trabajador in trabajadores:
+            trabajador.start()
+        # Soltar a la lider cuando todos los demas esperan su resultado
+        limite = time.monotonic() + 5
+        while vuelos.estadisticas()['compartidas'] < hilos - 1 and time.monotonic() < limite:
+            time.sleep(0.01)
+        liberar.set()
+        for trabajador in trabajadores:
+            trabajador.join(5)
+        return resultados, errores
+
+    def test_una_ejecucion_por_clave(self):
+        vuelos = SingleFlight('prueba')
+        llamadas = []
+
+        resultados, errores = self._en_paralelo(vuelos, lambda: llamadas.append(1) or 'ok')
+
+        self.assertEqual(errores, [])
+        self.assertEqual(len(llamadas), 1)
+        self.assertEqual(sorted(compartido for _, compartido in resultados), [False, True, True, True, True])
+        self.assertTrue(all(resultado == 'ok' for resultado, _ in resultados))
+        self.assertEqual(vuelos.estadisticas()['en_curso'], 0)
+
+    def test_error_llega_a_todos(self):
+        vuelos = SingleFlight('prueba')
+
+        def fallar():
+            raise ValueError('DECRIM no responde')
+
+        resultados, errores = self._en_paralelo(vuelos, fallar)
+
+        self.assertEqual(resultados, [])
+        self.assertEqual(len(errores), 5)
+        self.assertTrue(all(isinstance(error, ValueError) for error in errores))
+
+    def test_claves_distintas_no_se_agrupan(self):
+        vuelos = SingleFlight('prueba')
+
+        self.assertEqual(vuelos.ejecutar('a', lambda: 1), (1, False))
+        self.assertEqual(vuelos.ejecutar('b', lambda: 2), (2, False))
+        self.assertEqual(vuelos.estadisticas()['ejecuciones'], 2)
+
+
+class SingleFlightAsyncTests(SimpleTestCase):
+
+    def test_una_ejecucion_por_clave(self):
+        vuelos = SingleFlightAsync('prueba')
+        llamadas = []
+
+        async def consultar():
+            llamadas.append(1)
+            await asyncio.sleep(0.05)
+            return 'ok'
+
+        async def principal():
+            return await asyncio.gather(*(vuelos.ejecutar('caso-1', consultar) for _ in range(5)))
+
+        resultados = asyncio.run(principal())
+
+        self.assertEqual(len(llamadas), 1)
+        self.assertEqual(sorted(compartido for _, compartido in resultados), [False, True, True, True, True])
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class BloqueoCompartidoTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_excluye_a_otro_dueno(self):
+        with bloqueo_compartido('decrim:prueba') as primero:
+            with bloqueo_compartido('decrim:prueba') as segundo:
+                self.assertTrue(primero)
+                self.assertFalse(segundo)
+        with bloqueo_compartido('decrim:prueba') as tercero:
+            self.assertTrue(tercero)
+
+    def test_espera_a_que_se_libere(self):
+        tomado = threading.Event()
+
+        def otro_worker():
+            with bloqueo_compartido('decrim:prueba'):
+                tomado.set()
+                time.sleep(0.2)
+
+        hilo = threading.Thread(target=otro_worker)
+        hilo.start()
+        tomado.wait(5)
+        with bloqueo_compartido('decrim:prueba', espera=5, intervalo=0.01) as obtenido:
+            self.assertTrue(obtenido)
+        hilo.join(5)
+
+    def test_no_libera_el_lock_de_otro(self):
+        with bloqueo_compartido('decrim:prueba', ttl=10) as obtenido:
+            self.assertTrue(obtenido)
+            # El lock vencio y otro worker lo tomo
+            cache.set('lock:decrim:prueba', 'otro-worker', 10)
+
+        self.assertEqual(cache.get('lock:decrim:prueba'), 'otro-worker')
+
+
+class BloqueoCompartidoBDTests(TestCase):
+    """
+    Lock sobre la tabla de DatabaseCache (el cache por defecto).
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fila_vencida_la_toma_un_solo_worker(self):
+        # Lock de un worker que murio: la fila sigue en la tabla, vencida
+        cache.set('lock:decrim:bd', 'worker-muerto', -1)
+
+        with bloqueo_compartido('decrim:bd') as primero:
+            with bloqueo_compartido('decrim:bd') as segundo:
+                self.assertTrue(primero)
+                self.assertFalse(segundo)
+                self.assertNotIn(cache.get('lock:decrim:bd'), (None, 'worker-muerto'))
+
+        self.assertIsNone(cache.get('lock:decrim:bd'))
+
+    def test_lock_vigente_no_se_toma(self):
+        cache.set('lock:decrim:bd', 'otro-worker', 30)
+
+        with bloqueo_compartido('decrim:bd') as obtenido:
+            self.assertFalse(obtenido)
+
+        self.assertEqual(cache.get('lock:decrim:bd'), 'otro-worker')
+
+    def test_no_libera_el_lock_de_otro(self):
+        with bloqueo_compartido('decrim:bd') as obtenido:
+            self.assertTrue(obtenido)
+            cache.set('lock:decrim:bd', 'otro-worker', 10)
+
+        self.assertEqual(cache.get('lock:decrim:bd'), 'otro-worker')
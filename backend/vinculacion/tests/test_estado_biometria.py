@@ -0,0 +1,122 @@
+# vinculacion/tests/test_estado_biometria.py
+
+import time
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from vinculacion.models import PreRegistro
+from vinculacion.services import BiometriaService
+from vinculacion.views import EstadoBiometriaView, _jwt_sign
+
+SECRETO_WEBHOOK = 'secreto-de-prueba'
+
+
+@override_settings(DECRIM_REGISTRO_ASINCRONO=True, DEV_BIOMETRIA_AUTO_APPROVE=False)
+class EstadoBiometriaUrlTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.preregistro = PreRegistro.objects.create(
+            numero_cedula='1000000003',
+            nombres_completos='PRUEBA ESTADO',
+            tipo_documento=1,
+            fecha_expedicion=date(2010, 1, 1),
+        )
+        self.url = reverse('vinculacion:preregistro-estado-biometria', args=[self.preregistro.pk])
+
+    def test_sin_caso_responde_pendiente_sin_url(self):
+        respuesta = self.client.get(self.url)
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['estado_biometria'], PreRegistro.BIOMETRIA_PENDIENTE)
+        self.assertIsNone(respuesta.json()['url_biometria'])
+
+    def test_con_caso_creado_entrega_la_url(self):
+        PreRegistro.objects.filter(pk=self.preregistro.pk).update(
+            idcaso_biometria='77',
+            url_biometria='https://decrim.test/validar/77',
+            estado_biometria=PreRegistro.BIOMETRIA_EN_PROCESO,
+        )
+        cacheado = {
+            'estado_biometria': PreRegistro.BIOMETRIA_EN_PROCESO,
+            'puede_continuar': False,
+            'justificacion': '',
+            'mensaje': 'Esperando validacion biometrica.'
+        }
+        with mock.patch.object(BiometriaService, 'estado_cacheado', return_value=cacheado):
+            respuesta = self.client.get(self.url)
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['url_biometria'], 'https://decrim.test/validar/77')
+
+    def test_registro_fallido_responde_502(self):
+        PreRegistro.objects.filter(pk=self.preregistro.pk).update(
+            estado_vinculacion=PreRegistro.ESTADO_ERROR,
+            mensaje_error='DECRIM no responde',
+        )
+
+        respuesta = self.client.get(self.url)
+
+        self.assertEqual(respuesta.status_code, 502)
+        self.assertEqual(respuesta.json()['detalle'], 'DECRIM no responde')
+
+
+@override_settings(
+    DECRIM_WEBHOOK_JWT_SECRET=SECRETO_WEBHOOK,
+    DECRIM_WEBHOOK_IP_WHITELIST=[],
+    MAX_INTENTOS_BIOMETRIA=2,
+)
+class WebhookYPollingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.preregistro = PreRegistro.objects.create(
+            numero_cedula='1000000007',
+            nombres_completos='PRUEBA WEBHOOK',
+            tipo_documento=1,
+            fecha_expedicion=date(2010, 1, 1),
+            idcaso_biometria='9',
+            estado_biometria=PreRegistro.BIOMETRIA_EN_PROCESO,
+        )
+
+    def _webhook(self, estado, justificacion):
+        token = _jwt_sign({'sub': 'decrim', 'exp': int(time.time()) + 60}, SECRETO_WEBHOOK)
+        return self.client.post(
+            reverse('vinculacion:decrim-webhook'),
+            {'Idcaso': '9', 'Estado': estado, 'Justificacion': justificacion},
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+
+    def test_poll_con_instancia_vieja_no_repite_el_rechazo(self):
+        # El poll leyo la fila antes de que llegara el webhook
+        vieja = PreRegistro.objects.get(pk=self.preregistro.pk)
+        self.assertEqual(self._webhook('2', 'Rechazo por webhook').status_code, 200)
+
+        EstadoBiometriaView._respuesta_consulta(
+            vieja,
+            BiometriaService(),
+            {'exitoso': True, 'estado': '2', 'idcaso': '9', 'justificacion': 'Rechazo por poll', 'intentos': []}
+        )
+
+        self.preregistro.refresh_from_db()
+        self.assertEqual(self.preregistro.estado_biometria, PreRegistro.BIOMETRIA_RECHAZADO)
+        self.assertEqual(self.preregistro.intentos_biometria, 1)
+        self.assertFalse(self.preregistro.vetado)
+        self.assertEqual(self.preregistro.justificacion_biometria, 'Rechazo por webhook')
+
+    def test_webhook_repetido_solo_actualiza_la_justificacion(self):
+        self._webhook('2', 'Primera')
+        # Cambio concurrente de otro campo: el webhook repetido no lo pisa
+        PreRegistro.objects.filter(pk=self.preregistro.pk).update(agencia='Centro')
+
+        self.assertEqual(self._webhook('2', 'Segunda').status_code, 200)
+
+        self.preregistro.refresh_from_db()
+        self.assertEqual(self.preregistro.intentos_biometria, 1)
+        self.assertEqual(self.preregistro.justificacion_biometria, 'Segunda')
+        self.assertEqual(self.preregistro.agencia, 'Centro')
@@ -0,0 +1,121 @@
+# vinculacion/tests/test_limitador.py
+
+import asyncio
+import itertools
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from vinculacion.services.limitador import LimitadorTokens
+
+CACHE_LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class LimitadorTokensTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rafaga_y_rechazo(self):
+        limitador = LimitadorTokens('prueba', por_minuto=60, rafaga=2)
+
+        primeros = [limitador.adquirir() for _ in range(2)]
+        tercero = limitador.adquirir()
+
+        self.assertTrue(all(resultado['permitido'] for resultado in primeros))
+        self.assertFalse(tercero['permitido'])
+        self.assertEqual(tercero['motivo'], 'limite')
+        self.assertAlmostEqual(tercero['espera_s'], 1, delta=0.1)
+        self.assertEqual(limitador.estadisticas()['rechazadas'], 1)
+
+    def test_espera_turno_dentro_de_espera_max(self):
+        limitador = LimitadorTokens('prueba', por_minuto=60, rafaga=1, espera_max=5)
+        limitador.adquirir()
+
+        with mock.patch('vinculacion.services.limitador.time.sleep') as dormir:
+            resultado = limitador.adquirir()
+
+        self.assertTrue(resultado['permitido'])
+        self.assertGreater(resultado['espera_s'], 0)
+        dormir.assert_called_once_with(mock.ANY)
+        self.assertAlmostEqual(dormir.call_args[0][0], 1, delta=0.1)
+        self.assertEqual(limitador.estadisticas()['en_cola'], 1)
+
+    def test_presupuesto_compartido_entre_workers(self):
+        # Dos procesos: misma clave en el cache, contadores propios
+        worker_a = LimitadorTokens('compartido', por_minuto=60, rafaga=2)
+        worker_b = LimitadorTokens('compartido', por_minuto=60, rafaga=2)
+
+        self.assertTrue(worker_a.adquirir()['permitido'])
+        self.assertTrue(worker_b.adquirir()['permitido'])
+        self.assertFalse(worker_a.adquirir()['permitido'])
+        self.assertFalse(worker_b.adquirir()['permitido'])
+
+    def test_se_rellena_con_el_tiempo(self):
+        limitador = LimitadorTokens('prueba', por_minuto=60, rafaga=1)
+        with mock.patch('vinculacion.services.limitador.time.time', return_value=1000.0):
+            self.assertTrue(limitador.adquirir()['permitido'])
+            self.assertFalse(limitador.adquirir()['permitido'])
+        with mock.patch('vinculacion.services.limitador.time.time', return_value=1001.0):
+            self.assertTrue(limitador.adquirir()['permitido'])
+
+    def test_inactivo_no_limita(self):
+        limitador = LimitadorTokens('prueba', por_minuto=0, rafaga=1)
+
+        self.assertTrue(all(limitador.adquirir()['permitido'] for _ in range(20)))
+
+    def test_version_async_comparte_el_bucket(self):
+        limitador = LimitadorTokens('prueba', por_minuto=60, rafaga=1)
+
+        self.assertTrue(limitador.adquirir()['permitido'])
+        self.assertFalse(asyncio.run(limitador.adquirir_async())['permitido'])
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class LimitadorSinCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cache_caido_rechaza(self):
+        limitador = LimitadorTokens('prueba', por_minuto=60, rafaga=5)
+
+        with mock.patch.object(cache, 'add', side_effect=ConnectionError('cache caido')):
+            resultado = limitador.adquirir()
+
+        self.assertFalse(resultado['permitido'])
+        self.assertEqual(resultado['motivo'], 'sin_cache')
+        self.assertGreater(resultado['espera_s'], 0)
+        self.assertEqual(limitador.estadisticas()['sin_cache'], 1)
+        self.assertEqual(limitador.estadisticas()['permitidas'], 0)
+
+    def test_lock_ocupado_rechaza(self):
+        limitador = LimitadorTokens('prueba', por_minuto=60, rafaga=5)
+        cache.set('lock:limitador:prueba', 'otro-worker', 30)
+
+        with mock.patch('vinculacion.services.coordinacion.time.sleep'), \
+                mock.patch('vinculacion.services.coordinacion.time.monotonic', side_effect=itertools.count(0, 2)):
+            resultado = limitador.adquirir()
+
+        self.assertFalse(resultado['permitido'])
+        self.assertEqual(resultado['motivo'], 'sin_cache')
+
+    def test_permitir_sin_cache_explicito(self):
+        limitador = LimitadorTokens('prueba', por_minuto=60, rafaga=5, permitir_sin_cache=True)
+
+        with mock.patch.object(cache, 'add', side_effect=ConnectionError('cache caido')):
+            resultado = limitador.adquirir()
+
+        self.assertTrue(resultado['permitido'])
+        self.assertEqual(resultado['motivo'], 'sin_cache')
+
+    def test_async_cache_caido_rechaza(self):
+        limitador = LimitadorTokens('prueba', por_minuto=60, rafaga=5)
+
+        with mock.patch.object(cache, 'aadd', side_effect=ConnectionError('cache caido')):
+            resultado = asyncio.run(limitador.adquirir_async())
+
+        self.assertFalse(resultado['permitido'])
+        self.assertEqual(resultado['motivo'], 'sin_cache')
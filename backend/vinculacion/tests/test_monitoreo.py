@@ -0,0 +1,69 @@
+# vinculacion/tests/test_monitoreo.py
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from vinculacion.services import LinixService
+
+
+@override_settings(MONITOREO_TOKEN='token-monitoreo')
+class LinixMonitoreoTests(TestCase):
+
+    def test_anonimo_no_accede_ni_consulta_oracle(self):
+        with mock.patch.object(LinixService, 'sesiones_por_nodo') as sesiones:
+            estado = self.client.get(reverse('vinculacion:linix-estado'), {'sesiones': '1'})
+            metricas = self.client.get(reverse('vinculacion:linix-metricas'))
+
+        self.assertEqual(estado.status_code, 403)
+        self.assertEqual(metricas.status_code, 403)
+        sesiones.assert_not_called()
+
+    def test_usuario_sin_staff_no_accede(self):
+        self.client.force_login(get_user_model().objects.create_user('ciudadano', password='x'))
+
+        self.assertEqual(self.client.get(reverse('vinculacion:linix-metricas')).status_code, 403)
+
+    def test_token_incorrecto_no_accede(self):
+        respuesta = self.client.get(
+            reverse('vinculacion:linix-metricas'),
+            HTTP_AUTHORIZATION='Bearer otro-token'
+        )
+
+        self.assertEqual(respuesta.status_code, 403)
+
+    def test_token_de_monitoreo_lee_metricas(self):
+        respuesta = self.client.get(
+            reverse('vinculacion:linix-metricas'),
+            HTTP_AUTHORIZATION='Bearer token-monitoreo'
+        )
+
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_staff_lee_el_estado(self):
+        self.client.force_login(
+            get_user_model().objects.create_user('analista', password='x', is_staff=True)
+        )
+
+        respuesta = self.client.get(reverse('vinculacion:linix-estado'))
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('circuit_breaker', respuesta.json())
+
+
+@override_settings(MONITOREO_TOKEN='token-monitoreo')
+class DecrimMonitoreoTests(TestCase):
+
+    def test_anonimo_no_accede(self):
+        self.assertEqual(self.client.get(reverse('vinculacion:decrim-estado')).status_code, 403)
+
+    def test_token_de_monitoreo_lee_el_estado(self):
+        respuesta = self.client.get(
+            reverse('vinculacion:decrim-estado'),
+            HTTP_AUTHORIZATION='Bearer token-monitoreo'
+        )
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('limitadores', respuesta.json())
@@ -0,0 +1,64 @@
+# vinculacion/tests/test_pool_oracle_async.py
+
+import asyncio
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from vinculacion.services import linix_services
+
+
+class PoolFalso:
+
+    def __init__(self):
+        self.cerrado = False
+
+    async def acquire(self):
+        return mock.Mock()
+
+    async def close(self, force=False):
+        self.cerrado = True
+
+
+class PoolOracleAsyncTests(SimpleTestCase):
+
+    def setUp(self):
+        linix_services._pool_async = None
+        linix_services._pool_async_loop = None
+        self.addCleanup(setattr, linix_services, '_pool_async', None)
+        self.addCleanup(setattr, linix_services, '_pool_async_loop', None)
+
+    @override_settings(SERVIDOR_ASGI=False)
+    def test_fuera_de_asgi_usa_conexion_propia(self):
+        conexion = mock.Mock(close=mock.AsyncMock())
+        with mock.patch.object(linix_services.oracledb, 'connect_async', mock.AsyncMock(return_value=conexion)) as conectar, \
+                mock.patch.object(linix_services.oracledb, 'create_pool_async') as crear_pool:
+            sesion = asyncio.run(linix_services.BackendOracle().adquirir_async())
+            asyncio.run(sesion.close())
+
+        crear_pool.assert_not_called()
+        conectar.assert_awaited_once()
+        conexion.close.assert_awaited_once()
+
+    @override_settings(SERVIDOR_ASGI=True)
+    def test_pool_por_loop_cierra_el_anterior(self):
+        pools = [PoolFalso(), PoolFalso()]
+        loop_viejo = asyncio.new_event_loop()
+        self.addCleanup(loop_viejo.close)
+
+        async def obtener():
+            return linix_services.obtener_pool_async()
+
+        with mock.patch.object(linix_services.oracledb, 'create_pool_async', side_effect=pools):
+            primero = loop_viejo.run_until_complete(obtener())
+            self.assertIs(loop_viejo.run_until_complete(obtener()), primero)
+            # Otro loop: nuevo pool y el anterior se cierra en su propio loop
+            segundo = asyncio.run(obtener())
+
+        self.assertIs(segundo, pools[1])
+        limite = time.monotonic() + 2
+        while not pools[0].cerrado and time.monotonic() < limite:
+            time.sleep(0.01)
+        self.assertTrue(pools[0].cerrado)
+        self.assertFalse(pools[1].cerrado)
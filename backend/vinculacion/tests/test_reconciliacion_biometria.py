@@ -0,0 +1,78 @@
+# vinculacion/tests/test_reconciliacion_biometria.py
+
+from datetime import date
+
+from django.test import TestCase, override_settings
+
+from vinculacion.models import PreRegistro
+from vinculacion.services import ReconciliacionBiometriaService
+
+
+def crear_preregistro(**campos):
+    datos = {
+        'numero_cedula': '1000000001',
+        'nombres_completos': 'PRUEBA RECONCILIACION',
+        'tipo_documento': 1,
+        'fecha_expedicion': date(2010, 1, 1),
+        'idcaso_biometria': '9',
+        'estado_biometria': PreRegistro.BIOMETRIA_EN_PROCESO,
+    }
+    datos.update(campos)
+    return PreRegistro.objects.create(**datos)
+
+
+RECHAZADO = {'exitoso': True, 'estado': '2', 'idcaso': '9', 'justificacion': 'No coincide'}
+
+
+@override_settings(MAX_INTENTOS_BIOMETRIA=2)
+class AplicarResultadoTests(TestCase):
+
+    def setUp(self):
+        self.servicio = ReconciliacionBiometriaService()
+
+    def test_aplica_transicion(self):
+        preregistro = crear_preregistro()
+
+        caso = self.servicio.aplicar_resultado(preregistro, RECHAZADO)
+
+        self.assertTrue(caso['cambio'])
+        self.assertFalse(caso['omitido'])
+        preregistro.refresh_from_db()
+        self.assertEqual(preregistro.estado_biometria, PreRegistro.BIOMETRIA_RECHAZADO)
+        self.assertEqual(preregistro.intentos_biometria, 1)
+        self.assertFalse(preregistro.vetado)
+
+    def test_omite_si_el_estado_cambio_durante_la_consulta(self):
+        preregistro = crear_preregistro()
+        # Un webhook aplica el rechazo mientras la reconciliacion consultaba DECRIM
+        PreRegistro.objects.get(pk=preregistro.pk).aplicar_estado_biometria(PreRegistro.BIOMETRIA_RECHAZADO)
+
+        caso = self.servicio.aplicar_resultado(preregistro, RECHAZADO)
+
+        self.assertTrue(caso['omitido'])
+        self.assertFalse(caso['cambio'])
+        preregistro.refresh_from_db()
+        # El rechazo cuenta una sola vez y no veta
+        self.assertEqual(preregistro.intentos_biometria, 1)
+        self.assertFalse(preregistro.vetado)
+
+    def test_no_pisa_campos_cambiados_por_otro_proceso(self):
+        preregistro = crear_preregistro()
+        PreRegistro.objects.filter(pk=preregistro.pk).update(agencia='GRANADA')
+
+        self.servicio.aplicar_resultado(preregistro, {'exitoso': True, 'estado': '5', 'idcaso': '9'})
+
+        preregistro.refresh_from_db()
+        self.assertEqual(preregistro.estado_biometria, PreRegistro.BIOMETRIA_APROBADO)
+        self.assertEqual(preregistro.agencia, 'GRANADA')
+
+    def test_error_no_toca_la_fila(self):
+        preregistro = crear_preregistro()
+        antes = preregistro.updated_at
+
+        caso = self.servicio.aplicar_resultado(preregistro, {'exitoso': False, 'error': 'HTTP 503'})
+
+        self.assertEqual(caso['error'], 'HTTP 503')
+        preregistro.refresh_from_db()
+        self.assertEqual(preregistro.updated_at, antes)
+        self.assertEqual(preregistro.estado_biometria, PreRegistro.BIOMETRIA_EN_PROCESO)
@@ -0,0 +1,116 @@
+# vinculacion/tests/test_registro_decrim.py
+
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from vinculacion.models import LogIntegracion, PreRegistro
+from vinculacion.services import RegistroDecrimService
+
+CASO_CREADO = {
+    'exitoso': True,
+    'codigo': '501',
+    'url': 'https://decrim.test/validar/501',
+    'request_data': {},
+    'response_data': {},
+}
+
+
+def crear_preregistro(**campos):
+    datos = {
+        'numero_cedula': '1000000004',
+        'nombres_completos': 'PRUEBA REGISTRO',
+        'tipo_documento': 1,
+        'fecha_expedicion': date(2010, 1, 1),
+    }
+    datos.update(campos)
+    return PreRegistro.objects.create(**datos)
+
+
+@override_settings(DECRIM_REGISTRO_RECUPERAR_TRAS_S=120)
+class RegistroDecrimTests(TestCase):
+
+    def setUp(self):
+        self.decrim = mock.Mock(timeout=(5, 30))
+        self.decrim.crear_registro_decrim.return_value = CASO_CREADO
+        self.servicio = RegistroDecrimService(biometria_service=self.decrim)
+
+    def test_crea_el_caso_una_sola_vez(self):
+        preregistro = crear_preregistro()
+
+        primero = self.servicio.registrar(preregistro.pk)
+        segundo = self.servicio.registrar(preregistro.pk)
+
+        self.assertTrue(primero['exitoso'])
+        self.assertTrue(segundo['omitido'])
+        self.decrim.crear_registro_decrim.assert_called_once()
+        preregistro.refresh_from_db()
+        self.assertEqual(preregistro.idcaso_biometria, '501')
+        self.assertEqual(preregistro.estado_biometria, PreRegistro.BIOMETRIA_EN_PROCESO)
+        self.assertIsNone(preregistro.registro_decrim_reclamado)
+
+    def test_reclamado_por_otro_worker_se_omite(self):
+        preregistro = crear_preregistro(registro_decrim_reclamado=timezone.now())
+
+        resumen = self.servicio.registrar(preregistro.pk)
+
+        self.assertTrue(resumen['omitido'])
+        self.decrim.crear_registro_decrim.assert_not_called()
+
+    def test_reclamo_vencido_se_retoma(self):
+        vencido = timezone.now() - timedelta(seconds=self.servicio.reclamo_s + 1)
+        preregistro = crear_preregistro(registro_decrim_reclamado=vencido)
+
+        resumen = self.servicio.registrar(preregistro.pk)
+
+        self.assertTrue(resumen['exitoso'])
+        self.decrim.crear_registro_decrim.assert_called_once()
+
+    def test_frenado_por_el_limitador_queda_pendiente(self):
+        self.decrim.crear_registro_decrim.return_value = {
+            'exitoso': False,
+            'limitado': True,
+            'error': 'Limite de llamadas',
+        }
+        preregistro = crear_preregistro()
+
+        resumen = self.servicio.registrar(preregistro.pk)
+
+        self.assertFalse(resumen['exitoso'])
+        preregistro.refresh_from_db()
+        self.assertIsNone(preregistro.registro_decrim_reclamado)
+        self.assertEqual(
+            RegistroDecrimService.estado_registro(preregistro),
+            RegistroDecrimService.REGISTRO_PENDIENTE
+        )
+        self.assertFalse(LogIntegracion.objects.filter(preregistro=preregistro).exists())
+
+    def test_error_de_decrim_libera_el_reclamo(self):
+        self.decrim.crear_registro_decrim.side_effect = RuntimeError('conexion cerrada')
+        preregistro = crear_preregistro()
+
+        with self.assertRaises(RuntimeError):
+            self.servicio.registrar(preregistro.pk)
+
+        preregistro.refresh_from_db()
+        self.assertIsNone(preregistro.registro_decrim_reclamado)
+
+    def test_recuperar_completa_pendientes_una_vez(self):
+        antiguo = timezone.now() - timedelta(seconds=300)
+        perdido = crear_preregistro()
+        reciente = crear_preregistro(numero_cedula='1000000005')
+        en_curso = crear_preregistro(numero_cedula='1000000006', registro_decrim_reclamado=timezone.now())
+        PreRegistro.objects.filter(pk__in=[perdido.pk, en_curso.pk]).update(updated_at=antiguo)
+
+        resumen = self.servicio.recuperar()
+        repetido = self.servicio.recuperar()
+
+        self.assertEqual(resumen['revisados'], 1)
+        self.assertEqual(resumen['creados'], 1)
+        self.assertEqual(resumen['casos'][0]['preregistro_id'], perdido.pk)
+        self.assertEqual(repetido['revisados'], 0)
+        self.decrim.crear_registro_decrim.assert_called_once()
+        reciente.refresh_from_db()
+        self.assertFalse(reciente.idcaso_biometria)
@@ -0,0 +1,161 @@
+# vinculacion/tests/test_verificacion_pendientes.py
+
+import threading
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from vinculacion.services import LinixService, VerificacionPendientesService
+
+CEDULA_COLGADA = '999'
+
+
+class LinixFalso:
+    """
+    verificar_flujos() que se cuelga hasta su call_timeout si el lote trae
+    CEDULA_COLGADA (como una sesion Oracle bloqueada).
+    """
+
+    def __init__(self, demora_s=0):
+        self.demora_s = demora_s
+        self.llamadas = []
+        self._lock = threading.Lock()
+
+    def verificar_flujos(self, cedulas, call_timeout_ms=None, limite=None):
+        with self._lock:
+            self.llamadas.append((list(cedulas), call_timeout_ms))
+        if CEDULA_COLGADA in cedulas:
+            time.sleep(call_timeout_ms / 1000)
+            return {
+                c: {'exitoso': False, 'error': 'Error de base de datos: DPY-4024', 'timeout': True,
+                    'tiempo_respuesta_ms': call_timeout_ms}
+                for c in cedulas
+            }
+        time.sleep(self.demora_s)
+        return {c: self._flujo_ok(c) for c in cedulas}
+
+    @staticmethod
+    def _flujo_ok(cedula):
+        # Misma forma que LinixService._interpretar_flujo con estado OK
+        mensaje = 'Flujo confirmado en LINIX.'
+        return {
+            'exitoso': True,
+            'encontrado': True,
+            'id_tercero': f'T{cedula}',
+            'estado_flujo': 'OK',
+            'mensaje': mensaje,
+            'datos_completos': {
+                'procedimiento': 'SP_FLUJOEXITOSO',
+                'cedula': cedula,
+                'estado': 'OK',
+                'id_tercero': f'T{cedula}',
+                'mensaje': mensaje
+            },
+            'tiempo_respuesta_ms': 0
+        }
+
+
+@override_settings(
+    LINIX_VERIFICACION_WORKERS=2,
+    ORACLE_POOL_MAX=2,
+    LINIX_VERIFICACION_TAMANO_LOTE=3,
+    LINIX_VERIFICACION_TIMEOUT_LOTE=0.3,
+    LINIX_VERIFICACION_TIMEOUT_CEDULA=0.2,
+    LINIX_VERIFICACION_PRESUPUESTO=5,
+)
+class VerificacionPendientesTests(SimpleTestCase):
+
+    def test_lote_vencido_se_reintenta_por_cedula(self):
+        linix = LinixFalso()
+        resultado = VerificacionPendientesService(linix).verificar(['1', CEDULA_COLGADA, '2', '3'])
+
+        self.assertEqual(resultado['timeouts'], [CEDULA_COLGADA])
+        for cedula in ('1', '2', '3'):
+            self.assertTrue(resultado['resultados'][cedula]['encontrado'])
+            self.assertEqual(resultado['resultados'][cedula]['id_tercero'], f'T{cedula}')
+        individuales = [lote for lote, _ in linix.llamadas if len(lote) == 1]
+        # ['3'] es el ultimo lote (de uno); el resto son los reintentos
+        self.assertCountEqual(individuales, [['3'], ['1'], [CEDULA_COLGADA], ['2']])
+        self.assertIn(([CEDULA_COLGADA], 200), linix.llamadas)
+
+    def test_plazo_corre_desde_que_el_lote_empieza(self):
+        # Con 1 hilo, los lotes encolados esperan 0.2 s cada uno; el plazo de
+        # 0.3 s no debe descontar esa espera
+        linix = LinixFalso(demora_s=0.2)
+        with self.settings(LINIX_VERIFICACION_WORKERS=1, LINIX_VERIFICACION_TAMANO_LOTE=1):
+            resultado = VerificacionPendientesService(linix).verificar(['1', '2', '3', '4'])
+
+        self.assertEqual(resultado['timeouts'], [])
+        self.assertEqual({plazo for _, plazo in linix.llamadas}, {300})
+
+    def test_presupuesto_agotado_reporta_timeouts(self):
+        linix = LinixFalso(demora_s=0.3)
+        with self.settings(
+            LINIX_VERIFICACION_WORKERS=1,
+            LINIX_VERIFICACION_TAMANO_LOTE=1,
+            LINIX_VERIFICACION_PRESUPUESTO=0.5
+        ):
+            inicio = time.monotonic()
+            resultado = VerificacionPendientesService(linix).verificar(['1', '2', '3', '4'])
+
+        self.assertLess(time.monotonic() - inicio, 1)
+        self.assertTrue(resultado['resultados']['1']['encontrado'])
+        self.assertIn('4', resultado['timeouts'])
+        # El segundo lote seguia en curso al agotarse el presupuesto
+        self.assertEqual(resultado['sin_terminar'], 1)
+
+
+class SesionFalsa:
+
+    def __init__(self):
+        self.call_timeout = 0
+        self.consultas = []
+        self.cerrada = False
+
+    def flujos_exitosos(self, cedulas):
+        self.consultas.append(self.call_timeout)
+        return [('OK', None, {'ID_TERCERO': 7}) for _ in cedulas]
+
+    def close(self):
+        self.cerrada = True
+
+
+class BackendFalso:
+    """
+    Pool sin sesiones libres durante espera_s.
+    """
+
+    def __init__(self, espera_s):
+        self.espera_s = espera_s
+        self.sesion = SesionFalsa()
+
+    def adquirir(self):
+        time.sleep(self.espera_s)
+        return self.sesion
+
+
+class LimiteDelLoteTests(SimpleTestCase):
+
+    def _servicio(self, espera_s):
+        servicio = LinixService()
+        servicio.backend = BackendFalso(espera_s)
+        return servicio
+
+    def test_espera_del_pool_se_descuenta_del_call_timeout(self):
+        servicio = self._servicio(0.1)
+
+        resultado = servicio.verificar_flujos(['1'], call_timeout_ms=300, limite=time.monotonic() + 0.3)
+
+        self.assertTrue(resultado['1']['encontrado'])
+        (call_timeout,) = servicio.backend.sesion.consultas
+        self.assertGreater(call_timeout, 0)
+        self.assertLessEqual(call_timeout, 200)
+
+    def test_limite_vencido_en_la_espera_no_consulta(self):
+        servicio = self._servicio(0.2)
+
+        resultado = servicio.verificar_flujos(['1', '2'], call_timeout_ms=100, limite=time.monotonic() + 0.1)
+
+        self.assertTrue(all(r['timeout'] for r in resultado.values()))
+        self.assertEqual(servicio.backend.sesion.consultas, [])
+        self.assertTrue(servicio.backend.sesion.cerrada)
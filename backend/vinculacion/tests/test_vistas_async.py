@@ -0,0 +1,57 @@
+# vinculacion/tests/test_vistas_async.py
+
+import asyncio
+import importlib
+import time
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import clear_url_caches
+
+from vinculacion import urls as vinculacion_urls
+from vinculacion.services import http_pool
+from vinculacion.views import EstadoBiometriaAsyncView, EstadoBiometriaView
+
+
+class RutasAsyncTests(SimpleTestCase):
+
+    def _vista_estado(self):
+        importlib.reload(vinculacion_urls)
+        clear_url_caches()
+        patron = next(p for p in vinculacion_urls.urlpatterns if p.name == 'preregistro-estado-biometria')
+        return patron.callback.view_class
+
+    def tearDown(self):
+        importlib.reload(vinculacion_urls)
+        clear_url_caches()
+
+    @override_settings(VISTAS_ASYNC=True, SERVIDOR_ASGI=False)
+    def test_bajo_wsgi_usa_vistas_sincronas(self):
+        with self.assertLogs('vinculacion.urls', 'WARNING'):
+            self.assertIs(self._vista_estado(), EstadoBiometriaView)
+
+    @override_settings(VISTAS_ASYNC=True, SERVIDOR_ASGI=True)
+    def test_bajo_asgi_usa_vistas_async(self):
+        self.assertIs(self._vista_estado(), EstadoBiometriaAsyncView)
+
+
+class ClienteHttpAsyncTests(SimpleTestCase):
+
+    def tearDown(self):
+        http_pool._clientes_async.pop('prueba', None)
+
+    def test_cliente_de_otro_loop_se_cierra(self):
+        loop_viejo = asyncio.new_event_loop()
+        self.addCleanup(loop_viejo.close)
+
+        async def obtener():
+            return http_pool.obtener_cliente_http_async('prueba', http2=False)
+
+        viejo = loop_viejo.run_until_complete(obtener())
+        self.assertIs(loop_viejo.run_until_complete(obtener()), viejo)
+        nuevo = asyncio.run(obtener())
+
+        self.assertIsNot(nuevo, viejo)
+        limite = time.monotonic() + 2
+        while not viejo.is_closed and time.monotonic() < limite:
+            time.sleep(0.01)
+        self.assertTrue(viejo.is_closed)
@@ -6,17 +6,26 @@ URLS - Configuración de rutas de la API
 Define los endpoints disponibles y los asocia con sus views.
 """
 
+import logging
+
 from django.conf import settings
 from django.urls import path
 from .views import (
     IniciarPreRegistroView,
+    IniciarPreRegistroAsyncView,
     EstadoBiometriaView,
+    EstadoBiometriaAsyncView,
+    ArchivosBiometriaView,
+    ArchivoBiometriaView,
     DecrimTokenView,
+    DecrimEstadoView,
     DecrimWebhookView,
     LinkLinixView,
     VinculacionAgilView,
     VerificarLinixView,
     VerificarLinixPendientesView,
+    LinixEstadoView,
+    LinixMetricasView,
     PreRegistroDetailView,
     TestOracleConnectionView
 )
@@ -24,20 +33,47 @@ from .views import (
 # Namespace de la app (útil para reverse())
 app_name = 'vinculacion'
 
+logger = logging.getLogger(__name__)
+
+# Bajo ASGI, los Pasos 1 y 2 pueden usar las vistas async (Oracle y DECRIM
+# sin bloquear un hilo por llamada). Bajo WSGI cada vista async correria en
+# un event loop nuevo por peticion: se usan las sincronas.
+if getattr(settings, 'VISTAS_ASYNC', False) and not getattr(settings, 'SERVIDOR_ASGI', False):
+    logger.warning("VISTAS_ASYNC=true ignorado: el proceso no corre bajo core/asgi.py")
+
+if getattr(settings, 'VISTAS_ASYNC', False) and getattr(settings, 'SERVIDOR_ASGI', False):
+    IniciarPreRegistro = IniciarPreRegistroAsyncView
+    EstadoBiometria = EstadoBiometriaAsyncView
+else:
+    IniciarPreRegistro = IniciarPreRegistroView
+    EstadoBiometria = EstadoBiometriaView
+
 urlpatterns = [
     # PASO 1: Iniciar pre-registro
     path(
         'preregistro/iniciar/',
-        IniciarPreRegistroView.as_view(),
+        IniciarPreRegistro.as_view(),
         name='preregistro-iniciar'
     ),
     
     # PASO 2: Consultar estado de biometría (polling)
     path(
         'preregistro/<int:pk>/estado-biometria/',
-        EstadoBiometriaView.as_view(),
+        EstadoBiometria.as_view(),
         name='preregistro-estado-biometria'
     ),
+
+    # Imagenes y certificado de DECRIM (descarga diferida al almacen)
+    path(
+        'preregistro/<int:pk>/archivos-biometria/',
+        ArchivosBiometriaView.as_view(),
+        name='preregistro-archivos-biometria'
+    ),
+    path(
+        'preregistro/<int:pk>/archivos-biometria/<str:sha256>/',
+        ArchivoBiometriaView.as_view(),
+        name='preregistro-archivo-biometria'
+    ),
     
     # PASO 3: Obtener link de LINIX
     path(
@@ -66,6 +102,18 @@ urlpatterns = [
         VerificarLinixPendientesView.as_view(),
         name='linix-verificar-pendientes'
     ),
+
+    # Estado de la integracion Oracle (pool de sesiones)
+    path(
+        'linix/estado/',
+        LinixEstadoView.as_view(),
+        name='linix-estado'
+    ),
+    path(
+        'linix/metricas/',
+        LinixMetricasView.as_view(),
+        name='linix-metricas'
+    ),
     
     # Obtener detalles completos
     path(
@@ -75,6 +123,11 @@ urlpatterns = [
     ),
 
     # Webhook DECRIM
+    path(
+        'decrim/estado/',
+        DecrimEstadoView.as_view(),
+        name='decrim-estado'
+    ),
     path(
         'decrim/token/',
         DecrimTokenView.as_view(),
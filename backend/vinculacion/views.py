@@ -10,15 +10,24 @@ Arquitectura:
 - APIView para endpoints personalizados
 - Validacion con serializers
 - Respuestas estandarizadas con Response
+- Vistas async (Django View) para el Paso 1 y 2 bajo ASGI (VISTAS_ASYNC)
 """
 
+from asgiref.sync import sync_to_async
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, BasePermission, IsAdminUser
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from django.core.mail import EmailMessage
 import base64
 import hashlib
@@ -36,7 +45,16 @@ from .serializers import (
     VerificacionLinixSerializer,
     VinculacionAgilSerializer
 )
-from .services import BiometriaService, LinixService, VinculacionAgilService, VinculacionAgilError
+from .services import (
+    AlmacenArchivos,
+    BiometriaService,
+    LinixService,
+    RegistroDecrimService,
+    VinculacionAgilService,
+    VinculacionAgilError,
+    VerificacionPendientesService,
+    exportar_prometheus,
+)
 
 # Configurar logger
 logger = logging.getLogger(__name__)
@@ -100,6 +118,22 @@ def _get_client_ip(request):
     return request.META.get('REMOTE_ADDR')
 
 
+class EsPersonalOMonitoreo(BasePermission):
+    """
+    Personal del admin (is_staff) o el token interno de monitoreo
+    (Authorization: Bearer <MONITOREO_TOKEN>) para scrapers sin sesion.
+    """
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        esperado = getattr(settings, 'MONITOREO_TOKEN', '')
+        auth_header = request.headers.get('Authorization', '')
+        if not esperado or not auth_header.startswith('Bearer '):
+            return False
+        return hmac.compare_digest(auth_header.split(' ', 1)[1].strip(), esperado)
+
+
 def _normalize_email_list(raw_value):
     if not raw_value:
         return []
@@ -215,6 +249,27 @@ def _enviar_notificacion_agencia_email(preregistro, origen='manual'):
         )
 
 
+def _registrar_log_consulta_actu(preregistro, fecha_expedicion, resultado):
+    """
+    Registra en LogIntegracion la validacion de asociado (SP_CONSULTACTU) del Paso 1.
+    """
+    LogIntegracion.objects.create(
+        preregistro=preregistro,
+        accion=LogIntegracion.ACCION_CONSULTA_ACTU,
+        exitoso=resultado.get('exitoso', False),
+        request_data={
+            'numero_cedula': preregistro.numero_cedula,
+            'fecha_expedicion': fecha_expedicion
+        },
+        response_data={
+            'encontrado': resultado.get('encontrado'),
+            'origen': resultado.get('origen')
+        },
+        error_message=resultado.get('error'),
+        tiempo_respuesta_ms=resultado.get('tiempo_respuesta_ms')
+    )
+
+
 class IniciarPreRegistroView(APIView):
     """
     POST /api/v1/preregistro/iniciar/
@@ -258,7 +313,43 @@ class IniciarPreRegistroView(APIView):
         
         logger.info("=== Iniciando pre-registro ===")
         
-        numero_cedula_raw = request.data.get('numero_cedula')
+        respuesta, contexto = self._validar(request.data, request)
+        if respuesta is not None:
+            return respuesta
+
+        # Validar si ya es asociado antes de generar registro digital
+        linix_service = LinixService()
+        resultado_actu = linix_service.consultar_actu(
+            contexto['numero_cedula'],
+            contexto['fecha_expedicion_str']
+        )
+        respuesta = self._tras_consulta_actu(contexto, resultado_actu)
+        if respuesta is not None:
+            return respuesta
+
+        # Modo asincrono: el caso en DECRIM se crea en segundo plano
+        if getattr(settings, 'DECRIM_REGISTRO_ASINCRONO', False):
+            return self._encolar_registro_decrim(contexto['preregistro'])
+
+        # Crear registro en DECRIM para obtener URL de validacion
+        biometria_service = BiometriaService()
+        resultado = biometria_service.crear_registro_decrim(
+            contexto['numero_cedula'],
+            contexto['tipo_documento'],
+            contexto['nombres']
+        )
+        return self._tras_registro_decrim(contexto['preregistro'], resultado)
+
+    @staticmethod
+    def _validar(datos, request):
+        """
+        Valida el Paso 1 antes de llamar a las integraciones.
+        
+        Returns:
+            tuple: (Response, None) si la peticion termina aqui, o
+            (None, contexto) con el serializer y los datos validados
+        """
+        numero_cedula_raw = datos.get('numero_cedula')
         preregistro_existente = None
         if numero_cedula_raw:
             preregistro_existente = PreRegistro.objects.filter(
@@ -279,198 +370,226 @@ class IniciarPreRegistroView(APIView):
                     'max_intentos': max_intentos
                 },
                 status=status.HTTP_403_FORBIDDEN
-            )
+            ), None
 
         # Crear serializer con los datos recibidos
         # context={'request': request} permite que el serializer acceda al request
         serializer = PreRegistroCreateSerializer(
             instance=preregistro_existente,
-            data=request.data,
+            data=datos,
             context={'request': request}
         )
         
         # Validar datos
-        if serializer.is_valid():
-            data = serializer.validated_data
-            numero_cedula = data['numero_cedula']
-            fecha_expedicion = data['fecha_expedicion']
-            tipo_documento = data['tipo_documento']
-            nombres = data['nombres_completos']
-
-            if preregistro_existente:
-                if preregistro_existente.estado_vinculacion == PreRegistro.ESTADO_COMPLETADO:
-                    return Response(
-                        {
-                            'error': 'El ciudadano ya completo la vinculacion digital'
-                        },
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
-                if preregistro_existente.url_biometria and preregistro_existente.estado_biometria in [
-                    PreRegistro.BIOMETRIA_PENDIENTE,
-                    PreRegistro.BIOMETRIA_EN_PROCESO,
-                    PreRegistro.BIOMETRIA_APROBADO
-                ]:
-                    preregistro = serializer.save()
-                    response_serializer = PreRegistroDetailSerializer(preregistro)
-                    return Response(
-                        response_serializer.data,
-                        status=status.HTTP_200_OK
-                    )
-
-            # Validar si ya es asociado antes de generar registro digital
-            linix_service = LinixService()
-            fecha_expedicion_str = fecha_expedicion.strftime('%d/%m/%Y')
-            resultado_actu = linix_service.consultar_actu(
-                numero_cedula,
-                fecha_expedicion_str
-            )
+        if not serializer.is_valid():
+            # Si hay errores de validacion
+            logger.warning(f"Error de validacion: {serializer.errors}")
+            
+            return Response(
+                {
+                    'error': 'Datos invalidos',
+                    'detalles': serializer.errors
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            ), None
 
-            if not resultado_actu.get('exitoso'):
-                return Response(
-                    {
-                        'error': 'No se pudo validar el estado del asociado',
-                        'detalle': resultado_actu.get('error')
-                    },
-                    status=status.HTTP_502_BAD_GATEWAY
-                )
+        data = serializer.validated_data
 
-            if resultado_actu.get('encontrado'):
+        if preregistro_existente:
+            if preregistro_existente.estado_vinculacion == PreRegistro.ESTADO_COMPLETADO:
                 return Response(
                     {
-                        'error': 'El ciudadano ya es asociado y no requiere vinculaci\u00f3n digital'
+                        'error': 'El ciudadano ya completo la vinculacion digital'
                     },
                     status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Guardar en base de datos
-            preregistro = serializer.save()
-
-            preregistro.estado_vinculacion = PreRegistro.ESTADO_INICIADO
-            preregistro.mensaje_error = None
-            preregistro.justificacion_biometria = None
-            preregistro.fecha_validacion_biometria = None
-            preregistro.estado_biometria = PreRegistro.BIOMETRIA_PENDIENTE
-            preregistro.idcaso_biometria = None
-            preregistro.url_biometria = None
-            preregistro.save(update_fields=[
-                'estado_vinculacion',
-                'mensaje_error',
-                'justificacion_biometria',
-                'fecha_validacion_biometria',
-                'estado_biometria',
-                'idcaso_biometria',
-                'url_biometria',
-                'updated_at'
-            ])
-
-            dev_skip_decrim = bool(getattr(settings, 'DEV_SKIP_DECRIM', False) and settings.DEBUG)
-            dev_auto_approve = bool(getattr(settings, 'DEV_BIOMETRIA_AUTO_APPROVE', False) and settings.DEBUG)
-            if dev_skip_decrim:
-                preregistro.idcaso_biometria = f"DRYRUN-{preregistro.numero_cedula}"
-                preregistro.url_biometria = ""
-                preregistro.estado_biometria = (
-                    PreRegistro.BIOMETRIA_APROBADO
-                    if dev_auto_approve
-                    else PreRegistro.BIOMETRIA_EN_PROCESO
-                )
-                if dev_auto_approve:
-                    preregistro.fecha_validacion_biometria = timezone.now()
-                    preregistro.estado_vinculacion = PreRegistro.ESTADO_BIOMETRIA_OK
-
-                preregistro.save(update_fields=[
-                    'idcaso_biometria',
-                    'url_biometria',
-                    'estado_biometria',
-                    'fecha_validacion_biometria',
-                    'estado_vinculacion',
-                    'updated_at'
-                ])
-
-                LogIntegracion.objects.create(
-                    preregistro=preregistro,
-                    accion=LogIntegracion.ACCION_REGISTRO_DECRIM,
-                    exitoso=True,
-                    request_data={
-                        'numero_cedula': numero_cedula,
-                        'tipo_documento': tipo_documento,
-                        'modo_prueba': 'DEV_SKIP_DECRIM'
-                    },
-                    response_data={
-                        'status': 200,
-                        'message': 'DECRIM omitido por configuracion de desarrollo',
-                        'auto_aprobado': dev_auto_approve
-                    },
-                    error_message=None
-                )
-
+                ), None
+
+            if preregistro_existente.url_biometria and preregistro_existente.estado_biometria in [
+                PreRegistro.BIOMETRIA_PENDIENTE,
+                PreRegistro.BIOMETRIA_EN_PROCESO,
+                PreRegistro.BIOMETRIA_APROBADO
+            ]:
+                preregistro = serializer.save()
                 response_serializer = PreRegistroDetailSerializer(preregistro)
                 return Response(
                     response_serializer.data,
-                    status=status.HTTP_201_CREATED
-                )
+                    status=status.HTTP_200_OK
+                ), None
+
+        return None, {
+            'serializer': serializer,
+            'preregistro_existente': preregistro_existente,
+            'numero_cedula': data['numero_cedula'],
+            'fecha_expedicion_str': data['fecha_expedicion'].strftime('%d/%m/%Y'),
+            'tipo_documento': data['tipo_documento'],
+            'nombres': data['nombres_completos'],
+        }
 
-            # Crear registro en DECRIM para obtener URL de validacion
-            biometria_service = BiometriaService()
-            resultado = biometria_service.crear_registro_decrim(
-                numero_cedula,
-                tipo_documento,
-                nombres
+    @staticmethod
+    def _tras_consulta_actu(contexto, resultado_actu):
+        """
+        Aplica el resultado de SP_CONSULTACTU: guarda el pre-registro y, en
+        modo DEV_SKIP_DECRIM, termina sin llamar a DECRIM.
+        
+        Returns:
+            Response | None: None si hay que crear el registro en DECRIM
+            (el pre-registro guardado queda en contexto['preregistro'])
+        """
+        preregistro_existente = contexto['preregistro_existente']
+        numero_cedula = contexto['numero_cedula']
+        fecha_expedicion_str = contexto['fecha_expedicion_str']
+        tipo_documento = contexto['tipo_documento']
+
+        if preregistro_existente:
+            _registrar_log_consulta_actu(
+                preregistro_existente,
+                fecha_expedicion_str,
+                resultado_actu
             )
 
-            LogIntegracion.objects.create(
-                preregistro=preregistro,
-                accion=LogIntegracion.ACCION_REGISTRO_DECRIM,
-                exitoso=resultado.get('exitoso', False),
-                request_data=resultado.get('request_data', {}),
-                response_data=resultado.get('response_data', {}),
-                error_message=resultado.get('error')
+        if not resultado_actu.get('exitoso'):
+            return Response(
+                {
+                    'error': 'No se pudo validar el estado del asociado',
+                    'detalle': resultado_actu.get('error')
+                },
+                # Circuito abierto: LINIX caido, el cliente puede reintentar luego
+                status=(
+                    status.HTTP_503_SERVICE_UNAVAILABLE
+                    if resultado_actu.get('circuito_abierto')
+                    else status.HTTP_502_BAD_GATEWAY
+                )
             )
 
-            if not resultado.get('exitoso') or not resultado.get('url'):
-                preregistro.marcar_error(
-                    resultado.get('error', 'Error creando registro en DECRIM')
-                )
-                return Response(
-                    {
-                        'error': 'No se pudo generar el link de validacion',
-                        'detalle': resultado.get('error')
-                    },
-                    status=status.HTTP_502_BAD_GATEWAY
-                )
+        if resultado_actu.get('encontrado'):
+            return Response(
+                {
+                    'error': 'El ciudadano ya es asociado y no requiere vinculaci\u00f3n digital'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Guardar en base de datos
+        preregistro = contexto['serializer'].save()
+        contexto['preregistro'] = preregistro
+        if not preregistro_existente:
+            _registrar_log_consulta_actu(preregistro, fecha_expedicion_str, resultado_actu)
+
+        preregistro.estado_vinculacion = PreRegistro.ESTADO_INICIADO
+        preregistro.mensaje_error = None
+        preregistro.justificacion_biometria = None
+        preregistro.fecha_validacion_biometria = None
+        preregistro.estado_biometria = PreRegistro.BIOMETRIA_PENDIENTE
+        preregistro.idcaso_biometria = None
+        preregistro.url_biometria = None
+        preregistro.save(update_fields=[
+            'estado_vinculacion',
+            'mensaje_error',
+            'justificacion_biometria',
+            'fecha_validacion_biometria',
+            'estado_biometria',
+            'idcaso_biometria',
+            'url_biometria',
+            'updated_at'
+        ])
+
+        dev_skip_decrim = bool(getattr(settings, 'DEV_SKIP_DECRIM', False) and settings.DEBUG)
+        dev_auto_approve = bool(getattr(settings, 'DEV_BIOMETRIA_AUTO_APPROVE', False) and settings.DEBUG)
+        if dev_skip_decrim:
+            preregistro.idcaso_biometria = f"DRYRUN-{preregistro.numero_cedula}"
+            preregistro.url_biometria = ""
+            preregistro.estado_biometria = (
+                PreRegistro.BIOMETRIA_APROBADO
+                if dev_auto_approve
+                else PreRegistro.BIOMETRIA_EN_PROCESO
+            )
+            if dev_auto_approve:
+                preregistro.fecha_validacion_biometria = timezone.now()
+                preregistro.estado_vinculacion = PreRegistro.ESTADO_BIOMETRIA_OK
 
-            preregistro.idcaso_biometria = resultado.get('codigo')
-            preregistro.url_biometria = resultado.get('url')
-            preregistro.estado_biometria = PreRegistro.BIOMETRIA_EN_PROCESO
             preregistro.save(update_fields=[
                 'idcaso_biometria',
                 'url_biometria',
                 'estado_biometria',
+                'fecha_validacion_biometria',
+                'estado_vinculacion',
                 'updated_at'
             ])
-            
-            logger.info(f"Pre-registro creado exitosamente: ID={preregistro.id}, Cedula={preregistro.numero_cedula}")
-            
-            # Serializar el objeto completo para la respuesta
+
+            LogIntegracion.objects.create(
+                preregistro=preregistro,
+                accion=LogIntegracion.ACCION_REGISTRO_DECRIM,
+                exitoso=True,
+                request_data={
+                    'numero_cedula': numero_cedula,
+                    'tipo_documento': tipo_documento,
+                    'modo_prueba': 'DEV_SKIP_DECRIM'
+                },
+                response_data={
+                    'status': 200,
+                    'message': 'DECRIM omitido por configuracion de desarrollo',
+                    'auto_aprobado': dev_auto_approve
+                },
+                error_message=None
+            )
+
             response_serializer = PreRegistroDetailSerializer(preregistro)
-            
-            # Retornar respuesta con codigo 201 (Created)
             return Response(
                 response_serializer.data,
                 status=status.HTTP_201_CREATED
             )
-        
-        else:
-            # Si hay errores de validacion
-            logger.warning(f"Error de validacion: {serializer.errors}")
-            
+
+        return None
+
+    @staticmethod
+    def _encolar_registro_decrim(preregistro):
+        """
+        Encola la creacion del caso en DECRIM y responde 202: el frontend
+        obtiene url_biometria del detalle o del estado cuando este lista.
+        """
+        RegistroDecrimService().encolar(preregistro)
+        logger.info(f"Pre-registro creado, registro DECRIM en cola: ID={preregistro.id}")
+
+        response_serializer = PreRegistroDetailSerializer(preregistro)
+        return Response(
+            response_serializer.data,
+            status=status.HTTP_202_ACCEPTED
+        )
+
+    @staticmethod
+    def _tras_registro_decrim(preregistro, resultado):
+        """
+        Registra la creacion del caso en DECRIM y guarda Idcaso y URL.
+        """
+        if not RegistroDecrimService().aplicar_resultado(preregistro, resultado):
+            if resultado.get('limitado'):
+                # Presupuesto de DECRIM agotado: el usuario puede reintentar
+                return Response(
+                    {
+                        'error': 'El servicio de validacion esta ocupado, intenta de nuevo en unos segundos',
+                        'detalle': resultado.get('error')
+                    },
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={'Retry-After': str(int(resultado.get('reintentar_en_s', 0)) + 1)}
+                )
             return Response(
                 {
-                    'error': 'Datos invalidos',
-                    'detalles': serializer.errors
+                    'error': 'No se pudo generar el link de validacion',
+                    'detalle': resultado.get('error')
                 },
-                status=status.HTTP_400_BAD_REQUEST
+                status=status.HTTP_502_BAD_GATEWAY
             )
+        
+        logger.info(f"Pre-registro creado exitosamente: ID={preregistro.id}, Cedula={preregistro.numero_cedula}")
+        
+        # Serializar el objeto completo para la respuesta
+        response_serializer = PreRegistroDetailSerializer(preregistro)
+        
+        # Retornar respuesta con codigo 201 (Created)
+        return Response(
+            response_serializer.data,
+            status=status.HTTP_201_CREATED
+        )
 
 
 class EstadoBiometriaView(APIView):
@@ -490,8 +609,12 @@ class EstadoBiometriaView(APIView):
             "estado_biometria": "APROBADO",
             "puede_continuar": true,
             "justificacion": "E01. Cedula OK, confronta facial OK",
-            "mensaje": "Validacion biometrica exitosa"
+            "mensaje": "Validacion biometrica exitosa",
+            "url_biometria": "https://..."
         }
+
+    `url_biometria` es null mientras el caso en DECRIM no este creado
+    (registro en segundo plano); el frontend abre la validacion con ella.
     
     Response 404:
         {
@@ -517,7 +640,37 @@ class EstadoBiometriaView(APIView):
         
         # Obtener el pre-registro o retornar 404 si no existe
         preregistro = get_object_or_404(PreRegistro, pk=pk)
+        biometria_service = BiometriaService()
+
+        respuesta = self._respuesta_sin_consulta(preregistro, biometria_service)
+        if respuesta is not None:
+            return self._con_url_biometria(preregistro, respuesta)
+
+        # Consultar API del proveedor
+        # Pollers concurrentes del mismo caso comparten una sola consulta
+        resultado = biometria_service.consultar_estado_caso(
+            preregistro.numero_cedula,
+            preregistro.idcaso_biometria
+        )
+        respuesta = self._respuesta_consulta(preregistro, biometria_service, resultado)
+        return self._con_url_biometria(preregistro, respuesta)
+
+    @staticmethod
+    def _con_url_biometria(preregistro, respuesta):
+        """
+        Agrega la URL de validacion a las respuestas 200 (tambien a las
+        que salen del cache del caso).
+        """
+        if respuesta.status_code == status.HTTP_200_OK and isinstance(respuesta.data, dict):
+            respuesta.data['url_biometria'] = preregistro.url_biometria or None
+        return respuesta
 
+    @staticmethod
+    def _respuesta_sin_consulta(preregistro, biometria_service):
+        """
+        Respuesta que no necesita consultar DECRIM (modo de prueba, estado
+        final, cache del caso o modo webhook), o None.
+        """
         dev_auto_approve = bool(getattr(settings, 'DEV_BIOMETRIA_AUTO_APPROVE', False) and settings.DEBUG)
         if dev_auto_approve and preregistro.estado_biometria in [
             PreRegistro.BIOMETRIA_PENDIENTE,
@@ -542,6 +695,30 @@ class EstadoBiometriaView(APIView):
                 'mensaje': 'Validacion biometrica aprobada en modo de prueba'
             })
         
+        # Registro en DECRIM en segundo plano (DECRIM_REGISTRO_ASINCRONO):
+        # todavia no hay caso que consultar
+        estado_registro = (
+            RegistroDecrimService.estado_registro(preregistro)
+            if getattr(settings, 'DECRIM_REGISTRO_ASINCRONO', False)
+            else None
+        )
+        if estado_registro == RegistroDecrimService.REGISTRO_PENDIENTE:
+            return Response({
+                'estado_biometria': PreRegistro.BIOMETRIA_PENDIENTE,
+                'puede_continuar': False,
+                'justificacion': '',
+                'url_biometria': None,
+                'mensaje': 'Generando el link de validacion. Consulta de nuevo en unos segundos.'
+            })
+        if estado_registro == RegistroDecrimService.REGISTRO_ERROR:
+            return Response(
+                {
+                    'error': 'No se pudo generar el link de validacion',
+                    'detalle': preregistro.mensaje_error
+                },
+                status=status.HTTP_502_BAD_GATEWAY
+            )
+
         # Si ya esta aprobado o rechazado, no consultar de nuevo
         if preregistro.estado_biometria in [
             PreRegistro.BIOMETRIA_APROBADO,
@@ -556,23 +733,41 @@ class EstadoBiometriaView(APIView):
                 'mensaje': 'Estado ya determinado previamente'
             })
         
-        # Consultar API del proveedor
-        biometria_service = BiometriaService()
-        resultado = biometria_service.consultar_caso_por_dni(
-            preregistro.numero_cedula,
-            preregistro.idcaso_biometria
-        )
-        
-        # Crear log de la integracion
-        log = LogIntegracion.objects.create(
-            preregistro=preregistro,
-            accion=LogIntegracion.ACCION_CONSULTA_BIOMETRIA,
-            exitoso=resultado.get('exitoso', False),
-            request_data=resultado.get('request_data', {}),
-            response_data=resultado.get('datos_completos', {}),
-            error_message=resultado.get('error'),
-            tiempo_respuesta_ms=resultado.get('tiempo_respuesta_ms')
-        )
+        # Estado reciente del caso (de otro poll o del webhook): no consultar DECRIM
+        cacheado = biometria_service.estado_cacheado(preregistro.pk)
+        if cacheado is not None:
+            return Response(cacheado)
+
+        # Modo webhook: mientras DECRIM envie webhooks, el estado sale de la BD
+        # (el reconciliador consulta los casos con webhook atrasado)
+        if biometria_service.responder_desde_base_de_datos():
+            return Response({
+                'estado_biometria': PreRegistro.BIOMETRIA_EN_PROCESO,
+                'puede_continuar': False,
+                'justificacion': '',
+                'mensaje': 'Esperando validacion biometrica. Por favor completa el proceso en la ventana del proveedor.'
+            })
+
+        return None
+
+    @staticmethod
+    def _respuesta_consulta(preregistro, biometria_service, resultado):
+        """
+        Registra los intentos de la consulta a DECRIM, aplica el estado y
+        arma la respuesta.
+        """
+        # Crear un log de la integracion por cada intento (incluye reintentos);
+        # un resultado compartido no tiene llamadas propias que registrar
+        for intento in resultado.get('intentos', [resultado]):
+            LogIntegracion.objects.create(
+                preregistro=preregistro,
+                accion=LogIntegracion.ACCION_CONSULTA_BIOMETRIA,
+                exitoso=intento.get('exitoso', False),
+                request_data=intento.get('request_data', {}),
+                response_data=intento.get('datos_completos', {}),
+                error_message=intento.get('error'),
+                tiempo_respuesta_ms=intento.get('tiempo_respuesta_ms')
+            )
         
         # Si la consulta fue exitosa
         if resultado['exitoso']:
@@ -582,32 +777,19 @@ class EstadoBiometriaView(APIView):
             # Interpretar el estado
             estado_normalizado, descripcion = biometria_service.interpretar_estado(estado_codigo)
             
-            # Actualizar pre-registro si el estado cambio
-            if preregistro.estado_biometria != estado_normalizado:
-                logger.info(f"Actualizando estado: {preregistro.estado_biometria} -> {estado_normalizado}")
-                
-                preregistro.estado_biometria = estado_normalizado
-                preregistro.idcaso_biometria = resultado.get('idcaso')
-                preregistro.justificacion_biometria = resultado.get('justificacion')
-                
-                # Si fue aprobado, actualizar fecha y estado de vinculacion
-                if estado_normalizado == PreRegistro.BIOMETRIA_APROBADO:
-                    preregistro.fecha_validacion_biometria = timezone.now()
-                    preregistro.estado_vinculacion = PreRegistro.ESTADO_BIOMETRIA_OK
-
-                if estado_normalizado == PreRegistro.BIOMETRIA_RECHAZADO:
-                    max_intentos = int(getattr(settings, 'MAX_INTENTOS_BIOMETRIA', 2))
-                    preregistro.intentos_biometria = (preregistro.intentos_biometria or 0) + 1
-                    preregistro.estado_vinculacion = PreRegistro.ESTADO_ERROR
-                    preregistro.mensaje_error = 'Validacion de identidad rechazada.'
-                    if preregistro.intentos_biometria >= max_intentos:
-                        preregistro.vetado = True
-                        preregistro.mensaje_error = (
-                            'Validacion de identidad rechazada. '
-                            'Debe comunicarse con Congente para habilitar un nuevo intento.'
-                        )
-                
-                preregistro.save()
+            # Actualizar pre-registro si el estado cambio; la fila se relee
+            # bloqueada para no aplicar dos veces un rechazo que el webhook
+            # (u otro poll) ya guardo
+            with transaction.atomic():
+                preregistro = PreRegistro.objects.select_for_update().get(pk=preregistro.pk)
+                estado_anterior = preregistro.estado_biometria
+                cambio = preregistro.aplicar_estado_biometria(
+                    estado_normalizado,
+                    idcaso=resultado.get('idcaso'),
+                    justificacion=resultado.get('justificacion')
+                )
+            if cambio:
+                logger.info(f"Actualizando estado: {estado_anterior} -> {estado_normalizado}")
             
             # Preparar respuesta
             response_data = {
@@ -616,6 +798,7 @@ class EstadoBiometriaView(APIView):
                 'justificacion': resultado.get('justificacion', ''),
                 'mensaje': descripcion
             }
+            biometria_service.guardar_estado_cache(preregistro.pk, response_data)
             
             return Response(response_data)
         
@@ -623,6 +806,18 @@ class EstadoBiometriaView(APIView):
             # Si hubo error consultando el proveedor
             error_msg = resultado.get('error', 'Error desconocido')
             
+            # Consulta frenada por el limitador: responder el estado guardado
+            if resultado.get('limitado'):
+                return Response(
+                    {
+                        'estado_biometria': preregistro.estado_biometria,
+                        'puede_continuar': preregistro.puede_continuar_a_linix(),
+                        'justificacion': '',
+                        'mensaje': 'Esperando validacion biometrica. Por favor completa el proceso en la ventana del proveedor.'
+                    },
+                    headers={'Retry-After': str(int(resultado.get('reintentar_en_s', 0)) + 1)}
+                )
+
             # Si el caso no se encuentra, es normal (aun no ha validado)
             if resultado.get('estado') in ['NO_ENCONTRADO', 'EN_PROCESO']:
                 logger.info(
@@ -630,17 +825,24 @@ class EstadoBiometriaView(APIView):
                     resultado.get('estado'),
                     preregistro.numero_cedula
                 )
-                # Actualizar estado a EN_PROCESO si estaba PENDIENTE
+                # Actualizar estado a EN_PROCESO si sigue PENDIENTE en la BD
                 if preregistro.estado_biometria == PreRegistro.BIOMETRIA_PENDIENTE:
-                    preregistro.estado_biometria = PreRegistro.BIOMETRIA_EN_PROCESO
-                    preregistro.save()
+                    PreRegistro.objects.filter(
+                        pk=preregistro.pk,
+                        estado_biometria=PreRegistro.BIOMETRIA_PENDIENTE
+                    ).update(
+                        estado_biometria=PreRegistro.BIOMETRIA_EN_PROCESO,
+                        updated_at=timezone.now()
+                    )
                 
-                return Response({
+                response_data = {
                     'estado_biometria': PreRegistro.BIOMETRIA_EN_PROCESO,
                     'puede_continuar': False,
                     'justificacion': '',
                     'mensaje': 'Esperando validacion biometrica. Por favor completa el proceso en la ventana del proveedor.'
-                })
+                }
+                biometria_service.guardar_estado_cache(preregistro.pk, response_data)
+                return Response(response_data)
 
             if resultado.get('estado') == 'NO_AUTORIZADO':
                 logger.warning(
@@ -673,6 +875,267 @@ class EstadoBiometriaView(APIView):
             )
 
 
+def _respuesta_json(respuesta):
+    """
+    Convierte la Response de DRF de un paso compartido en JsonResponse
+    (las vistas async son View de Django: DRF no soporta handlers async).
+    """
+    return JsonResponse(
+        respuesta.data,
+        status=respuesta.status_code,
+        encoder=DjangoJSONEncoder,
+        safe=False
+    )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class IniciarPreRegistroAsyncView(View):
+    """
+    POST /api/v1/preregistro/iniciar/ (con VISTAS_ASYNC=True)
+
+    Misma logica y respuestas que IniciarPreRegistroView, pero SP_CONSULTACTU
+    (oracledb asyncio) y la creacion del caso en DECRIM (httpx) se esperan
+    sin ocupar un hilo: un proceso ASGI mantiene muchas en vuelo. El ORM
+    corre en el hilo de sync_to_async.
+    """
+
+    async def post(self, request):
+        logger.info("=== Iniciando pre-registro (async) ===")
+
+        try:
+            datos = json.loads(request.body or b'{}')
+        except ValueError:
+            datos = None
+        if not isinstance(datos, dict):
+            return JsonResponse(
+                {'error': 'Datos invalidos', 'detalles': 'El cuerpo debe ser un objeto JSON'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        respuesta, contexto = await sync_to_async(IniciarPreRegistroView._validar)(datos, request)
+        if respuesta is not None:
+            return _respuesta_json(respuesta)
+
+        resultado_actu = await LinixService().consultar_actu_async(
+            contexto['numero_cedula'],
+            contexto['fecha_expedicion_str']
+        )
+        respuesta = await sync_to_async(IniciarPreRegistroView._tras_consulta_actu)(
+            contexto,
+            resultado_actu
+        )
+        if respuesta is not None:
+            return _respuesta_json(respuesta)
+
+        if getattr(settings, 'DECRIM_REGISTRO_ASINCRONO', False):
+            respuesta = await sync_to_async(IniciarPreRegistroView._encolar_registro_decrim)(
+                contexto['preregistro']
+            )
+            return _respuesta_json(respuesta)
+
+        resultado = await BiometriaService().crear_registro_decrim_async(
+            contexto['numero_cedula'],
+            contexto['tipo_documento'],
+            contexto['nombres']
+        )
+        respuesta = await sync_to_async(IniciarPreRegistroView._tras_registro_decrim)(
+            contexto['preregistro'],
+            resultado
+        )
+        return _respuesta_json(respuesta)
+
+
+class EstadoBiometriaAsyncView(View):
+    """
+    GET /api/v1/preregistro/{id}/estado-biometria/ (con VISTAS_ASYNC=True)
+
+    Misma logica y respuestas que EstadoBiometriaView; la consulta a DECRIM
+    (httpx, HTTP/2 si h2 esta instalado) se espera sin ocupar un hilo.
+    """
+
+    async def get(self, request, pk):
+        logger.info(f"=== Consultando estado biometria (async) para pre-registro ID={pk} ===")
+
+        try:
+            preregistro = await PreRegistro.objects.aget(pk=pk)
+        except PreRegistro.DoesNotExist:
+            return JsonResponse(
+                {'error': 'Pre-registro no encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        biometria_service = BiometriaService()
+        respuesta = await sync_to_async(EstadoBiometriaView._respuesta_sin_consulta)(
+            preregistro,
+            biometria_service
+        )
+        if respuesta is not None:
+            return _respuesta_json(EstadoBiometriaView._con_url_biometria(preregistro, respuesta))
+
+        resultado = await biometria_service.consultar_estado_caso_async(
+            preregistro.numero_cedula,
+            preregistro.idcaso_biometria
+        )
+        respuesta = await sync_to_async(EstadoBiometriaView._respuesta_consulta)(
+            preregistro,
+            biometria_service,
+            resultado
+        )
+        return _respuesta_json(EstadoBiometriaView._con_url_biometria(preregistro, respuesta))
+
+
+class ArchivosBiometriaView(APIView):
+    """
+    GET /api/v1/preregistro/{id}/archivos-biometria/
+
+    Lista las imagenes y el certificado del caso en DECRIM. La primera vez
+    (o con ?actualizar=1) los descarga de DECRIM por streaming al almacen
+    de archivos; despues responde desde las referencias del pre-registro.
+
+    Solo personal autenticado (is_staff, sesion del admin de Django): son
+    datos biometricos. Cada pre-registro se descarga de DECRIM a lo sumo una
+    vez cada DECRIM_ARCHIVOS_ACTUALIZAR_CADA_S segundos (429 si no).
+
+    Response 200:
+        {
+            "preregistro_id": 1,
+            "idcaso": "123",
+            "archivos": [
+                {"campo": "data.Certificado", "sha256": "...", "bytes": 123456,
+                 "tipo": "application/pdf", "url": "/api/v1/preregistro/1/archivos-biometria/<sha256>/"}
+            ]
+        }
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk):
+        preregistro = get_object_or_404(PreRegistro, pk=pk)
+
+        if not preregistro.idcaso_biometria:
+            return Response(
+                {'error': 'El pre-registro no tiene caso en DECRIM'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        actualizar = request.query_params.get('actualizar') in ('1', 'true')
+        if preregistro.archivos_biometria is None or actualizar:
+            # La consulta con imagenes se cobra: una descarga por ventana y pre-registro
+            ventana_s = int(getattr(settings, 'DECRIM_ARCHIVOS_ACTUALIZAR_CADA_S', 300))
+            if ventana_s > 0 and not cache.add(f"decrim:archivos:{preregistro.pk}", 1, ventana_s):
+                return Response(
+                    {
+                        'error': 'Los archivos de este caso se consultaron en DECRIM hace poco',
+                        'archivos_disponibles': preregistro.archivos_biometria is not None
+                    },
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
+                    headers={'Retry-After': str(ventana_s)}
+                )
+            resultado = BiometriaService().consultar_caso_por_dni(
+                preregistro.numero_cedula,
+                preregistro.idcaso_biometria,
+                incluir_imagenes=True,
+                incluir_certificado=True
+            )
+            # datos_completos solo trae referencias: el log no guarda los archivos
+            for intento in resultado.get('intentos', [resultado]):
+                LogIntegracion.objects.create(
+                    preregistro=preregistro,
+                    accion=LogIntegracion.ACCION_CONSULTA_BIOMETRIA,
+                    exitoso=intento.get('exitoso', False),
+                    request_data=intento.get('request_data', {}),
+                    response_data=intento.get('datos_completos', {}),
+                    error_message=intento.get('error'),
+                    tiempo_respuesta_ms=intento.get('tiempo_respuesta_ms')
+                )
+
+            if not resultado.get('exitoso'):
+                return Response(
+                    {
+                        'error': 'No se pudieron obtener los archivos de DECRIM',
+                        'detalles': resultado.get('error')
+                    },
+                    status=status.HTTP_502_BAD_GATEWAY
+                )
+
+            preregistro.archivos_biometria = resultado.get('archivos', [])
+            preregistro.save(update_fields=['archivos_biometria', 'updated_at'])
+
+        return Response({
+            'preregistro_id': preregistro.pk,
+            'idcaso': preregistro.idcaso_biometria,
+            'archivos': [
+                dict(
+                    archivo,
+                    url=reverse(
+                        'vinculacion:preregistro-archivo-biometria',
+                        args=[preregistro.pk, archivo['sha256']]
+                    )
+                )
+                for archivo in preregistro.archivos_biometria
+            ]
+        })
+
+
+class ArchivoBiometriaView(APIView):
+    """
+    GET /api/v1/preregistro/{id}/archivos-biometria/{sha256}/
+
+    Descarga un archivo del caso (solo si pertenece al pre-registro),
+    leido por bloques desde el almacen. Solo personal autenticado (is_staff).
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk, sha256):
+        preregistro = get_object_or_404(PreRegistro, pk=pk)
+        archivo = next(
+            (a for a in preregistro.archivos_biometria or [] if a.get('sha256') == sha256),
+            None
+        )
+        if archivo is None:
+            return Response(
+                {'error': 'Archivo no encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            contenido = AlmacenArchivos().abrir(sha256)
+        except FileNotFoundError:
+            logger.error(f"Archivo {sha256} del pre-registro {pk} no esta en el almacen")
+            return Response(
+                {'error': 'Archivo no disponible, consulte de nuevo con ?actualizar=1'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return FileResponse(contenido, content_type=archivo.get('tipo') or 'application/octet-stream')
+
+
+class DecrimEstadoView(APIView):
+    """
+    GET /api/v1/decrim/estado/
+
+    Reutilizacion de conexiones HTTP hacia DECRIM en el worker que atiende
+    la peticion (peticiones, conexiones nuevas y tasa de reutilizacion por host)
+    y modo de estado de biometria (polling o webhook, edad del ultimo webhook),
+    limitadores de llamadas (saturacion, en cola y rechazadas) y coberturas
+    de consultas lentas (retardo actual, enviadas y ganadas).
+
+    Solo personal del admin o el token de monitoreo (MONITOREO_TOKEN).
+    """
+
+    permission_classes = [EsPersonalOMonitoreo]
+
+    def get(self, request):
+        biometria_service = BiometriaService()
+        return Response({
+            'conexiones': biometria_service.estadisticas_conexiones(),
+            'modo_estado': biometria_service.estado_modo_webhook(),
+            'limitadores': biometria_service.estadisticas_limitadores(),
+            'cobertura': biometria_service.estadisticas_cobertura()
+        })
+
+
 class DecrimTokenView(APIView):
     """
     POST /api/v1/decrim/token/
@@ -763,6 +1226,9 @@ class DecrimWebhookView(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
+        # Webhook autenticado: el canal de DECRIM esta vivo (modo webhook)
+        BiometriaService().registrar_webhook_recibido()
+
         data = request.data or {}
         idcaso = data.get('Idcaso')
         dni = data.get('Dni')
@@ -803,17 +1269,39 @@ class DecrimWebhookView(APIView):
 
         biometria_service = BiometriaService()
         estado_normalizado, descripcion = biometria_service.interpretar_estado(estado)
-        preregistro.estado_biometria = estado_normalizado
-        if idcaso:
-            preregistro.idcaso_biometria = str(idcaso)
-        if justificacion:
-            preregistro.justificacion_biometria = justificacion
-
-        if estado_normalizado == PreRegistro.BIOMETRIA_APROBADO:
-            preregistro.fecha_validacion_biometria = timezone.now()
-            preregistro.estado_vinculacion = PreRegistro.ESTADO_BIOMETRIA_OK
-
-        preregistro.save()
+        # Mismas transiciones que el polling (intentos y veto en rechazos),
+        # sobre la fila bloqueada: un webhook repetido o un poll simultaneo
+        # con el mismo estado no cuenta otro intento
+        with transaction.atomic():
+            preregistro = PreRegistro.objects.select_for_update().get(pk=preregistro.pk)
+            if idcaso:
+                preregistro.idcaso_biometria = str(idcaso)
+            if not preregistro.aplicar_estado_biometria(
+                estado_normalizado,
+                justificacion=justificacion or None
+            ):
+                campos = ['idcaso_biometria', 'updated_at']
+                if justificacion:
+                    preregistro.justificacion_biometria = justificacion
+                    campos.append('justificacion_biometria')
+                preregistro.save(update_fields=campos)
+
+        # Write-through: el siguiente poll ve el estado nuevo sin consultar DECRIM
+        biometria_service.invalidar_estado_cache(
+            preregistro.pk,
+            numero_cedula=preregistro.numero_cedula,
+            idcaso=preregistro.idcaso_biometria
+        )
+        biometria_service.guardar_estado_cache(
+            preregistro.pk,
+            {
+                'estado_biometria': preregistro.estado_biometria,
+                'puede_continuar': preregistro.puede_continuar_a_linix(),
+                'justificacion': preregistro.justificacion_biometria or '',
+                'mensaje': descripcion
+            },
+            sobrescribir=True
+        )
 
         return Response(
             {
@@ -1067,7 +1555,8 @@ class VerificarLinixView(APIView):
             exitoso=resultado.get('exitoso', False),
             request_data={'numero_cedula': preregistro.numero_cedula},
             response_data=resultado.get('datos_completos', {}),
-            error_message=resultado.get('error')
+            error_message=resultado.get('error'),
+            tiempo_respuesta_ms=resultado.get('tiempo_respuesta_ms')
         )
         
         # Si la consulta a Oracle fue exitosa
@@ -1084,6 +1573,11 @@ class VerificarLinixView(APIView):
                     id_tercero=id_tercero,
                     datos_oracle=resultado.get('datos_completos')
                 )
+                # Ya es asociado: descartar un "no encontrado" cacheado del Paso 1
+                linix_service.invalidar_cache_actu(
+                    preregistro.numero_cedula,
+                    preregistro.fecha_expedicion
+                )
                 
                 # Enviar notificacion directa por correo a la agencia
                 _enviar_notificacion_agencia_email(preregistro, origen='verificar-linix')
@@ -1119,7 +1613,11 @@ class VerificarLinixView(APIView):
                     'error': 'Error al verificar el registro',
                     'detalle': error_msg
                 },
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                status=(
+                    status.HTTP_503_SERVICE_UNAVAILABLE
+                    if resultado.get('circuito_abierto')
+                    else status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
             )
     
     def _enviar_webhook_n8n(self, preregistro):
@@ -1216,14 +1714,25 @@ class VerificarLinixPendientesView(APIView):
         if limit:
             preregistros = preregistros[:limit]
 
+        preregistros = list(preregistros)
+
+        # Lotes en paralelo con plazo por lote y presupuesto total
         linix_service = LinixService()
+        verificacion = VerificacionPendientesService(linix_service).verificar(
+            [preregistro.numero_cedula for preregistro in preregistros]
+        )
+        resultados = verificacion['resultados']
         completados = []
         errores = []
+        timeouts = []
         procesados = 0
 
         for preregistro in preregistros:
             procesados += 1
-            resultado = linix_service.verificar_flujo_vinculacion(preregistro.numero_cedula)
+            resultado = resultados.get(str(preregistro.numero_cedula).strip()) or {
+                'exitoso': False,
+                'error': 'Sin resultado de Oracle para la cedula'
+            }
 
             LogIntegracion.objects.create(
                 preregistro=preregistro,
@@ -1234,7 +1743,8 @@ class VerificarLinixPendientesView(APIView):
                     'origen': 'n8n'
                 },
                 response_data=resultado.get('datos_completos', {}),
-                error_message=resultado.get('error')
+                error_message=resultado.get('error'),
+                tiempo_respuesta_ms=resultado.get('tiempo_respuesta_ms')
             )
 
             if resultado.get('exitoso') and resultado.get('encontrado'):
@@ -1242,6 +1752,10 @@ class VerificarLinixPendientesView(APIView):
                     id_tercero=resultado.get('id_tercero'),
                     datos_oracle=resultado.get('datos_completos')
                 )
+                linix_service.invalidar_cache_actu(
+                    preregistro.numero_cedula,
+                    preregistro.fecha_expedicion
+                )
                 _enviar_notificacion_agencia_email(preregistro, origen='verificar-pendientes')
                 completados.append({
                     'id': preregistro.id,
@@ -1255,6 +1769,12 @@ class VerificarLinixPendientesView(APIView):
                         else None
                     )
                 })
+            elif resultado.get('timeout'):
+                timeouts.append({
+                    'id': preregistro.id,
+                    'numero_cedula': preregistro.numero_cedula,
+                    'error': resultado.get('error')
+                })
             elif not resultado.get('exitoso'):
                 errores.append({
                     'id': preregistro.id,
@@ -1266,11 +1786,64 @@ class VerificarLinixPendientesView(APIView):
             {
                 'processed': procesados,
                 'completed': completados,
-                'errors': errores
+                'errors': errores,
+                'timeouts': timeouts,
+                'duration_ms': verificacion['duracion_ms']
             }
         )
 
 
+class LinixEstadoView(APIView):
+    """
+    GET /api/v1/linix/estado/
+
+    Estado de la integracion con Oracle/LINIX en el worker que atiende
+    la peticion (pool de sesiones: abiertas, ocupadas y tiempos de espera;
+    circuit breaker: estado, fallos consecutivos y llamadas rechazadas;
+    latencia: histograma por procedimiento;
+    indice local de terceros: fecha, tamano y tasa de falsos positivos).
+
+    Con ?sesiones=1 agrega las sesiones abiertas en Oracle por nodo
+    (consulta V$SESSION, util al escalar contenedores con o sin DRCP).
+
+    Solo personal del admin o el token de monitoreo (MONITOREO_TOKEN).
+    """
+
+    permission_classes = [EsPersonalOMonitoreo]
+
+    def get(self, request):
+        linix_service = LinixService()
+        respuesta = {
+            'pool': linix_service.estadisticas_pool(),
+            'circuit_breaker': linix_service.estado_circuit_breaker(),
+            'latencia': linix_service.estadisticas_latencia(),
+            'indice_asociados': linix_service.estadisticas_indice()
+        }
+        if request.query_params.get('sesiones') in ('1', 'true'):
+            respuesta['sesiones_por_nodo'] = linix_service.sesiones_por_nodo()
+        return Response(respuesta)
+
+
+class LinixMetricasView(APIView):
+    """
+    GET /api/v1/linix/metricas/
+
+    Histogramas de latencia por procedimiento (SP_CONSULTACTU,
+    SP_FLUJOEXITOSO, GR_TERCERO) en formato de texto de Prometheus,
+    del worker que atiende la peticion.
+
+    Solo personal del admin o el token de monitoreo (MONITOREO_TOKEN).
+    """
+
+    permission_classes = [EsPersonalOMonitoreo]
+
+    def get(self, request):
+        return HttpResponse(
+            exportar_prometheus(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+
 class PreRegistroDetailView(APIView):
     """
     GET /api/v1/preregistro/{id}/
@@ -338,12 +338,17 @@ const VinculacionDigital = () => {
       }
 
       const data = await response.json();
+      const url = data.link_biometria || data.url_biometria || LINK_BIOMETRIA;
       setPreregistroId(data.id);
-      setLinkBiometria(data.link_biometria || data.url_biometria || '');
-      setEstadoBiometriaInfo({ mensaje: '', justificacion: '' });
+      setLinkBiometria(url || '');
+      setEstadoBiometria('PENDIENTE');
+      setEstadoBiometriaInfo({
+        // 202: el caso en DECRIM se crea en segundo plano; la URL llega con el polling
+        mensaje: url ? '' : 'Generando el link de validacion...',
+        justificacion: ''
+      });
       
-      if (data.link_biometria || data.url_biometria || LINK_BIOMETRIA) {
-        const url = data.link_biometria || data.url_biometria || LINK_BIOMETRIA;
+      if (url) {
         window.open(url, '_blank');
       }
       
@@ -376,7 +381,7 @@ const VinculacionDigital = () => {
         clearInterval(intervalo);
         console.log('Biometria APROBADA - Avanzando al paso 3');
         await obtenerLinkLinix(id);
-      } else if (estado === 'RECHAZADO') {
+      } else if (estado === 'RECHAZADO' || estado === 'ERROR') {
         clearInterval(intervalo);
       }
     }, 5000);
@@ -388,6 +393,14 @@ const VinculacionDigital = () => {
     try {
       const response = await fetch(`${API_BASE_URL}/preregistro/${id}/estado-biometria/`);
       
+      if (response.status === 502) {
+        // No se pudo crear el caso en DECRIM: se reintenta con el Paso 1
+        const errorData = await response.json();
+        setEstadoBiometria('ERROR');
+        setEstadoBiometriaInfo({ mensaje: errorData.error || 'No se pudo generar el link de validacion', justificacion: '' });
+        return 'ERROR';
+      }
+
       if (!response.ok) {
         console.error('Error al consultar estado');
         return estadoBiometria;
@@ -396,6 +409,9 @@ const VinculacionDigital = () => {
       const data = await response.json();
       console.log('Estado biometria:', data.estado_biometria);
       
+      if (data.url_biometria) {
+        setLinkBiometria(data.url_biometria);
+      }
       setEstadoBiometria(data.estado_biometria);
       setEstadoBiometriaInfo({
         mensaje: data.mensaje || '',
@@ -853,11 +869,11 @@ const VinculacionDigital = () => {
                     {estadoBiometriaInfo.mensaje || 'Redirigiendo al formulario de LINIX...'}
                   </p>
                 </>
-              ) : estadoBiometria === 'RECHAZADO' ? (
+              ) : estadoBiometria === 'RECHAZADO' || estadoBiometria === 'ERROR' ? (
                 <>
                   <AlertCircle className="w-16 h-16 text-red-600 mx-auto mb-4" />
                   <p className="text-red-600 font-semibold mb-2">
-                    Validacion Rechazada
+                    {estadoBiometria === 'ERROR' ? 'No se pudo iniciar la validacion' : 'Validacion Rechazada'}
                   </p>
                   <p className="text-gray-600">
                     {estadoBiometriaInfo.mensaje || 'No fue posible validar tu identidad.'}